@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+from json.encoder import encode_basestring_ascii as _encode_str
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .synthesize import SynthesisError
+
+# Response encodings of POST /synthesize.
+#
+# "json" is the default response with nested networks.  "columns" is the same
+# JSON with the pdn and pun networks exported as parallel arrays
+# (export_network_columns), "shared" has nested networks with repeated
+# sub-networks written once (export_network_shared), and "msgpack" is the
+# columnar response encoded as MessagePack.  The encoder below covers the types a response holds; integer
+# arrays, which is what columnar networks are made of, are packed in bulk
+# rather than value by value.  A request picks its encoding with the `format`
+# field, or else with the Accept header.
+#
+# JSON bodies are written by iter_json() straight from the result dict, in
+# chunks the routes stream out, instead of going through jsonable_encoder()
+# and one json.dumps() string.
+
+RESPONSE_FORMATS = ("json", "columns", "shared", "msgpack")
+COLUMNS_TYPE = "application/vnd.bool2cmos.columns+json"
+SHARED_TYPE = "application/vnd.bool2cmos.shared+json"
+MSGPACK_TYPE = "application/msgpack"
+
+_CHUNK_ITEMS = 4096
+_INFINITY = float("inf")
+
+_MEDIA_TYPES = {
+    "application/json": "json",
+    "application/*": "json",
+    "*/*": "json",
+    COLUMNS_TYPE: "columns",
+    SHARED_TYPE: "shared",
+    MSGPACK_TYPE: "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+}
+
+
+def response_format(requested: Optional[str] = None, accept: Optional[str] = None) -> str:
+    """
+    The encoding for a response: `requested` when given, else the most
+    preferred media type of the Accept header that has one, else "json".
+    """
+    if requested is not None:
+        if requested not in RESPONSE_FORMATS:
+            raise SynthesisError(f"Unknown format {requested!r}; expected one of {', '.join(RESPONSE_FORMATS)}.")
+        return requested
+    offers: List[Tuple[float, int, str]] = []
+    for position, item in enumerate((accept or "").split(",")):
+        media, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        fmt = _MEDIA_TYPES.get(media.lower())
+        if fmt is not None and quality > 0:
+            offers.append((-quality, position, fmt))
+    return min(offers)[2] if offers else "json"
+
+
+# Network format (see NETWORK_FORMATS) of each response format.
+NETWORK_LAYOUTS = {"json": "nested", "columns": "columns", "shared": "shared", "msgpack": "columns"}
+
+
+def media_type(fmt: str) -> str:
+    return {"json": "application/json", "columns": COLUMNS_TYPE, "shared": SHARED_TYPE, "msgpack": MSGPACK_TYPE}[fmt]
+
+
+def iter_json(value: Any, chunk_items: int = _CHUNK_ITEMS) -> Iterator[bytes]:
+    """
+    The compact JSON encoding of `value` (as json.dumps with separators
+    (",", ":") writes it), in chunks of UTF-8 bytes.  One pass over the value,
+    with an explicit stack, so nesting depth is not limited by recursion and
+    at most about `chunk_items` encoded pieces are held at a time.
+    """
+    out: List[str] = []
+    keys: Dict[Any, str] = {}  # encoded `"key":` prefixes; responses repeat few keys
+    # Open containers: (enumerated items, closing bracket); dict items are
+    # (key, value) pairs.
+    stack: List[Tuple[Iterator[Tuple[int, Any]], str]] = []
+    while True:
+        t = type(value)
+        encode = _SCALARS.get(t)
+        if encode is not None:
+            out.append(encode(value))
+        elif t is dict:
+            if _SCALARS.keys() >= set(map(type, value.values())):
+                # Flat objects (transistors, counts, styles) in one piece.
+                parts = []
+                for k, v in value.items():
+                    prefix = keys.get(k)
+                    if prefix is None:
+                        prefix = keys[k] = _encode_key(k) + ":"
+                    parts.append(prefix + _SCALARS[type(v)](v))
+                out.append("{" + ",".join(parts) + "}")
+            else:
+                out.append("{")
+                stack.append((enumerate(value.items()), "}"))
+        elif t is list or t is tuple:
+            kinds = set(map(type, value))
+            if len(kinds) == 1 and kinds <= _SCALARS.keys():
+                out.append("[" + ",".join(map(_SCALARS[kinds.pop()], value)) + "]")
+            elif value:
+                out.append("[")
+                stack.append((enumerate(value), "]"))
+            else:
+                out.append("[]")
+        else:
+            out.append(_encode_other(value))
+        if len(out) >= chunk_items:
+            yield "".join(out).encode("utf-8")
+            out = []
+        while stack:
+            items, close = stack[-1]
+            item = next(items, None)
+            if item is None:
+                out.append(close)
+                stack.pop()
+                continue
+            index, value = item
+            if close == "}":
+                key, value = value
+                prefix = keys.get(key)
+                if prefix is None:
+                    prefix = keys[key] = _encode_key(key) + ":"
+                out.append("," + prefix if index else prefix)
+            elif index:
+                out.append(",")
+            break
+        else:
+            break
+    yield "".join(out).encode("utf-8")
+
+
+def _encode_float(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (_INFINITY, -_INFINITY):
+        return "Infinity" if value > 0 else "-Infinity"
+    return float.__repr__(value)
+
+
+_SCALARS: Dict[type, Callable[[Any], str]] = {
+    str: _encode_str,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "null",
+}
+
+
+def _encode_other(value: Any) -> str:
+    # Subclasses of the JSON types: rare in a response, so encoded in one go.
+    if isinstance(value, (str, int, float, dict, list, tuple)) or value is None:
+        return json.dumps(value, separators=(",", ":"))
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_key(key: Any) -> str:
+    if isinstance(key, str):
+        return _encode_str(key)
+    if key is None or isinstance(key, (bool, int, float)):
+        return json.dumps({key: 0})[1:-4]
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def json_size(value: Any) -> int:
+    """Length of iter_json()'s output, without holding all of it at once."""
+    return sum(map(len, iter_json(value)))
+
+
+def packb(value: Any) -> bytes:
+    """MessagePack encoding of a JSON-like value (None, bool, int, float, str, bytes, lists, dicts)."""
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def _pack(value: Any, out: bytearray) -> None:
+    # Recursive: responses are shallow once their networks are columnar.
+    if value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif type(value) is int:
+        _pack_int(value, out)
+    elif type(value) is float:
+        out += struct.pack(">Bd", 0xCB, value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        n = len(data)
+        if n < 32:
+            out.append(0xA0 | n)
+        elif n < 0x100:
+            out += struct.pack(">BB", 0xD9, n)
+        elif n < 0x10000:
+            out += struct.pack(">BH", 0xDA, n)
+        else:
+            out += struct.pack(">BI", 0xDB, n)
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        n = len(value)
+        if n < 0x100:
+            out += struct.pack(">BB", 0xC4, n)
+        elif n < 0x10000:
+            out += struct.pack(">BH", 0xC5, n)
+        else:
+            out += struct.pack(">BI", 0xC6, n)
+        out += value
+    elif isinstance(value, (list, tuple)):
+        _header(len(value), 0x90, 0xDC, out)
+        if value and set(map(type, value)) == {int} and _pack_ints(value, out):
+            return
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        _header(len(value), 0x80, 0xDE, out)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+def _header(n: int, fix: int, wide: int, out: bytearray) -> None:
+    if n < 16:
+        out.append(fix | n)
+    elif n < 0x10000:
+        out += struct.pack(">BH", wide, n)
+    else:
+        out += struct.pack(">BI", wide + 1, n)
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    if 0 <= value < 0x80 or -32 <= value < 0:
+        out.append(value & 0xFF)
+    elif 0 <= value < 0x100000000:
+        out += struct.pack(">BI", 0xCE, value)
+    elif -0x80000000 <= value < 0:
+        out += struct.pack(">Bi", 0xD2, value)
+    elif 0 <= value < 0x10000000000000000:
+        out += struct.pack(">BQ", 0xCF, value)
+    else:
+        out += struct.pack(">Bq", 0xD3, value)
+
+
+def _pack_ints(values: Any, out: bytearray) -> bool:
+    # Every value as a fixint when they all fit in one byte, else every value
+    # as an int32; both are plain MessagePack.  False if they do not fit.
+    low, high = min(values), max(values)
+    if -32 <= low and high < 0x80:
+        out += array("b", values).tobytes()
+        return True
+    if -0x80000000 <= low and high < 0x80000000:
+        words = array("i", values)
+        if sys.byteorder == "little":
+            words.byteswap()
+        raw = words.tobytes()
+        n = len(values)
+        packed = bytearray(5 * n)
+        packed[0::5] = b"\xd2" * n
+        for i in range(4):
+            packed[i + 1 :: 5] = raw[i::4]
+        out += packed
+        return True
+    return False
+
+
+def unpackb(data: bytes) -> Any:
+    """Decodes what packb() produces (any MessagePack without extension types)."""
+    value, end = _unpack(memoryview(data), 0)
+    if end != len(data):
+        raise ValueError("Trailing data after MessagePack value")
+    return value
+
+
+def _unpack(data: memoryview, i: int) -> Tuple[Any, int]:
+    b = data[i]
+    i += 1
+    if b < 0x80:
+        return b, i
+    if b >= 0xE0:
+        return b - 0x100, i
+    if b & 0xE0 == 0xA0:
+        return _str(data, i, b & 0x1F)
+    if b & 0xF0 == 0x90:
+        return _array(data, i, b & 0x0F)
+    if b & 0xF0 == 0x80:
+        return _map(data, i, b & 0x0F)
+    if b == 0xC0:
+        return None, i
+    if b in (0xC2, 0xC3):
+        return b == 0xC3, i
+    fixed = _FIXED.get(b)
+    if fixed is not None:
+        fmt, size = fixed
+        return struct.unpack_from(fmt, data, i)[0], i + size
+    sized = _SIZED.get(b)
+    if sized is None:
+        raise ValueError(f"Unsupported MessagePack type byte 0x{b:02x}")
+    fmt, size, read = sized
+    (n,) = struct.unpack_from(fmt, data, i)
+    return read(data, i + size, n)
+
+
+def _str(data: memoryview, i: int, n: int) -> Tuple[Any, int]:
+    return str(data[i : i + n], "utf-8"), i + n
+
+
+def _bin(data: memoryview, i: int, n: int) -> Tuple[Any, int]:
+    return bytes(data[i : i + n]), i + n
+
+
+def _array(data: memoryview, i: int, n: int) -> Tuple[Any, int]:
+    items = []
+    for _ in range(n):
+        item, i = _unpack(data, i)
+        items.append(item)
+    return items, i
+
+
+def _map(data: memoryview, i: int, n: int) -> Tuple[Any, int]:
+    items = {}
+    for _ in range(n):
+        key, i = _unpack(data, i)
+        items[key], i = _unpack(data, i)
+    return items, i
+
+
+_FIXED = {
+    0xCA: (">f", 4),
+    0xCB: (">d", 8),
+    0xCC: (">B", 1),
+    0xCD: (">H", 2),
+    0xCE: (">I", 4),
+    0xCF: (">Q", 8),
+    0xD0: (">b", 1),
+    0xD1: (">h", 2),
+    0xD2: (">i", 4),
+    0xD3: (">q", 8),
+}
+_SIZED = {
+    0xC4: (">B", 1, _bin),
+    0xC5: (">H", 2, _bin),
+    0xC6: (">I", 4, _bin),
+    0xD9: (">B", 1, _str),
+    0xDA: (">H", 2, _str),
+    0xDB: (">I", 4, _str),
+    0xDC: (">H", 2, _array),
+    0xDD: (">I", 4, _array),
+    0xDE: (">H", 2, _map),
+    0xDF: (">I", 4, _map),
+}
+
+
+__all__ = [
+    "COLUMNS_TYPE",
+    "MSGPACK_TYPE",
+    "NETWORK_LAYOUTS",
+    "RESPONSE_FORMATS",
+    "SHARED_TYPE",
+    "iter_json",
+    "json_size",
+    "media_type",
+    "packb",
+    "response_format",
+    "unpackb",
+]
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Request metrics in the Prometheus text exposition format, served at
+# GET /metrics.
+#
+# Routes run the pipeline with `timings=True` and hand the "timings" section of
+# each response to observe(): stage times go into
+# `bool2cmos_stage_seconds{endpoint,stage}` and the DAG sizes around each
+# transform into `bool2cmos_transform_nodes{endpoint,transform,phase}`.
+# Outcomes (ok, cached, error, timeout, rejected) are counted in
+# `bool2cmos_requests_total{endpoint,outcome}`.  Cache hits carry no stage
+# times and only count as requests.  BOOL2CMOS_METRICS=0 turns collection off,
+# and the pipeline then runs without its stage clock.
+
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+NODE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}  # bucket counts..., sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        for key, values in series:
+            for bound, count in zip(self.buckets + (math.inf,), values[:-2] + [values[-1]]):
+                lines.append(f"{self.name}_bucket{_labels(key + (('le', _number(bound)),))} {_number(count)}")
+            lines.append(f"{self.name}_sum{_labels(key)} {_number(values[-2])}")
+            lines.append(f"{self.name}_count{_labels(key)} {_number(values[-1])}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._series: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = sorted(self._series.items())
+        lines.extend(f"{self.name}{_labels(key)} {_number(value)}" for key, value in series)
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stage_seconds = Histogram(
+            "bool2cmos_stage_seconds", "Wall time of each pipeline stage.", STAGE_BUCKETS
+        )
+        self.transform_nodes = Histogram(
+            "bool2cmos_transform_nodes", "Distinct expression nodes before and after each transform.", NODE_BUCKETS
+        )
+        self.requests = Counter("bool2cmos_requests_total", "Pipeline requests by outcome.")
+
+    @classmethod
+    def from_env(cls) -> "MetricsRegistry":
+        """Enabled unless BOOL2CMOS_METRICS is 0, false or off."""
+        return cls(enabled=os.environ.get("BOOL2CMOS_METRICS", "1").lower() not in ("0", "false", "off"))
+
+    def observe(self, endpoint: str, timings: Optional[Mapping[str, Any]]) -> None:
+        """Records one successful request from the "timings" section of its response."""
+        if not self.enabled:
+            return
+        if not timings or "stages" not in timings:
+            self.requests.inc(endpoint=endpoint, outcome="cached" if timings else "ok")
+            return
+        self.requests.inc(endpoint=endpoint, outcome="ok")
+        for stage, ms in timings["stages"].items():
+            self.stage_seconds.observe(ms / 1000, endpoint=endpoint, stage=stage)
+        for transform, sizes in timings.get("nodes", {}).items():
+            for phase, nodes in sizes.items():
+                self.transform_nodes.observe(nodes, endpoint=endpoint, transform=transform, phase=phase)
+
+    def failed(self, endpoint: str, outcome: str) -> None:
+        if self.enabled:
+            self.requests.inc(endpoint=endpoint, outcome=outcome)
+
+    def render(self, gauges: Optional[Mapping[str, Mapping[str, Any]]] = None) -> str:
+        """
+        The registry in Prometheus text format.  `gauges` maps a metric prefix
+        to a stats dict (ResultCache.stats(), SynthesisPool.stats()); its
+        numeric fields are appended as `<prefix>_<field>` gauges.
+        """
+        lines = self.stage_seconds.render() + self.transform_nodes.render() + self.requests.render()
+        for prefix, stats in (gauges or {}).items():
+            lines.extend(_gauges(prefix, stats))
+        return "\n".join(lines) + "\n"
+
+
+def _gauges(prefix: str, stats: Mapping[str, Any]) -> Iterable[str]:
+    for field, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{_snake(field)}"
+        yield f"# TYPE {name} gauge"
+        yield f"{name} {_number(value)}"
+
+
+def _snake(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _labels(key: Labels) -> str:
+    if not key:
+        return ""
+    pairs = (k + '="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"' for k, v in key)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+__all__ = ["CONTENT_TYPE", "Counter", "Histogram", "MetricsRegistry"]
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from .encoding import json_size
+from .synthesize import (
+    Budget,
+    CancelToken,
+    SynthesisError,
+    TokenStream,
+    TransformCache,
+    inspect_complement_nnf,
+    select_steps,
+    synthesize,
+    tokenize,
+)
+
+# Whole-response cache in front of synthesize() and inspect_complement_nnf().
+#
+# Requests are keyed on their token stream, so whitespace, letter case and the
+# operator aliases (`&`/`*`/`AND`, `|`/`+`/`OR`, `!`/`~`/`NOT`) do not matter,
+# plus the render style detected from the text: the response prints every step
+# in the user's notation, so `A+B` and `A|B` are different entries while
+# `A & B`, `A*B` and `a AND b` share one.  The echoed input expression is the
+# only part of a response that depends on the raw text; it is swapped in on
+# every hit.
+#
+# Entries are evicted least-recently-used once either the entry count or the
+# total size (the length of the JSON encoding, counted chunk by chunk without
+# building it) goes over its limit, and expire after `ttl` seconds when one is
+# set.  Failed requests are not cached, and neither are stage timings: a hit
+# asked for timings reports {"cached": true}.  Responses limited to some steps,
+# or with columnar networks, are entries of their own.  A session's transform
+# cache (see sessions.py) only serves misses: the response is the same with or
+# without it.  Results cut short by a budget are not cached; a request with a
+# budget is still served a complete result when one is cached.
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries <= 0 or max_bytes <= 0:
+            raise ValueError("max_entries and max_bytes must be positive")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Limits from BOOL2CMOS_RESULT_CACHE_ENTRIES / _BYTES / _TTL, where set."""
+        ttl = os.environ.get("BOOL2CMOS_RESULT_CACHE_TTL")
+        return cls(
+            max_entries=int(os.environ.get("BOOL2CMOS_RESULT_CACHE_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            max_bytes=int(os.environ.get("BOOL2CMOS_RESULT_CACHE_BYTES", DEFAULT_MAX_BYTES)),
+            ttl=float(ttl) if ttl else None,
+        )
+
+    def synthesize(
+        self,
+        expression: str,
+        mode: str = "default",
+        cancel: Optional[CancelToken] = None,
+        timings: bool = False,
+        fields: Optional[Iterable[str]] = None,
+        network_format: str = "nested",
+        cache: Optional[TransformCache] = None,
+        budget: Optional[Budget] = None,
+    ) -> Dict[str, Any]:
+        names = select_steps(fields)
+        return self._lookup(
+            ("synthesize", mode, network_format, ",".join(names) if names is not None else "*"),
+            expression,
+            lambda source: synthesize(
+                source,
+                cache=cache,
+                mode=mode,
+                cancel=cancel,
+                timings=timings,
+                fields=names,
+                network_format=network_format,
+                budget=budget,
+            ),
+            timings,
+        )
+
+    def inspect_complement_nnf(
+        self,
+        expression: str,
+        method: str = "auto",
+        cancel: Optional[CancelToken] = None,
+        timings: bool = False,
+    ) -> Dict[str, Any]:
+        return self._lookup(
+            ("inspect", method),
+            expression,
+            lambda source: inspect_complement_nnf(source, method=method, cancel=cancel, timings=timings),
+            timings,
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, stored = entry
+            if self.ttl is not None and self._clock() - stored >= self.ttl:
+                del self._data[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        size = json_size(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                return  # would evict everything else and still not fit
+            self._data[key] = (value, size, self._clock())
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted, _) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "maxEntries": self.max_entries,
+                "maxBytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
+
+    def _lookup(
+        self,
+        kind: Tuple[str, ...],
+        expression: str,
+        compute: Callable[[Union[str, TokenStream]], Dict[str, Any]],
+        timings: bool = False,
+    ) -> Dict[str, Any]:
+        if not isinstance(expression, str):
+            return compute(expression)  # let the pipeline report it
+        try:
+            stream = tokenize(expression)
+        except SynthesisError:
+            return compute(expression)
+        key = "\x1f".join(kind) + "\x1e" + stream.key()
+        value = self.get(key)
+        if value is None:
+            result = compute(stream)  # parsed from the tokens already lexed for the key
+            if not result.get("truncated"):  # a budget ran out; a later request may do better
+                self.put(key, {k: v for k, v in result.items() if k != "timings"})  # timings describe one run only
+            return result
+        # Shallow copy: the cached steps are shared and must not be modified.
+        hit = {**value, "input": {**value["input"], "expression": expression}}
+        if timings:
+            hit["timings"] = {"cached": True}
+        return hit
+
+
+def request_key(expression: str) -> str:
+    """Normalized token stream and render style of an expression."""
+    return tokenize(expression).key()
+
+
+__all__ = ["ResultCache", "request_key"]
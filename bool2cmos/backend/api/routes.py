@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import itertools
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from .encoding import NETWORK_LAYOUTS, iter_json, media_type, packb, response_format
+from .metrics import CONTENT_TYPE, MetricsRegistry
+from .result_cache import ResultCache
+from .sessions import SessionStore
+from .synthesize import SYNTHESIS_MODES, Budget, SynthesisCancelled, SynthesisError, read_batch, select_steps
+from .worker_pool import PoolSaturated, SynthesisPool
+
+# The synthesis routes, bound to the caches, pool and registries they share.
+# build_router() creates no state of its own: create_app() makes one of each
+# and includes the router, so importing this module starts no threads.
+
+
+class SynthesizeRequest(BaseModel):
+    expr: str
+    mode: str = "default"
+    timings: bool = False
+    fields: Optional[List[str]] = None
+    format: Optional[str] = None
+    session: Optional[str] = None
+    budgetMs: Optional[float] = None
+
+
+class InspectRequest(BaseModel):
+    expr: str
+    method: str = "auto"
+    timings: bool = False
+
+
+def build_router(
+    results: ResultCache,
+    pool: SynthesisPool,
+    metrics: MetricsRegistry,
+    sessions: SessionStore,
+) -> APIRouter:
+    router = APIRouter()
+
+    async def offload(endpoint: str, fn: Any, *args: Any, timings: bool = False, **kwargs: Any) -> Dict[str, Any]:
+        # Stage timings are collected for /metrics as well, but only returned when asked for.
+        try:
+            result = await pool.run(fn, *args, timings=timings or metrics.enabled, **kwargs)
+        except SynthesisCancelled as e:
+            metrics.failed(endpoint, "timeout")
+            raise HTTPException(status_code=408, detail=str(e))
+        except PoolSaturated as e:
+            metrics.failed(endpoint, "rejected")
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        except SynthesisError as e:
+            metrics.failed(endpoint, "error")
+            raise HTTPException(status_code=400, detail=str(e))
+        metrics.observe(endpoint, result.get("timings"))
+        if not timings:
+            result.pop("timings", None)
+        return result
+
+    def json_response(result: Dict[str, Any], fmt: str = "json") -> Response:
+        # Encoded straight to bytes, skipping jsonable_encoder.  Results that
+        # fit in one chunk go out whole; larger ones (networks, truth tables)
+        # stream chunk by chunk while the rest is encoded.
+        chunks = iter_json(result)
+        head = next(chunks)
+        following = next(chunks, None)
+        if following is None:
+            return Response(head, media_type=media_type(fmt))
+        return StreamingResponse(itertools.chain((head, following), chunks), media_type=media_type(fmt))
+
+    @router.post("/synthesize")
+    async def synthesize_route(payload: SynthesizeRequest, request: Request) -> Response:
+        try:
+            fmt = response_format(payload.format, request.headers.get("accept"))
+            cache = sessions.cache(payload.session) if payload.session is not None else None
+            budget = Budget(timeout=payload.budgetMs / 1000) if payload.budgetMs is not None else None
+        except SynthesisError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        result = await offload(
+            "synthesize",
+            results.synthesize,
+            payload.expr,
+            mode=payload.mode,
+            timings=payload.timings,
+            fields=payload.fields,
+            network_format=NETWORK_LAYOUTS[fmt],
+            cache=cache,
+            budget=budget,
+        )
+        if fmt == "msgpack":
+            return Response(packb(result), media_type=media_type(fmt))
+        return json_response(result, fmt)
+
+    @router.post("/synthesize/batch")
+    async def synthesize_batch_route(
+        request: Request, mode: str = "default", fields: Optional[str] = None
+    ) -> StreamingResponse:
+        if mode not in SYNTHESIS_MODES:
+            raise HTTPException(status_code=400, detail=f"Unknown synthesis mode {mode!r}.")
+        try:
+            names = select_steps(fields)
+            expressions = read_batch(await request.body(), request.headers.get("content-type", ""))
+        except SynthesisError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Each expression runs on the pool; the first one before the response
+        # starts, so that a saturated pool is answered with a 503.
+        records = pool.batch(expressions, mode=mode, fields=names, metrics=metrics)
+        try:
+            first = await records.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except PoolSaturated as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+        async def lines() -> AsyncIterator[str]:
+            if first is None:
+                return
+            yield json.dumps(first, separators=(",", ":")) + "\n"
+            async for record in records:
+                yield json.dumps(record, separators=(",", ":")) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @router.get("/cache/stats")
+    def cache_stats_route() -> Dict[str, Any]:
+        return {**results.stats(), "pool": pool.stats(), "sessions": sessions.stats()}
+
+    @router.delete("/sessions/{session_id}")
+    def drop_session_route(session_id: str) -> Dict[str, bool]:
+        return {"dropped": sessions.drop(session_id)}
+
+    @router.get("/metrics")
+    def metrics_route() -> PlainTextResponse:
+        text = metrics.render(
+            {
+                "bool2cmos_result_cache": results.stats(),
+                "bool2cmos_pool": pool.stats(),
+                "bool2cmos_sessions": sessions.stats(),
+            }
+        )
+        return PlainTextResponse(text, media_type=CONTENT_TYPE)
+
+    @router.post("/debug/nnf")
+    async def debug_nnf_route(payload: InspectRequest) -> Response:
+        result = await offload(
+            "inspect", results.inspect_complement_nnf, payload.expr, method=payload.method, timings=payload.timings
+        )
+        return json_response(result)
+
+    @router.post("/debug/complement-nnf")
+    async def debug_complement_nnf_route(payload: InspectRequest) -> Response:
+        result = await offload(
+            "inspect", results.inspect_complement_nnf, payload.expr, method=payload.method, timings=payload.timings
+        )
+        return json_response(result)
+
+    return router
+
+
+__all__ = ["InspectRequest", "SynthesizeRequest", "build_router"]
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .synthesize import SynthesisError, TransformCache
+
+# Edit sessions: one TransformCache per client, kept between requests.
+#
+# An editor sends every revision of an expression with the same session id,
+# usually in "incremental" mode; TransformCache describes what is reused.
+#
+# Sessions are dropped least-recently-used past `max_sessions`, and after
+# `ttl` seconds without a request.  Each memo table of a session holds at most
+# `max_entries` nodes.
+
+DEFAULT_MAX_SESSIONS = 256
+DEFAULT_TTL = 900.0
+DEFAULT_MAX_ENTRIES = 16384
+MAX_SESSION_ID = 128
+
+
+class SessionStore:
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        ttl: Optional[float] = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_sessions <= 0 or max_entries <= 0:
+            raise ValueError("max_sessions and max_entries must be positive")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Tuple[TransformCache, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """Limits from BOOL2CMOS_SESSIONS / _SESSION_TTL / _SESSION_ENTRIES, where set."""
+        ttl = float(os.environ.get("BOOL2CMOS_SESSION_TTL", DEFAULT_TTL))
+        return cls(
+            max_sessions=int(os.environ.get("BOOL2CMOS_SESSIONS", DEFAULT_MAX_SESSIONS)),
+            ttl=ttl if ttl > 0 else None,
+            max_entries=int(os.environ.get("BOOL2CMOS_SESSION_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        )
+
+    def cache(self, session_id: str) -> TransformCache:
+        """The session's transform cache, created on first use."""
+        if not isinstance(session_id, str) or not 0 < len(session_id) <= MAX_SESSION_ID:
+            raise SynthesisError(f"Session id must be a string of 1 to {MAX_SESSION_ID} characters.")
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.pop(session_id, None)
+            cache = entry[0] if entry is not None else TransformCache(self.max_entries)
+            if entry is None:
+                self.created += 1
+            self._sessions[session_id] = (cache, now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+            return cache
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(self._clock())
+            return {
+                "sessions": len(self._sessions),
+                "created": self.created,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "maxSessions": self.max_sessions,
+                "ttl": self.ttl,
+            }
+
+    def _expire(self, now: float) -> None:
+        # Oldest first, so stop at the first session still in use.
+        if self.ttl is None:
+            return
+        while self._sessions:
+            session_id, (_, used) = next(iter(self._sessions.items()))
+            if now - used < self.ttl:
+                break
+            del self._sessions[session_id]
+            self.expirations += 1
+
+
+__all__ = ["SessionStore"]
@@ -1,43 +1,230 @@
 from __future__ import annotations
 
+import itertools
+import json
+import re
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
 
 class SynthesisError(ValueError):
     pass
 
 
+class SynthesisCancelled(SynthesisError):
+    """Raised from inside the pipeline when its CancelToken is cancelled or past its deadline."""
+
+
 # ---- AST ----
+#
+# Expression nodes are hash-consed: every constructor call goes through a unique
+# table, so structurally identical subtrees are the same object.  Equality is an
+# identity check, the hash is a per-node integer id, and shared subterms are
+# stored once no matter how many passes rebuild them.
+#
+# Each node also carries a precomputed `sort_key` used to order And/Or
+# children.  It follows the order of the rendered strings without rendering
+# anything: nodes compare first by the rendered prefix up to their first
+# literal (`!A`, `!(B`, `(C`, `1`), then a literal sorts before an And, which
+# sorts before an Or (`a` < `a&b` < `a|b`), then by their children's keys.  Past
+# `_SORT_KEY_DEPTH` levels the nested part of the key is replaced by a
+# structural digest so comparing two deep keys stays shallow.
+
+
+_unique_table: "weakref.WeakValueDictionary[Tuple[Any, ...], _Node]" = weakref.WeakValueDictionary()
+_unique_lock = threading.Lock()
+_next_uid = itertools.count(1)
+
+_SORT_KEY_DEPTH = 32
+
+
+class _Node:
+    __slots__ = ("uid", "height", "digest", "sort_key", "__weakref__")
+
+    uid: int
+    height: int
+    digest: int
+    sort_key: Tuple[Any, ...]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __hash__(self) -> int:
+        return self.uid
+
+    def __eq__(self, other: object) -> bool:
+        return self is other
+
+    def __ne__(self, other: object) -> bool:
+        return self is not other
+
+    def __copy__(self) -> "_Node":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "_Node":
+        return self
+
+
+def _intern(cls: type, key: Tuple[Any, ...], fields: Tuple[Tuple[str, Any], ...]) -> Any:
+    node = _unique_table.get(key)
+    if node is not None:
+        return node
+    with _unique_lock:
+        node = _unique_table.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            object.__setattr__(node, "uid", next(_next_uid))
+            for name, value in fields:
+                object.__setattr__(node, name, value)
+            node._init_order()
+            _unique_table[key] = node
+    return node
+
+
+def _set_order(
+    node: "_Node",
+    lead: str,
+    rank: int,
+    tag: int,
+    children: Tuple["_Node", ...],
+    keys: Optional[Tuple[Any, ...]] = None,
+) -> None:
+    height = 1 + max(c.height for c in children) if children else 0
+    digest = hash((tag,) + tuple(c.digest for c in children))
+    if height <= _SORT_KEY_DEPTH:
+        if keys is None:
+            keys = tuple(c.sort_key for c in children)
+        sort_key: Tuple[Any, ...] = (lead, rank, 0, keys)
+    else:
+        sort_key = (lead, rank, 1, digest)
+    object.__setattr__(node, "height", height)
+    object.__setattr__(node, "digest", digest)
+    object.__setattr__(node, "sort_key", sort_key)
 
 
-@dataclass(frozen=True, slots=True)
-class Var:
+def _wrapped_key(expr: "_Node") -> Tuple[Any, ...]:
+    # Key of `expr` rendered inside parentheses: it sorts like a single atom.
+    return ("(" + expr.sort_key[0], 0, 0, (expr.sort_key,))
+
+
+def _order_key(expr: "_Node") -> Tuple[Any, ...]:
+    return expr.sort_key
+
+
+class Var(_Node):
+    __slots__ = ("name",)
+
     name: str
 
+    def __new__(cls, name: str) -> "Var":
+        return _intern(cls, ("var", name), (("name", name),))
+
+    def _init_order(self) -> None:
+        _set_order(self, self.name, 0, zlib.crc32(self.name.encode()), ())
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (Var, (self.name,))
+
+    def __repr__(self) -> str:
+        return f"Var(name={self.name!r})"
+
+
+class Const(_Node):
+    __slots__ = ("value",)
 
-@dataclass(frozen=True, slots=True)
-class Const:
     value: bool
 
+    def __new__(cls, value: bool) -> "Const":
+        value = bool(value)
+        return _intern(cls, ("const", value), (("value", value),))
+
+    def _init_order(self) -> None:
+        _set_order(self, "1" if self.value else "0", 0, int(self.value), ())
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (Const, (self.value,))
+
+    def __repr__(self) -> str:
+        return f"Const(value={self.value!r})"
+
+
+class Not(_Node):
+    __slots__ = ("child",)
 
-@dataclass(frozen=True, slots=True)
-class Not:
     child: "Expr"
 
+    def __new__(cls, child: "Expr") -> "Not":
+        return _intern(cls, ("not", child.uid), (("child", child),))
+
+    def _init_order(self) -> None:
+        child = self.child
+        if isinstance(child, (And, Or)):
+            _set_order(self, "!(" + child.sort_key[0], 0, 2, (child,), (_wrapped_key(child),))
+        else:
+            _set_order(self, "!" + child.sort_key[0], 0, 2, (child,))
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (Not, (self.child,))
+
+    def __repr__(self) -> str:
+        return f"Not(child={self.child!r})"
+
+
+class And(_Node):
+    __slots__ = ("children",)
 
-@dataclass(frozen=True, slots=True)
-class And:
     children: Tuple["Expr", ...]
 
+    def __new__(cls, children: Iterable["Expr"]) -> "And":
+        children = tuple(children)
+        return _intern(cls, ("and",) + tuple(c.uid for c in children), (("children", children),))
+
+    def _init_order(self) -> None:
+        keys = tuple(_wrapped_key(c) if isinstance(c, Or) else c.sort_key for c in self.children)
+        _set_order(self, keys[0][0] if keys else "", 1, 3, self.children, keys)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (And, (self.children,))
+
+    def __repr__(self) -> str:
+        return f"And(children={self.children!r})"
+
+
+class Or(_Node):
+    __slots__ = ("children",)
 
-@dataclass(frozen=True, slots=True)
-class Or:
     children: Tuple["Expr", ...]
 
+    def __new__(cls, children: Iterable["Expr"]) -> "Or":
+        children = tuple(children)
+        return _intern(cls, ("or",) + tuple(c.uid for c in children), (("children", children),))
+
+    def _init_order(self) -> None:
+        lead = self.children[0].sort_key[0] if self.children else ""
+        _set_order(self, lead, 2, 4, self.children)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (Or, (self.children,))
+
+    def __repr__(self) -> str:
+        return f"Or(children={self.children!r})"
+
 
 Expr = Union[Var, Const, Not, And, Or]
 
+
+def interned_node_count() -> int:
+    """Number of live nodes in the unique table."""
+    return len(_unique_table)
+
 @dataclass(frozen=True, slots=True)
 class RenderStyle:
     not_op: str = "!"
@@ -46,45 +233,55 @@ class RenderStyle:
     implicit_and: bool = False
 
 
+_PRECEDENCE = {Not: 3, And: 2, Or: 1}  # leaves bind tightest, at 4
+
+
 def expr_to_str(expr: Expr, style: Optional[RenderStyle] = None) -> str:
     style = style or RenderStyle()
-
-    def prec(e: Expr) -> int:
-        if isinstance(e, (Var, Const)):
-            return 4
-        if isinstance(e, Not):
-            return 3
-        if isinstance(e, And):
-            return 2
-        if isinstance(e, Or):
-            return 1
-        return 0
-
-    def render(e: Expr, parent_prec: int) -> str:
-        p = prec(e)
-        if isinstance(e, Var):
-            s = e.name
-        elif isinstance(e, Const):
-            s = "1" if e.value else "0"
-        elif isinstance(e, Not):
-            child = render(e.child, p)
-            s = f"{style.not_op}{child}"
-        elif isinstance(e, And):
-            parts = [render(c, p) for c in e.children]
-            if style.implicit_and:
-                s = "".join(parts)
-            else:
-                s = style.and_op.join(parts)
-        elif isinstance(e, Or):
-            s = style.or_op.join(render(c, p) for c in e.children)
+    if isinstance(expr, (Var, Const)):
+        return _atom_str(expr)
+    and_op = "" if style.implicit_and else style.and_op
+    # Post-order over the DAG with an explicit stack (frames as in _simplify()):
+    # each distinct subterm is rendered once, into `done` with its precedence,
+    # and operands are parenthesized when they bind looser than their parent.
+    done: Dict[int, Tuple[str, int]] = {}
+    stack = [(expr, _operands(expr), iter(_operands(expr)))]
+    while stack:
+        e, children, pending = stack[-1]
+        for c in pending:
+            if c.uid in done:
+                continue
+            if isinstance(c, (Var, Const)):
+                done[c.uid] = (_atom_str(c), 4)
+                continue
+            stack.append((c, _operands(c), iter(_operands(c))))
+            break
         else:
-            raise AssertionError(f"Unknown Expr: {type(e)}")
+            stack.pop()
+            p = _PRECEDENCE[type(e)]
+            parts = []
+            for c in children:
+                text, q = done[c.uid]
+                parts.append(f"({text})" if q < p else text)
+            if isinstance(e, Not):
+                done[e.uid] = (style.not_op + parts[0], p)
+            else:
+                done[e.uid] = ((and_op if isinstance(e, And) else style.or_op).join(parts), p)
+    return done[expr.uid][0]
+
+
+def _atom_str(e: Expr) -> str:
+    if isinstance(e, Var):
+        return e.name
+    return "1" if e.value else "0"  # type: ignore[union-attr]
 
-        if p < parent_prec:
-            return f"({s})"
-        return s
 
-    return render(expr, 0)
+def _operands(e: Expr) -> Tuple[Expr, ...]:
+    if isinstance(e, Not):
+        return (e.child,)
+    if isinstance(e, (And, Or)):
+        return e.children
+    raise AssertionError(f"Unknown Expr: {type(e)}")
 
 
 # ---- Parser ----
@@ -93,161 +290,410 @@ def expr_to_str(expr: Expr, style: Optional[RenderStyle] = None) -> str:
 Token = Tuple[str, str]  # (kind, lexeme)
 
 
-def _tokenize(text: str) -> List[Token]:
+# One pass over the text: the regex yields identifiers and single characters
+# (whitespace is skipped), a table maps operator symbols to token kinds, and
+# implicit ANDs (A(B+C), AB, A!B, )A, 1A, ...) are inserted as tokens are
+# emitted.  The operator symbols seen on the way decide the render style.
+_LEXEME = re.compile(r"[^\W\d]\w*|\S")
+_SYMBOLS = {
+    "(": "(",
+    ")": ")",
+    "!": "NOT",
+    "~": "NOT",
+    "&": "AND",
+    "*": "AND",
+    "|": "OR",
+    "+": "OR",
+}
+_KEYWORDS = ("AND", "OR", "NOT")
+_ENDS_OPERAND = frozenset(("IDENT", "CONST", ")"))
+_STARTS_OPERAND = frozenset(("IDENT", "CONST", "(", "NOT"))
+
+
+@dataclass(frozen=True, slots=True)
+class TokenStream:
+    """
+    An expression lexed once: its tokens (implicit ANDs inserted as
+    ("AND", ""), ending in EOF) and the render style its operators imply.
+    Parsing, style detection and result-cache keys all read the same stream.
+    """
+
+    text: str
+    tokens: Tuple[Token, ...]
+    style: RenderStyle
+
+    def key(self) -> str:
+        """
+        Normalized token stream plus render style: equal for texts that differ
+        only in whitespace, letter case or operator aliases of the same style.
+        """
+        tokens = " ".join(kind if kind in ("AND", "OR", "NOT", "EOF") else lex for kind, lex in self.tokens)
+        style = self.style
+        return f"{tokens}\x1f{style.not_op}{style.and_op}{style.or_op}{int(style.implicit_and)}"
+
+
+def tokenize(text: str) -> TokenStream:
     tokens: List[Token] = []
-    i = 0
-    while i < len(text):
-        ch = text[i]
-        if ch.isspace():
-            i += 1
-            continue
-        if ch in ("(", ")"):
-            tokens.append((ch, ch))
-            i += 1
-            continue
-        if ch in ("!", "~"):
-            tokens.append(("NOT", ch))
-            i += 1
-            continue
-        if ch in ("&", "*"):
-            tokens.append(("AND", ch))
-            i += 1
-            continue
-        if ch in ("|", "+"):
-            tokens.append(("OR", ch))
-            i += 1
-            continue
-        if ch.isdigit():
-            if ch not in ("0", "1"):
-                raise SynthesisError(f"Only constants 0/1 are supported, got: {ch}")
-            tokens.append(("CONST", ch))
-            i += 1
-            continue
-        if ch.isalpha() or ch == "_":
-            j = i + 1
-            while j < len(text) and (text[j].isalnum() or text[j] == "_"):
-                j += 1
-            ident = text[i:j]
-            upper = ident.upper()
-            if upper in ("AND", "OR", "NOT"):
-                tokens.append((upper, ident))
-            elif ident.isalpha() and len(upper) > 1:
+    symbols: Set[str] = set()
+    implicit = False
+    ends = False  # the previous token can end an operand
+    for lex in _LEXEME.findall(text):
+        kind = _SYMBOLS.get(lex)
+        if kind is not None:
+            symbols.add(lex)
+        elif lex[0].isalpha() or lex[0] == "_":
+            upper = lex.upper()
+            if upper in _KEYWORDS:
+                kind = upper
+            elif lex.isalpha() and len(upper) > 1:
                 # Shorthand support: "AB" => "A AND B"
-                for c in upper:
+                if ends:
+                    tokens.append(("AND", ""))
+                tokens.append(("IDENT", upper[0]))
+                for c in upper[1:]:
+                    tokens.append(("AND", ""))
                     tokens.append(("IDENT", c))
+                implicit = True
+                ends = True
+                continue
             else:
-                tokens.append(("IDENT", upper))
-            i = j
-            continue
-        raise SynthesisError(f"Unexpected character: {ch!r}")
-
-    # Insert implicit ANDs: A(B+C), AB, A!B, )A, 1A, etc.
-    def can_end_expr(kind: str) -> bool:
-        return kind in ("IDENT", "CONST", ")")
-
-    def can_start_expr(kind: str) -> bool:
-        return kind in ("IDENT", "CONST", "(", "NOT")
-
-    with_implicit: List[Token] = []
-    for tok in tokens:
-        if with_implicit:
-            prev_kind, _ = with_implicit[-1]
-            if can_end_expr(prev_kind) and can_start_expr(tok[0]):
-                with_implicit.append(("AND", ""))  # inserted
-        with_implicit.append(tok)
-
-    with_implicit.append(("EOF", ""))
-    return with_implicit
-
-
-def _detect_style(text: str) -> RenderStyle:
-    # Prefer whichever operator the user typed, and keep output consistent across steps.
-    not_op = "!" if "!" in text else ("~" if "~" in text else "!")
-    if "+" in text and "|" not in text:
-        or_op = "+"
-    elif "|" in text and "+" not in text:
-        or_op = "|"
-    else:
-        or_op = "+" if "+" in text else "|"
-
-    explicit_and = ("&" in text) or ("*" in text)
-    implicit_and = False
-    if not explicit_and:
-        toks = _tokenize(text)
-        # If the user is using shorthand OR (+) or wrote any implicit AND (AB, A(B), A!B, ...),
-        # then prefer implicit AND rendering for all steps.
-        implicit_and = ("+" in text) or any(kind == "AND" and lex == "" for kind, lex in toks)
-
-    return RenderStyle(not_op=not_op, and_op="&", or_op=or_op, implicit_and=implicit_and)
+                kind, lex = "IDENT", upper
+        elif lex == "0" or lex == "1":
+            kind = "CONST"
+        elif lex[0].isdigit():
+            raise SynthesisError(f"Only constants 0/1 are supported, got: {lex[0]}")
+        else:
+            raise SynthesisError(f"Unexpected character: {lex[0]!r}")
+        if ends and kind in _STARTS_OPERAND:
+            tokens.append(("AND", ""))  # inserted
+            implicit = True
+        tokens.append((kind, lex))
+        ends = kind in _ENDS_OPERAND
+    tokens.append(("EOF", ""))
+
+    # Prefer whichever operator the user typed, and keep output consistent across
+    # steps.  With shorthand OR (+) or any implicit AND (AB, A(B), A!B, ...) and
+    # no explicit & or *, ANDs are rendered implicitly in all steps.
+    explicit_and = "&" in symbols or "*" in symbols
+    style = RenderStyle(
+        not_op="~" if "~" in symbols and "!" not in symbols else "!",
+        and_op="&",
+        or_op="+" if "+" in symbols else "|",
+        implicit_and=not explicit_and and ("+" in symbols or implicit),
+    )
+    return TokenStream(text=text, tokens=tuple(tokens), style=style)
 
 
 class _Parser:
+    # Operator precedence without recursion: `ors` and `ands` collect the
+    # operands of the group being read, and every open parenthesis saves the
+    # enclosing group (with the NOTs in front of it) on `groups`, so nesting
+    # depth is limited by memory only.
+
     def __init__(self, tokens: Sequence[Token]):
         self.tokens = tokens
         self.pos = 0
 
-    def _peek(self) -> Token:
-        return self.tokens[self.pos]
+    def parse(self) -> Expr:
+        groups: List[Tuple[List[Expr], List[Expr], int]] = []
+        ors: List[Expr] = []
+        ands: List[Expr] = []
+        nots = 0
+        operand = True  # expecting an operand rather than an operator
+        while True:
+            kind, lex = self.tokens[self.pos]
+            self.pos += 1
+            if operand:
+                if kind == "NOT":
+                    nots += 1
+                    continue
+                if kind == "(":
+                    groups.append((ors, ands, nots))
+                    ors, ands, nots = [], [], 0
+                    continue
+                if kind == "IDENT":
+                    atom: Expr = Var(lex)
+                elif kind == "CONST":
+                    atom = Const(lex == "1")
+                else:
+                    raise SynthesisError(f"Expected identifier/constant/parenthesized expression, got {kind} ({lex!r})")
+                for _ in range(nots):
+                    atom = Not(atom)
+                nots = 0
+                ands.append(atom)
+                operand = False
+                continue
+            if kind == "AND":
+                operand = True
+                continue
+            ors.append(_join(And, ands))
+            if kind == "OR":
+                ands = []
+                operand = True
+                continue
+            expr = _join(Or, ors)
+            if kind == ")" and groups:
+                ors, ands, nots = groups.pop()
+                for _ in range(nots):
+                    expr = Not(expr)
+                nots = 0
+                ands.append(expr)
+                continue
+            if groups:
+                raise SynthesisError(f"Expected ), got {kind} ({lex!r})")
+            if kind != "EOF":
+                raise SynthesisError(f"Unexpected trailing token: {kind} ({lex!r})")
+            return expr
 
-    def _eat(self, kind: str) -> Token:
-        tok = self._peek()
-        if tok[0] != kind:
-            raise SynthesisError(f"Expected {kind}, got {tok[0]} ({tok[1]!r})")
-        self.pos += 1
-        return tok
 
-    def parse(self) -> Expr:
-        expr = self._parse_or()
-        if self._peek()[0] != "EOF":
-            kind, lex = self._peek()
-            raise SynthesisError(f"Unexpected trailing token: {kind} ({lex!r})")
-        return expr
+def _join(op_type: type, operands: List[Expr]) -> Expr:
+    return operands[0] if len(operands) == 1 else op_type(tuple(operands))
 
-    def _parse_or(self) -> Expr:
-        left = self._parse_and()
-        children = [left]
-        while self._peek()[0] == "OR":
-            self.pos += 1
-            children.append(self._parse_and())
-        if len(children) == 1:
-            return children[0]
-        return Or(tuple(children))
 
-    def _parse_and(self) -> Expr:
-        left = self._parse_not()
-        children = [left]
-        while self._peek()[0] == "AND":
-            self.pos += 1
-            children.append(self._parse_not())
-        if len(children) == 1:
-            return children[0]
-        return And(tuple(children))
+def parse_expr(text: Union[str, TokenStream]) -> Expr:
+    stream = text if isinstance(text, TokenStream) else tokenize(text)
+    return _Parser(stream.tokens).parse()
 
-    def _parse_not(self) -> Expr:
-        if self._peek()[0] == "NOT":
-            self.pos += 1
-            return Not(self._parse_not())
-        return self._parse_atom()
 
-    def _parse_atom(self) -> Expr:
-        kind, lex = self._peek()
-        if kind == "(":
-            self.pos += 1
-            expr = self._parse_or()
-            self._eat(")")
-            return expr
-        if kind == "IDENT":
-            self.pos += 1
-            return Var(lex)
-        if kind == "CONST":
-            self.pos += 1
-            return Const(lex == "1")
-        raise SynthesisError(f"Expected identifier/constant/parenthesized expression, got {kind} ({lex!r})")
+# ---- Transform memoization ----
+
 
+class MemoTable:
+    """Size-bounded LRU map keyed on interned nodes, with hit/miss counters."""
 
-def parse_expr(text: str) -> Expr:
-    tokens = _tokenize(text)
-    return _Parser(tokens).parse()
+    __slots__ = ("maxsize", "hits", "misses", "evictions", "_data", "_lock")
+
+    def __init__(self, maxsize: Optional[int] = 65536):
+        if maxsize is not None and maxsize <= 0:
+            raise ValueError("maxsize must be > 0 or None")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+class TransformCache:
+    """
+    One memo table per transform (simplify, nnf, factor, minimize) and one for
+    the series/parallel networks build_network() makes.
+
+    A fresh cache is created for every `synthesize()` call unless one is passed
+    in; pass the same instance to several calls to share work across requests.
+    Nodes are interned, so an edited expression shares every untouched subtree
+    with the one before it, and with a shared cache simplify, nnf,
+    factor_local and build_network only visit the nodes the edit created (the
+    edited subtree and its path to the root).  minimize and factor work on
+    whole functions and are only reused for functions seen before; the
+    "incremental" synthesis mode uses factor_local instead of factor and skips
+    minimize above INCREMENTAL_MINIMIZE_VARS inputs, so that the cost of an
+    edit follows its size.  Lexing, the library lookup's checks and rendering
+    the response stay linear in the expression.
+    """
+
+    def __init__(self, maxsize: Optional[int] = 65536):
+        self.simplify = MemoTable(maxsize)
+        self.nnf = MemoTable(maxsize)
+        self.factor = MemoTable(maxsize)
+        self.minimize = MemoTable(maxsize)
+        self.network = MemoTable(maxsize)
+
+    def clear(self) -> None:
+        for table in (self.simplify, self.nnf, self.factor, self.minimize, self.network):
+            table.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            "simplify": self.simplify.stats(),
+            "nnf": self.nnf.stats(),
+            "factor": self.factor.stats(),
+            "minimize": self.minimize.stats(),
+            "network": self.network.stats(),
+        }
+
+
+# ---- Cancellation ----
+#
+# Long-running stages take an optional CancelToken and call `check()` as they
+# visit nodes, so work abandoned by a caller (a request past its deadline, a
+# client that went away) stops at the next node instead of running to the end.
+
+
+class CancelToken:
+    def __init__(self, timeout: Optional[float] = None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+    def check(self) -> None:
+        if self._cancelled:
+            raise SynthesisCancelled("Synthesis was cancelled.")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SynthesisCancelled("Synthesis exceeded its deadline.")
+
+
+# ---- Work budgets ----
+#
+# A Budget bounds the optional work of one request: a deadline, a number of
+# node visits, or both.  The transforms that only improve an expression
+# (simplify, factor, minimize, the exact search) check it where they would
+# check a CancelToken, and once it has run out each returns the best
+# equivalent form it has so far instead of finishing.  Running out is not an
+# error; the result is marked `"truncated": true`.  nnf charges the nodes it
+# visits but always finishes, since the networks are built from it, and the
+# CancelToken stays the hard limit.  Results computed after a budget ran out
+# are not memoized, so a truncated form never outlives its request.
+
+
+class BudgetExhausted(Exception):
+    """Raised inside a budgeted transform when its Budget runs out; caught by the transform."""
+
+
+class Budget:
+    __slots__ = ("deadline", "max_visits", "visits", "truncated")
+
+    def __init__(self, timeout: Optional[float] = None, max_visits: Optional[int] = None):
+        if (timeout is not None and not timeout > 0) or (max_visits is not None and max_visits <= 0):
+            raise SynthesisError("A budget's timeout and node visits must be positive.")
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.max_visits = max_visits
+        self.visits = 0
+        self.truncated = False
+
+    @property
+    def exhausted(self) -> bool:
+        if self.max_visits is not None and self.visits >= self.max_visits:
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def guard(self, cancel: Optional[CancelToken] = None) -> "_BudgetGuard":
+        """A stand-in for `cancel` that also charges this budget and stops once it is out."""
+        return _BudgetGuard(self, cancel, True)
+
+    def meter(self, cancel: Optional[CancelToken] = None) -> "_BudgetGuard":
+        """A stand-in for `cancel` that charges this budget without ever stopping."""
+        return _BudgetGuard(self, cancel, False)
+
+
+class _BudgetGuard:
+    __slots__ = ("budget", "cancel", "stop")
+
+    def __init__(self, budget: Budget, cancel: Optional[CancelToken], stop: bool):
+        self.budget = budget
+        self.cancel = cancel
+        self.stop = stop
+
+    def check(self) -> None:
+        if self.cancel is not None:
+            self.cancel.check()
+        budget = self.budget
+        budget.visits += 1
+        if self.stop and budget.exhausted:
+            budget.truncated = True
+            raise BudgetExhausted()
+
+
+# ---- Stage timing ----
+#
+# With `timings=True`, synthesize() and inspect_complement_nnf() report the wall
+# time of every stage and the DAG size of each transform's input and output
+# under "timings".  Stages are laps of one clock, so each covers everything
+# since the previous lap; counting nodes is left out of the laps.  With timings
+# off the pipeline runs against _NULL_CLOCK, whose methods do nothing.
+
+
+class _StageClock:
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self.nodes: Dict[str, Dict[str, int]] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def count(self, transform: str, before: Sequence[Expr], after: Sequence[Expr]) -> None:
+        start = time.perf_counter()
+        self.nodes[transform] = {"before": _dag_size(before), "after": _dag_size(after)}
+        self._last += time.perf_counter() - start
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "stages": {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            "nodes": self.nodes,
+            "totalMs": round(sum(self.stages.values()) * 1000, 3),
+        }
+
+
+class _NullClock:
+    def lap(self, stage: str) -> None:
+        pass
+
+    def count(self, transform: str, before: Sequence[Expr], after: Sequence[Expr]) -> None:
+        pass
+
+
+_NULL_CLOCK = _NullClock()
+
+
+def _dag_size(roots: Sequence[Expr]) -> int:
+    # Distinct nodes reachable from `roots`: shared subterms count once.
+    seen: Set[int] = set()
+    stack = list(roots)
+    while stack:
+        e = stack.pop()
+        if e.uid in seen:
+            continue
+        seen.add(e.uid)
+        if isinstance(e, Not):
+            stack.append(e.child)
+        elif isinstance(e, (And, Or)):
+            stack.extend(e.children)
+    return len(seen)
 
 
 # ---- Logic transforms ----
@@ -271,18 +717,98 @@ def _literal_key(expr: Expr) -> Optional[Tuple[str, bool]]:
     return None
 
 
-def simplify(expr: Expr) -> Expr:
+def simplify(
+    expr: Expr,
+    cache: Optional[TransformCache] = None,
+    cancel: Optional[CancelToken] = None,
+    budget: Optional[Budget] = None,
+) -> Expr:
+    memo = cache.simplify if cache is not None else MemoTable(None)
+    if budget is None:
+        return _simplify(expr, memo, cancel)
+    try:
+        return _simplify(expr, memo, budget.guard(cancel))
+    except BudgetExhausted:
+        # Every node finished so far is in `memo`; the input is the best
+        # equivalent form of the whole.
+        return expr
+
+
+def _simplify(expr: Expr, memo: MemoTable, cancel: Optional[CancelToken] = None) -> Expr:
     if isinstance(expr, (Var, Const)):
         return expr
+    out = memo.get(expr)
+    if out is not None:
+        return out
+    if cancel is not None:
+        cancel.check()
+    # Post-order over the DAG with an explicit stack, so nesting depth is
+    # limited by memory only.  A frame holds a node, its operands and an
+    # iterator over the operands not yet resolved; leaves and memo hits are
+    # resolved in place, anything else gets a frame of its own.  `done` maps
+    # uids (cheaper to hash than nodes) to this call's results and leaves out
+    # leaves, which stay as they are; `memo` is shared across calls.
+    #
+    # The first loop is the root's frame unrolled: when every operand is a
+    # leaf or a memo hit, as in the calls the other transforms make, no stack
+    # is built at all.
+    done: Dict[int, Expr] = {}
+    operands = _simplify_operands(expr)
+    pending = iter(operands)
+    for c in pending:
+        if isinstance(c, (Var, Const)) or c.uid in done:
+            continue
+        out = memo.get(c)
+        if out is not None:
+            done[c.uid] = out
+            continue
+        if cancel is not None:
+            cancel.check()
+        child_operands = _simplify_operands(c)
+        stack = [(expr, operands, pending), (c, child_operands, iter(child_operands))]
+        break
+    else:
+        out = _simplify_node(expr, [done.get(c.uid, c) for c in operands], memo, cancel)
+        memo.put(expr, out)
+        return out
+    while stack:
+        e, operands, pending = stack[-1]
+        for c in pending:
+            if isinstance(c, (Var, Const)) or c.uid in done:
+                continue
+            out = memo.get(c)
+            if out is not None:
+                done[c.uid] = out
+                continue
+            if cancel is not None:
+                cancel.check()
+            child_operands = _simplify_operands(c)
+            stack.append((c, child_operands, iter(child_operands)))
+            break
+        else:
+            stack.pop()
+            out = _simplify_node(e, [done.get(c.uid, c) for c in operands], memo, cancel)
+            memo.put(e, out)
+            done[e.uid] = out
+    return out
+
+
+def _simplify_operands(expr: Expr) -> List[Expr]:
     if isinstance(expr, Not):
-        child = simplify(expr.child)
+        return [expr.child]
+    return _flatten(type(expr), expr.children)  # type: ignore[union-attr]
+
+
+def _simplify_node(expr: Expr, children: List[Expr], memo: MemoTable, cancel: Optional[CancelToken]) -> Expr:
+    # `children` are the simplified operands (flattened for And/Or).
+    if isinstance(expr, Not):
+        child = children[0]
         if isinstance(child, Const):
             return Const(not child.value)
         if isinstance(child, Not):
-            return simplify(child.child)
+            return _simplify(child.child, memo, cancel)
         return Not(child)
     if isinstance(expr, And):
-        children = [simplify(c) for c in _flatten(And, expr.children)]
         # Annihilators / identities
         if any(isinstance(c, Const) and not c.value for c in children):
             return Const(False)
@@ -301,12 +827,11 @@ def simplify(expr: Expr) -> Expr:
                     return Const(False)
             uniq[c] = None
         children = list(uniq.keys())
-        children.sort(key=expr_to_str)
+        children.sort(key=_order_key)
         if len(children) == 1:
             return children[0]
         return And(tuple(children))
     if isinstance(expr, Or):
-        children = [simplify(c) for c in _flatten(Or, expr.children)]
         if any(isinstance(c, Const) and c.value for c in children):
             return Const(True)
         children = [c for c in children if not (isinstance(c, Const) and not c.value)]
@@ -324,7 +849,7 @@ def simplify(expr: Expr) -> Expr:
                     return Const(True)
             uniq[c] = None
         children = list(uniq.keys())
-        children.sort(key=expr_to_str)
+        children.sort(key=_order_key)
         if len(children) == 1:
             return children[0]
         return Or(tuple(children))
@@ -335,35 +860,87 @@ def complement(expr: Expr) -> Expr:
     return Not(expr)
 
 
-def nnf(expr: Expr) -> Expr:
-    expr = simplify(expr)
+def nnf(
+    expr: Expr,
+    cache: Optional[TransformCache] = None,
+    cancel: Optional[CancelToken] = None,
+    budget: Optional[Budget] = None,
+) -> Expr:
+    cache = cache if cache is not None else TransformCache(None)
+    if budget is not None:
+        cancel = budget.meter(cancel)
+    smemo = cache.simplify
+    memo = cache.nnf
+    expr = _simplify(expr, smemo, cancel)
+    if isinstance(expr, (Var, Const)):
+        return expr
+    out = memo.get(expr)
+    if out is not None:
+        return out
+    # Post-order with an explicit stack and uid-keyed results, as in _simplify().
+    # Unlike _eval(), nnf has no recursive path for shallow inputs: with the
+    # same memo tables a recursive nnf is no faster (bench/recursion.py), as
+    # the time goes to _simplify and the memo tables, not to the traversal.
+    if cancel is not None:
+        cancel.check()
+    operands, op = _nnf_expand(expr, smemo)
+    if op is Not:
+        out = _nnf_negated(operands[0])
+        memo.put(expr, out)
+        return out
+    done: Dict[int, Expr] = {}
+    stack = [(expr, operands, op, iter(operands))]
+    while stack:
+        e, operands, op, pending = stack[-1]
+        for c in pending:
+            if isinstance(c, (Var, Const)) or c.uid in done:
+                continue
+            out = memo.get(c)
+            if out is not None:
+                done[c.uid] = out
+                continue
+            if cancel is not None:
+                cancel.check()
+            child_operands, child_op = _nnf_expand(c, smemo)
+            if child_op is Not:
+                out = _nnf_negated(child_operands[0])
+                memo.put(c, out)
+                done[c.uid] = out
+                continue
+            stack.append((c, child_operands, child_op, iter(child_operands)))
+            break
+        else:
+            stack.pop()
+            if op is None:
+                out = done.get(operands[0].uid, operands[0])
+            else:
+                out = _simplify(op(tuple([done.get(c.uid, c) for c in operands])), smemo)
+            memo.put(e, out)
+            done[e.uid] = out
+    return out
+
+
+def _nnf_expand(e: Expr, smemo: MemoTable) -> Tuple[Sequence[Expr], Optional[type]]:
+    # The subterms whose NNF `e` is built from, and the connective joining
+    # them: None passes one operand through (`!!x`), Not marks a negated
+    # variable or constant, which is finished at once.
+    if isinstance(e, (And, Or)):
+        return e.children, type(e)
+    c = _simplify(e.child, smemo)  # type: ignore[union-attr]
+    if isinstance(c, Not):
+        return (c.child,), None
+    if isinstance(c, And):
+        return tuple(Not(x) for x in c.children), Or
+    if isinstance(c, Or):
+        return tuple(Not(x) for x in c.children), And
+    return (c,), Not
 
-    def push(e: Expr) -> Expr:
-        if isinstance(e, (Var, Const)):
-            return e
-        if isinstance(e, And):
-            return simplify(And(tuple(push(c) for c in e.children)))
-        if isinstance(e, Or):
-            return simplify(Or(tuple(push(c) for c in e.children)))
-        if isinstance(e, Not):
-            c = simplify(e.child)
-            if isinstance(c, Const):
-                return Const(not c.value)
-            if isinstance(c, Var):
-                return Not(c)
-            if isinstance(c, Not):
-                return push(c.child)
-            if isinstance(c, And):
-                return simplify(Or(tuple(push(Not(x)) for x in c.children)))
-            if isinstance(c, Or):
-                return simplify(And(tuple(push(Not(x)) for x in c.children)))
-            raise AssertionError(f"Unknown Not child: {type(c)}")
-        raise AssertionError(f"Unknown Expr: {type(e)}")
-
-    return push(expr)
-
-
-def _factor_once(expr: Expr) -> Expr:
+
+def _nnf_negated(c: Expr) -> Expr:
+    return Not(c) if isinstance(c, Var) else Const(not c.value)  # type: ignore[union-attr]
+
+
+def _factor_once(expr: Expr, memo: MemoTable) -> Expr:
     # OR of AND terms: factor common literals: (a&b) | (a&c) => a & (b|c)
     if isinstance(expr, Or):
         terms = [t if isinstance(t, And) else And((t,)) for t in expr.children]
@@ -372,7 +949,7 @@ def _factor_once(expr: Expr) -> Expr:
             return expr
         common = set.intersection(*literal_sets)
         if common:
-            common_sorted = sorted(common, key=expr_to_str)
+            common_sorted = sorted(common, key=_order_key)
             new_terms: List[Expr] = []
             for t in terms:
                 rest = [c for c in t.children if c not in common]
@@ -381,14 +958,14 @@ def _factor_once(expr: Expr) -> Expr:
                 elif len(rest) == 1:
                     new_terms.append(rest[0])
                 else:
-                    new_terms.append(And(tuple(sorted(rest, key=expr_to_str))))
+                    new_terms.append(And(tuple(sorted(rest, key=_order_key))))
             factored = And(
                 tuple(common_sorted)
                 + (
-                    simplify(Or(tuple(sorted(new_terms, key=expr_to_str)))),
+                    _simplify(Or(tuple(sorted(new_terms, key=_order_key))), memo),
                 )
             )
-            return simplify(factored)
+            return _simplify(factored, memo)
     # AND of OR terms: (a|b) & (a|c) => a | (b&c)
     if isinstance(expr, And):
         terms = [t if isinstance(t, Or) else Or((t,)) for t in expr.children]
@@ -397,7 +974,7 @@ def _factor_once(expr: Expr) -> Expr:
             return expr
         common = set.intersection(*literal_sets)
         if common:
-            common_sorted = sorted(common, key=expr_to_str)
+            common_sorted = sorted(common, key=_order_key)
             new_terms: List[Expr] = []
             for t in terms:
                 rest = [c for c in t.children if c not in common]
@@ -406,33 +983,203 @@ def _factor_once(expr: Expr) -> Expr:
                 elif len(rest) == 1:
                     new_terms.append(rest[0])
                 else:
-                    new_terms.append(Or(tuple(sorted(rest, key=expr_to_str))))
+                    new_terms.append(Or(tuple(sorted(rest, key=_order_key))))
             factored = Or(
                 tuple(common_sorted)
                 + (
-                    simplify(And(tuple(sorted(new_terms, key=expr_to_str)))),
+                    _simplify(And(tuple(sorted(new_terms, key=_order_key))), memo),
                 )
             )
-            return simplify(factored)
+            return _simplify(factored, memo)
     return expr
 
 
-def factor(expr: Expr, max_passes: int = 4) -> Expr:
-    expr = simplify(expr)
-    for _ in range(max_passes):
-        before = expr
-        if isinstance(expr, And):
-            expr = And(tuple(factor(c, max_passes=0) for c in expr.children))
-        elif isinstance(expr, Or):
-            expr = Or(tuple(factor(c, max_passes=0) for c in expr.children))
-        elif isinstance(expr, Not):
-            expr = Not(factor(expr.child, max_passes=0))
-        expr = simplify(expr)
-        expr = _factor_once(expr)
-        expr = simplify(expr)
-        if expr == before:
-            break
-    return expr
+def factor(
+    expr: Expr,
+    max_passes: int = 4,
+    cache: Optional[TransformCache] = None,
+    cancel: Optional[CancelToken] = None,
+    budget: Optional[Budget] = None,
+) -> Expr:
+    cache = cache if cache is not None else TransformCache(None)
+    if budget is None:
+        return _factor(expr, max_passes, cache, cancel)
+    try:
+        return _factor(expr, max_passes, cache, budget.guard(cancel), budget)
+    except BudgetExhausted:
+        return expr
+
+
+def _factor(
+    expr: Expr,
+    max_passes: int,
+    cache: TransformCache,
+    cancel: Optional[CancelToken] = None,
+    budget: Optional[Budget] = None,
+) -> Expr:
+    # With a budget, `cancel` is its guard and running out ends the passes
+    # early.
+    key = (expr, max_passes)
+    out = cache.factor.get(key)
+    if out is not None:
+        return out
+    if cancel is not None:
+        cancel.check()
+    smemo = cache.simplify
+    out = _simplify(expr, smemo, cancel)
+    try:
+        for _ in range(max_passes):
+            before = out
+            if isinstance(out, And):
+                out = And(tuple(_factor(c, 0, cache, cancel, budget) for c in out.children))
+            elif isinstance(out, Or):
+                out = Or(tuple(_factor(c, 0, cache, cancel, budget) for c in out.children))
+            elif isinstance(out, Not):
+                out = Not(_factor(out.child, 0, cache, cancel, budget))
+            out = _simplify(out, smemo)
+            out = _factor_once(out, smemo)
+            out = _simplify(out, smemo)
+            if out == before:
+                break
+        if isinstance(out, (And, Or)):
+            from ..logic.kernels import kernel_factor
+
+            # Kernel extraction finds divisors shared by only some of the terms.
+            extracted = kernel_factor(out, cancel)
+            if extracted is not None:
+                out = _fewest_literals(out, _simplify(extracted, smemo))
+    except BudgetExhausted:
+        # Only raised through a budget's guard, from the children of a pass
+        # (before `out` is replaced) or from kernel extraction: either way
+        # `out` is the last finished form.
+        pass
+    if budget is None or not budget.truncated:
+        cache.factor.put(key, out)
+    return out
+
+
+LOCAL_KERNEL_LITERALS = 24
+
+
+def factor_local(
+    expr: Expr,
+    cache: Optional[TransformCache] = None,
+    cancel: Optional[CancelToken] = None,
+    budget: Optional[Budget] = None,
+) -> Expr:
+    """
+    Factors the NNF expression `expr` one node at a time, bottom-up.
+
+    Each And/Or is rebuilt from its factored children and its common literals
+    are pulled out; kernel extraction only runs on subterms of at most
+    LOCAL_KERNEL_LITERALS literals.  Every node's result is memoized (see
+    TransformCache).  Divisors spanning a larger subterm are not looked for, which factor()
+    does at the cost of work on the whole expression.
+    """
+    if not isinstance(expr, (And, Or)):
+        return expr
+    cache = cache if cache is not None else TransformCache(None)
+    if budget is not None:
+        cancel = budget.guard(cancel)
+    memo = cache.factor
+    found = memo.get((expr, "local"))
+    if found is not None:
+        return found[0]
+    # Post-order with an explicit stack, as in build_network(); results are
+    # (factored form, literal bound) pairs.
+    done: Dict[int, Tuple[Expr, int]] = {}
+    stack = [(expr, iter(expr.children))]
+    try:
+        while stack:
+            e, pending = stack[-1]
+            for c in pending:
+                if c.uid in done:
+                    continue
+                if isinstance(c, (And, Or)):
+                    found = memo.get((c, "local"))
+                    if found is not None:
+                        done[c.uid] = found
+                        continue
+                    if cancel is not None:
+                        cancel.check()
+                    stack.append((c, iter(c.children)))
+                    break
+                done[c.uid] = (c, 0 if isinstance(c, Const) else 1)
+            else:
+                stack.pop()
+                found = _factor_node(e, [done[c.uid] for c in e.children], cache.simplify, cancel)
+                if budget is None or not budget.truncated:
+                    memo.put((e, "local"), found)
+                done[e.uid] = found
+    except BudgetExhausted:
+        return expr
+    return done[expr.uid][0]
+
+
+def _factor_node(
+    expr: Expr, children: List[Tuple[Expr, int]], smemo: MemoTable, cancel: Optional[CancelToken]
+) -> Tuple[Expr, int]:
+    literals = sum(n for _, n in children)
+    out = _simplify(type(expr)(tuple(c for c, _ in children)), smemo)
+    out = _simplify(_factor_once(out, smemo), smemo)
+    if literals <= LOCAL_KERNEL_LITERALS:
+        if isinstance(out, (And, Or)):
+            from ..logic.kernels import kernel_factor
+
+            extracted = kernel_factor(out, cancel)
+            if extracted is not None:
+                out = _fewest_literals(out, _simplify(extracted, smemo))
+        literals = literal_count(out)
+    return out, literals
+
+
+def _minimize(
+    expr: Expr, cache: TransformCache, cancel: Optional[CancelToken] = None, budget: Optional[Budget] = None
+) -> Any:
+    # Two-level minimization of an NNF expression; see logic/minimize.py.  Out
+    # of budget before a first prime cover it is skipped, as for a cover too
+    # large to build; after that the heuristic keeps the cover it has.
+    out = cache.minimize.get(expr)
+    if out is None:
+        from ..logic.minimize import MinimizeResult, minimize
+
+        if budget is not None:
+            cancel = budget.guard(cancel)
+        try:
+            if budget is not None:
+                cancel.check()
+            out = minimize(expr, cancel=cancel)
+        except BudgetExhausted:
+            return MinimizeResult(expr=expr, method="skipped", cubes=0, literals=0)
+        if budget is None or not budget.truncated:
+            cache.minimize.put(expr, out)
+    return out
+
+
+def literal_count(expr: Expr) -> int:
+    """Literal occurrences in the expression tree, i.e. transistors in its network."""
+    counts: Dict[Expr, int] = {}
+    stack = [expr]
+    while stack:
+        e = stack[-1]
+        if e in counts:
+            stack.pop()
+        elif isinstance(e, (Var, Not)):
+            counts[e] = 1
+        elif isinstance(e, Const):
+            counts[e] = 0
+        else:
+            pending = [c for c in e.children if c not in counts]  # type: ignore[union-attr]
+            if pending:
+                stack.extend(pending)
+            else:
+                counts[e] = sum(counts[c] for c in e.children)  # type: ignore[union-attr]
+    return counts[expr]
+
+
+def _fewest_literals(*candidates: Expr) -> Expr:
+    # Ties keep the earliest candidate.
+    return min(candidates, key=literal_count)
 
 
 # ---- Network representation ----
@@ -455,196 +1202,773 @@ class NetworkNode:
 Network = Union[Transistor, NetworkNode]
 
 
-def _iter_literals(expr: Expr) -> Iterable[Tuple[str, int]]:
-    if isinstance(expr, Var):
-        yield (expr.name, 1)
-        return
-    if isinstance(expr, Not) and isinstance(expr.child, Var):
-        yield (expr.child.name, 0)
-        return
-    raise SynthesisError(f"Expected literal in NNF, got: {expr_to_str(expr)}")
-
-
-def build_network(expr_nnf: Expr, transistor_kind: str) -> Network:
+def build_network(
+    expr_nnf: Expr,
+    transistor_kind: str,
+    cache: Optional[TransformCache] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Network:
     if transistor_kind not in ("nmos", "pmos"):
         raise ValueError("transistor_kind must be 'nmos' or 'pmos'")
 
-    def build(e: Expr) -> Network:
-        if isinstance(e, Const):
-            # For visualization, model constants as empty networks by short-circuiting in caller.
-            raise SynthesisError("Cannot build a transistor network directly from a constant.")
-        if isinstance(e, Var) or (isinstance(e, Not) and isinstance(e.child, Var)):
-            name, required = next(iter(_iter_literals(e)))
-            if transistor_kind == "nmos":
-                gate_inverted = required == 0
-            else:
-                gate_inverted = required == 1
-            return Transistor(
-                kind=transistor_kind,
-                gate=name,
-                gate_inverted=gate_inverted,
-                on_when=required,
-            )
-        if isinstance(e, And):
-            return NetworkNode(kind="series", children=tuple(build(c) for c in e.children))
-        if isinstance(e, Or):
-            return NetworkNode(kind="parallel", children=tuple(build(c) for c in e.children))
-        if isinstance(e, Not):
-            raise SynthesisError(f"NNF violation (unexpected NOT): {expr_to_str(e)}")
-        raise AssertionError(f"Unknown Expr: {type(e)}")
-
-    expr_nnf = nnf(expr_nnf)
+    expr_nnf = nnf(expr_nnf, cache, cancel)
     if isinstance(expr_nnf, Const):
         # A constant function is special: represent as a degenerate network.
         # - PDN true means output always pulled down
         # - PUN true means output always pulled up
         return NetworkNode(kind="parallel", children=tuple())
-    return build(expr_nnf)
+
+    def literal(e: Expr) -> Transistor:
+        if isinstance(e, Const):
+            # For visualization, model constants as empty networks by short-circuiting in caller.
+            raise SynthesisError("Cannot build a transistor network directly from a constant.")
+        if isinstance(e, Var):
+            name, required = e.name, 1
+        elif isinstance(e, Not) and isinstance(e.child, Var):
+            name, required = e.child.name, 0
+        elif isinstance(e, Not):
+            raise SynthesisError(f"NNF violation (unexpected NOT): {expr_to_str(e)}")
+        else:
+            raise AssertionError(f"Unknown Expr: {type(e)}")
+        if transistor_kind == "nmos":
+            gate_inverted = required == 0
+        else:
+            gate_inverted = required == 1
+        return Transistor(
+            kind=transistor_kind,
+            gate=name,
+            gate_inverted=gate_inverted,
+            on_when=required,
+        )
+
+    if cancel is not None:
+        cancel.check()
+    if not isinstance(expr_nnf, (And, Or)):
+        return literal(expr_nnf)
+    # Post-order with an explicit stack (frames as in export_network_json());
+    # networks are immutable, so a shared subterm is built once and reused
+    # (and export_network_shared() writes it once).  Series/parallel networks
+    # are also kept in the cache, keyed on their subterm and transistor kind.
+    memo = cache.network if cache is not None else None
+    if memo is not None:
+        net = memo.get((expr_nnf, transistor_kind))
+        if net is not None:
+            return net
+    done: Dict[int, Network] = {}
+    stack = [(expr_nnf, iter(expr_nnf.children))]
+    while stack:
+        e, pending = stack[-1]
+        for c in pending:
+            if c.uid in done:
+                continue
+            if cancel is not None:
+                cancel.check()
+            if isinstance(c, (And, Or)):
+                net = memo.get((c, transistor_kind)) if memo is not None else None
+                if net is not None:
+                    done[c.uid] = net
+                    continue
+                stack.append((c, iter(c.children)))
+                break
+            done[c.uid] = literal(c)
+        else:
+            stack.pop()
+            kind = "series" if isinstance(e, And) else "parallel"
+            net = NetworkNode(kind=kind, children=tuple([done[c.uid] for c in e.children]))
+            if memo is not None:
+                memo.put((e, transistor_kind), net)
+            done[e.uid] = net
+    return done[expr_nnf.uid]
+
+
+def _transistors(net: Network) -> Iterator[Transistor]:
+    # Every transistor of the network, once per occurrence, without recursion.
+    stack = [net]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, Transistor):
+            yield n
+        else:
+            stack.extend(n.children)
 
 
 def _count_transistors(net: Network) -> int:
-    if isinstance(net, Transistor):
-        return 1
-    return sum(_count_transistors(c) for c in net.children)
+    return sum(1 for _ in _transistors(net))
 
 
 def _collect_inverted_gates(net: Network) -> Set[str]:
-    if isinstance(net, Transistor):
-        return {net.gate} if net.gate_inverted else set()
-    out: Set[str] = set()
-    for c in net.children:
-        out |= _collect_inverted_gates(c)
-    return out
+    return {t.gate for t in _transistors(net) if t.gate_inverted}
 
 
 def export_network_json(net: Network) -> Dict[str, Any]:
     if isinstance(net, Transistor):
-        return {
-            "type": "transistor",
-            "kind": net.kind,
-            "gate": net.gate,
-            "gateInverted": net.gate_inverted,
-            "onWhen": net.on_when,
-        }
+        return _transistor_json(net)
+    # Explicit stack of (node, exported children so far, children still to
+    # export); transistors are exported in place.
+    stack = [(net, [], iter(net.children))]
+    while True:
+        n, children, pending = stack[-1]
+        for c in pending:
+            if isinstance(c, Transistor):
+                children.append(_transistor_json(c))
+            else:
+                stack.append((c, [], iter(c.children)))
+                break
+        else:
+            stack.pop()
+            node = {"type": "node", "kind": n.kind, "children": children}
+            if not stack:
+                return node
+            stack[-1][1].append(node)
+
+
+def _transistor_json(t: Transistor) -> Dict[str, Any]:
+    return {
+        "type": "transistor",
+        "kind": t.kind,
+        "gate": t.gate,
+        "gateInverted": t.gate_inverted,
+        "onWhen": t.on_when,
+    }
+
+
+def export_network_shared(net: Network) -> Dict[str, Any]:
+    """
+    export_network_json() with shared sub-networks written once.  build_network()
+    reuses one node for every occurrence of a subterm; such a node gets an
+    `id` where it first appears (in document order) and every later occurrence
+    is {"type": "ref", "ref": id}.  Each occurrence is still its own set of
+    transistors.
+    """
+    if isinstance(net, Transistor):
+        return _transistor_json(net)
+    repeated = _repeated_nodes(net)
+    ids: Dict[int, int] = {}
+    stack = [(net, [], iter(net.children))]
+    while True:
+        n, children, pending = stack[-1]
+        for c in pending:
+            if isinstance(c, Transistor):
+                children.append(_transistor_json(c))
+            elif id(c) in ids:
+                children.append({"type": "ref", "ref": ids[id(c)]})
+            else:
+                if id(c) in repeated:
+                    ids[id(c)] = len(ids)
+                stack.append((c, [], iter(c.children)))
+                break
+        else:
+            stack.pop()
+            if id(n) in ids:
+                node = {"type": "node", "id": ids[id(n)], "kind": n.kind, "children": children}
+            else:
+                node = {"type": "node", "kind": n.kind, "children": children}
+            if not stack:
+                return node
+            stack[-1][1].append(node)
+
+
+def _repeated_nodes(net: NetworkNode) -> Set[int]:
+    # id()s of the series/parallel nodes reached more than once.
+    seen = {id(net)}
+    repeated = set()
+    stack = [net]
+    while stack:
+        for c in stack.pop().children:
+            if isinstance(c, Transistor):
+                continue
+            if id(c) in seen:
+                repeated.add(id(c))
+            else:
+                seen.add(id(c))
+                stack.append(c)
+    return repeated
+
+
+# Columnar network export.  Nodes are numbered in depth-first preorder, so
+# every node comes after its parent and siblings keep their order; `kind`
+# indexes NETWORK_KINDS, `gate` indexes the gate-name table (-1 on series and
+# parallel nodes) and `flags` holds the transistor's gateInverted and onWhen.
+NETWORK_FORMATS = ("nested", "columns", "shared")
+NETWORK_KINDS = ("series", "parallel", "nmos", "pmos")
+FLAG_GATE_INVERTED = 1
+FLAG_ON_WHEN = 2
+_KIND_CODES = {kind: code for code, kind in enumerate(NETWORK_KINDS)}
+
+
+def export_network_columns(net: Network) -> Dict[str, Any]:
+    kinds: List[int] = []
+    parents: List[int] = []
+    gates: List[int] = []
+    flags: List[int] = []
+    names: Dict[str, int] = {}
+    stack = [(net, -1)]
+    while stack:
+        n, parent = stack.pop()
+        parents.append(parent)
+        kinds.append(_KIND_CODES[n.kind])
+        if isinstance(n, Transistor):
+            gates.append(names.setdefault(n.gate, len(names)))
+            flags.append(FLAG_GATE_INVERTED * n.gate_inverted | FLAG_ON_WHEN * n.on_when)
+        else:
+            gates.append(-1)
+            flags.append(0)
+            index = len(kinds) - 1
+            stack.extend((c, index) for c in reversed(n.children))
     return {
-        "type": "node",
-        "kind": net.kind,
-        "children": [export_network_json(c) for c in net.children],
+        "format": "columns",
+        "kinds": list(NETWORK_KINDS),
+        "gates": list(names),
+        "kind": kinds,
+        "parent": parents,
+        "gate": gates,
+        "flags": flags,
     }
 
 
+def export_network(net: Network, network_format: str = "nested") -> Dict[str, Any]:
+    """The network in one of NETWORK_FORMATS."""
+    if network_format == "columns":
+        return export_network_columns(net)
+    if network_format == "nested":
+        return export_network_json(net)
+    if network_format == "shared":
+        return export_network_shared(net)
+    raise SynthesisError(
+        f"Unknown network format {network_format!r}; expected one of {', '.join(NETWORK_FORMATS)}."
+    )
+
+
 # ---- Pipeline ----
 
 
-def synthesize(expression: str) -> Dict[str, Any]:
-    if not isinstance(expression, str) or not expression.strip():
-        raise SynthesisError("Expression must be a non-empty string.")
+SYNTHESIS_MODES = ("default", "exact", "incremental")
 
-    style = _detect_style(expression)
-    parsed = parse_expr(expression)
-    simplified = simplify(parsed)
-    comp = complement(simplified)
-    nnf_expr = nnf(simplified)
-    nnf_comp = nnf(comp)
-    factored = factor(nnf_expr)
-    factored_comp = factor(nnf_comp)
+# Two-level minimization only runs up to this many inputs in "incremental"
+# mode (see TransformCache).
+INCREMENTAL_MINIMIZE_VARS = 6
+
+
+# Steps of a synthesize() response, in response order.
+SYNTHESIS_STEPS = (
+    "parse",
+    "simplify",
+    "complement",
+    "nnf",
+    "nnfComplement",
+    "minimize",
+    "minimizeComplement",
+    "factor",
+    "factorComplement",
+    "library",
+    "exact",
+    "pdn",
+    "pun",
+    "count",
+    "export",
+)
+
+# Pipeline stages in the order they run, and the last one each step needs.
+# The library is looked up before minimization: an optimal entry is the
+# factored form, and minimize and factor are skipped.  The factored forms are
+# final only once the exact stage ran.
+_STAGES = ("parse", "simplify", "complement", "nnf", "library", "minimize", "factor", "exact", "pdn", "pun", "count")
+_STEP_STAGE = {
+    "parse": "parse",
+    "simplify": "simplify",
+    "complement": "complement",
+    "nnf": "nnf",
+    "nnfComplement": "nnf",
+    "minimize": "minimize",
+    "minimizeComplement": "minimize",
+    "factor": "exact",
+    "factorComplement": "exact",
+    "library": "library",
+    "exact": "exact",
+    "pdn": "pdn",
+    "pun": "pun",
+    "count": "count",
+    "export": "parse",
+}
+
+# Steps that render one expression, and the attribute holding it.
+_EXPR_STEPS = {
+    "parse": "_parsed",
+    "simplify": "_simplified",
+    "complement": "_comp",
+    "nnf": "_nnf",
+    "nnfComplement": "_nnf_comp",
+    "factor": "_factored",
+    "factorComplement": "_factored_comp",
+}
+
+
+def select_steps(fields: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """
+    The requested steps in response order, or None for all of them.  A single
+    string may list several steps separated by commas.
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    wanted = set()
+    for name in fields:
+        name = name.strip() if isinstance(name, str) else name
+        if name not in _STEP_STAGE:
+            raise SynthesisError(f"Unknown step {name!r}; expected any of {', '.join(SYNTHESIS_STEPS)}.")
+        wanted.add(name)
+    return tuple(name for name in SYNTHESIS_STEPS if name in wanted)
+
+
+class SynthesisResult:
+    """
+    A synthesis run that only does the work its steps are asked for.
+
+    The expression is parsed up front, so input errors surface at once.  The
+    other stages run in pipeline order, as far as the requested steps need,
+    and each step is rendered on first use: step("count") builds both
+    networks but renders no expression and exports no network.
+    """
+
+    def __init__(
+        self,
+        expression: Union[str, TokenStream],
+        cache: Optional[TransformCache] = None,
+        mode: str = "default",
+        cancel: Optional[CancelToken] = None,
+        timings: bool = False,
+        network_format: str = "nested",
+        budget: Optional[Budget] = None,
+    ):
+        stream = expression if isinstance(expression, TokenStream) else None
+        if stream is not None:
+            expression = stream.text
+        if not isinstance(expression, str) or not expression.strip():
+            raise SynthesisError("Expression must be a non-empty string.")
+        if mode not in SYNTHESIS_MODES:
+            raise SynthesisError(f"Unknown synthesis mode {mode!r}; expected one of {', '.join(SYNTHESIS_MODES)}.")
+        if network_format not in NETWORK_FORMATS:
+            raise SynthesisError(
+                f"Unknown network format {network_format!r}; expected one of {', '.join(NETWORK_FORMATS)}."
+            )
+        self.expression = expression
+        self.mode = mode
+        self.network_format = network_format
+        self._cache = cache if cache is not None else TransformCache()
+        self._cancel = cancel
+        self._budget = budget
+        self._clock = _StageClock() if timings else _NULL_CLOCK
+        self._stream = stream if stream is not None else tokenize(expression)
+        self.style = self._stream.style
+        self._ran = 0  # number of _STAGES done
+        self._steps: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._advance("parse")
+
+    def step(self, name: str) -> Optional[Dict[str, Any]]:
+        """One step of the response; None for `library` or `exact` when they do not apply."""
+        if name not in self._steps:
+            if name not in _STEP_STAGE:
+                raise SynthesisError(f"Unknown step {name!r}; expected any of {', '.join(SYNTHESIS_STEPS)}.")
+            self._advance(_STEP_STAGE[name])
+            self._steps[name] = self._render(name)
+        return self._steps[name]
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """The synthesize() response, with only the steps in `fields` (all by default)."""
+        names = select_steps(fields)
+        names = names if names is not None else SYNTHESIS_STEPS
+        # Run the stages before rendering anything, so that stage laps stay
+        # free of rendering time.
+        self._advance(max((_STEP_STAGE[name] for name in names), key=_STAGES.index, default="parse"))
+        steps = {}
+        for name in names:
+            step = self.step(name)
+            if step is not None:
+                steps[name] = step
+        style = self.style
+        result = {
+            "input": {
+                "expression": self.expression,
+                "style": {
+                    "not": style.not_op,
+                    "and": "" if style.implicit_and else style.and_op,
+                    "or": style.or_op,
+                },
+            },
+            "steps": steps,
+        }
+        if self._budget is not None and self._budget.truncated:
+            result["truncated"] = True
+        if self._clock is not _NULL_CLOCK:
+            self._clock.lap("render")
+            result["timings"] = self._clock.report()
+        return result
+
+    def _advance(self, stage: str) -> None:
+        target = _STAGES.index(stage) + 1
+        while self._ran < target:
+            name = _STAGES[self._ran]
+            getattr(self, "_run_" + name)()
+            self._ran += 1
+            if name != "exact" or self.mode == "exact":
+                self._clock.lap(name)
+
+    def _run_parse(self) -> None:
+        self._parsed = parse_expr(self._stream)
+
+    def _run_simplify(self) -> None:
+        self._simplified = simplify(self._parsed, self._cache, self._cancel, self._budget)
+        self._clock.count("simplify", [self._parsed], [self._simplified])
+
+    def _run_complement(self) -> None:
+        self._comp = complement(self._simplified)
+
+    def _run_nnf(self) -> None:
+        cache, cancel, budget = self._cache, self._cancel, self._budget
+        self._nnf = nnf(self._simplified, cache, cancel, budget)
+        self._nnf_comp = nnf(self._comp, cache, cancel, budget)
+        self._clock.count("nnf", [self._simplified, self._comp], [self._nnf, self._nnf_comp])
+
+    def _run_library(self) -> None:
+        self._match = _library_lookup(self._simplified)
+        self._from_library = self._match is not None and self._match.optimal
+
+    def _run_minimize(self) -> None:
+        skip = self._from_library or (
+            self.mode == "incremental" and len(set(_collect_vars(self._nnf))) > INCREMENTAL_MINIMIZE_VARS
+        )
+        if skip:
+            from ..logic.minimize import MinimizeResult
+
+            self._minimized = MinimizeResult(expr=self._nnf, method="skipped", cubes=0, literals=0)
+            self._minimized_comp = MinimizeResult(expr=self._nnf_comp, method="skipped", cubes=0, literals=0)
+        else:
+            self._minimized = _minimize(self._nnf, self._cache, self._cancel, self._budget)
+            self._minimized_comp = _minimize(self._nnf_comp, self._cache, self._cancel, self._budget)
+        self._clock.count(
+            "minimize", [self._nnf, self._nnf_comp], [self._minimized.expr, self._minimized_comp.expr]
+        )
+
+    def _run_factor(self) -> None:
+        if self._from_library:
+            # A minimum formula for F; its dual is one for !F.
+            self._factored = simplify(self._match.expr, self._cache)
+            self._factored_comp = nnf(Not(self._factored), self._cache)
+        else:
+            self._factored = self._factor_forms(self._nnf, self._minimized)
+            self._factored_comp = self._factor_forms(self._nnf_comp, self._minimized_comp)
+            if self._match is not None:
+                # Entries not proven minimum only replace a larger form.
+                best = simplify(self._match.expr, self._cache)
+                self._factored = _fewest_literals(self._factored, best)
+                self._factored_comp = _fewest_literals(self._factored_comp, nnf(Not(best), self._cache))
+        self._clock.count("factor", [self._nnf, self._nnf_comp], [self._factored, self._factored_comp])
+
+    def _factor_forms(self, expr_nnf: Expr, minimized: Any) -> Expr:
+        # Only one form is factored: the two-level cover when it has fewer
+        # literals than the NNF, the NNF otherwise.
+        cache, cancel, budget = self._cache, self._cancel, self._budget
+        if literal_count(minimized.expr) < literal_count(expr_nnf):
+            return factor(minimized.expr, cache=cache, cancel=cancel, budget=budget)
+        if self.mode == "incremental":
+            return factor_local(expr_nnf, cache, cancel, budget)
+        return factor(expr_nnf, cache=cache, cancel=cancel, budget=budget)
+
+    def _run_exact(self) -> None:
+        self._exact = None
+        if self.mode == "exact":
+            self._factored, self._factored_comp, self._exact = _exact_pair(
+                self._simplified,
+                self._factored,
+                self._factored_comp,
+                self._match,
+                self._cache,
+                self._cancel,
+                self._budget,
+            )
+
+    def _run_pdn(self) -> None:
+        # Conducts when F=0.
+        self._pdn = build_network(self._factored_comp, transistor_kind="nmos", cache=self._cache, cancel=self._cancel)
+
+    def _run_pun(self) -> None:
+        # Conducts when F=1.
+        self._pun = build_network(self._factored, transistor_kind="pmos", cache=self._cache, cancel=self._cancel)
+
+    def _run_count(self) -> None:
+        pdn_transistors = _count_transistors(self._pdn)
+        pun_transistors = _count_transistors(self._pun)
+        inverted_gates = _collect_inverted_gates(self._pdn) | _collect_inverted_gates(self._pun)
+        inverter_count = 2 * len(inverted_gates)  # CMOS inverter = 2 transistors
+        self._count = {
+            "pdnTransistors": pdn_transistors,
+            "punTransistors": pun_transistors,
+            "inverterTransistors": inverter_count,
+            "totalTransistors": pdn_transistors + pun_transistors + inverter_count,
+            "invertedInputs": sorted(inverted_gates),
+        }
+
+    def _render(self, name: str) -> Optional[Dict[str, Any]]:
+        style = self.style
+        if name == "minimize":
+            return _minimize_step(self._minimized, style)
+        if name == "minimizeComplement":
+            return _minimize_step(self._minimized_comp, style)
+        if name == "library":
+            return _library_step(self._match) if self._match is not None else None
+        if name == "exact":
+            return self._exact
+        if name == "pdn":
+            return {"network": export_network(self._pdn, self.network_format)}
+        if name == "pun":
+            return {"network": export_network(self._pun, self.network_format)}
+        if name == "count":
+            return self._count
+        if name == "export":
+            return {"format": "json" if self.network_format == "nested" else self.network_format}
+        return {"expr": expr_to_str(getattr(self, _EXPR_STEPS[name]), style)}
+
+
+def synthesize(
+    expression: Union[str, TokenStream],
+    cache: Optional[TransformCache] = None,
+    mode: str = "default",
+    cancel: Optional[CancelToken] = None,
+    timings: bool = False,
+    fields: Optional[Iterable[str]] = None,
+    network_format: str = "nested",
+    budget: Optional[Budget] = None,
+) -> Dict[str, Any]:
+    """
+    Synthesizes the CMOS networks for `expression` and returns every step.
+
+    `fields` limits the response to the given steps (see SYNTHESIS_STEPS); only
+    the stages those steps need are run, and only they are rendered, so a
+    count-only query skips expression rendering and network export.
+    `network_format` picks the export of the pdn and pun steps: "nested"
+    (export_network_json), "columns" (export_network_columns) or "shared"
+    (export_network_shared).  With a `budget`, the transforms that only improve
+    the networks stop when it runs out and the result has `"truncated": true`.
+    """
+    names = select_steps(fields)
+    return SynthesisResult(expression, cache, mode, cancel, timings, network_format, budget).to_dict(names)
+
+
+def synthesize_batch(
+    expressions: Iterable[Any],
+    cache: Optional[TransformCache] = None,
+    mode: str = "default",
+    item_timeout: Optional[float] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Runs synthesize() over many expressions, yielding one record per input as
+    soon as it is done: {"index", "expr", "result"} or {"index", "expr", "error"}.
+
+    A failing expression (or one running past `item_timeout` seconds) does not
+    stop the batch.  Repeated expressions are synthesized once, and one
+    TransformCache is shared by the whole batch.  `fields` selects the steps of
+    every result, as in synthesize().
+    """
+    cache = cache if cache is not None else TransformCache()
+    fields = select_steps(fields)
+    batch = BatchRecords(expressions)
+    for index, expression, outcome in batch:
+        if outcome is None:
+            try:
+                cancel = CancelToken(item_timeout) if item_timeout is not None else None
+                outcome = ("result", synthesize(expression, cache=cache, mode=mode, cancel=cancel, fields=fields))
+            except SynthesisError as e:
+                outcome = ("error", str(e))
+        yield batch.record(index, expression, outcome)
+
+
+class BatchRecords:
+    """
+    The bookkeeping of one batch, shared by synthesize_batch() and
+    SynthesisPool.batch(): iterating yields (index, expression, outcome), the
+    outcome being that of an earlier identical expression or None when the
+    expression still has to be synthesized.  record() turns an outcome
+    ("result", value) or ("error", message) into the record of its input and
+    remembers it for the repeats, unless `remember` is false.
+    """
+
+    def __init__(self, expressions: Iterable[Any]):
+        self._expressions = expressions
+        self._done: Dict[str, Tuple[str, Any]] = {}
+
+    def __iter__(self) -> Iterator[Tuple[int, Any, Optional[Tuple[str, Any]]]]:
+        for index, expression in enumerate(self._expressions):
+            key = expression if isinstance(expression, str) else None
+            yield index, expression, self._done.get(key) if key is not None else None
+
+    def record(self, index: int, expression: Any, outcome: Tuple[str, Any], remember: bool = True) -> Dict[str, Any]:
+        if remember and isinstance(expression, str):
+            self._done.setdefault(expression, outcome)
+        return {"index": index, "expr": expression, outcome[0]: outcome[1]}
+
+
+def read_batch(body: bytes, content_type: str = "application/json") -> List[Any]:
+    """
+    Expressions of a batch request body.
+
+    JSON bodies are an array of expressions (strings or {"expr": ...} objects)
+    or {"expressions": [...]}.  NDJSON bodies (`application/x-ndjson`) hold one
+    expression per line in either form, or as bare text; blank lines are skipped.
+    """
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise SynthesisError("Batch body must be UTF-8.")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return list(read_batch_lines(text.splitlines()))
+    try:
+        items = json.loads(text)
+    except ValueError as e:
+        raise SynthesisError(f"Invalid JSON batch body: {e}")
+    if isinstance(items, dict):
+        items = items.get("expressions")
+    if not isinstance(items, list):
+        raise SynthesisError('Batch body must be a JSON array or {"expressions": [...]}.')
+    return [_batch_item(item) for item in items]
+
+
+def read_batch_lines(lines: Iterable[str]) -> Iterator[Any]:
+    """Expressions of NDJSON lines, lazily; see read_batch()."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            item = line
+        if not isinstance(item, (str, dict)):
+            item = line  # bare "1", "0": constants, not JSON numbers
+        yield _batch_item(item)
 
-    pdn = build_network(factored_comp, transistor_kind="nmos")  # conducts when F=0
-    pun = build_network(factored, transistor_kind="pmos")  # conducts when F=1
 
-    pdn_transistors = _count_transistors(pdn)
-    pun_transistors = _count_transistors(pun)
-    inverted_gates = _collect_inverted_gates(pdn) | _collect_inverted_gates(pun)
-    inverter_count = 2 * len(inverted_gates)  # CMOS inverter = 2 transistors
+def _batch_item(item: Any) -> Any:
+    return item.get("expr") if isinstance(item, dict) else item
+
+
+def _library_lookup(simplified: Expr) -> Any:
+    # Functions of up to five inputs are looked up by NPN class in the
+    # precomputed library; see synthesis/npn.py.
+    from ..synthesis.npn import MAX_INPUTS, lookup
+    from ..verify.truth_table import truth_tables
+
+    names = sorted(set(_collect_vars(simplified)))
+    if isinstance(simplified, Const) or not names or len(names) > MAX_INPUTS:
+        return None
+    (tt,) = truth_tables([simplified], names)
+    return lookup(tt, names)
+
 
+def _library_step(match: Any) -> Dict[str, Any]:
     return {
-        "input": {
-            "expression": expression,
-            "style": {
-                "not": style.not_op,
-                "and": "" if style.implicit_and else style.and_op,
-                "or": style.or_op,
-            },
-        },
-        "steps": {
-            "parse": {"expr": expr_to_str(parsed, style)},
-            "simplify": {"expr": expr_to_str(simplified, style)},
-            "complement": {"expr": expr_to_str(comp, style)},
-            "nnf": {"expr": expr_to_str(nnf_expr, style)},
-            "nnfComplement": {"expr": expr_to_str(nnf_comp, style)},
-            "factor": {"expr": expr_to_str(factored, style)},
-            "factorComplement": {"expr": expr_to_str(factored_comp, style)},
-            "pdn": {"network": export_network_json(pdn)},
-            "pun": {"network": export_network_json(pun)},
-            "count": {
-                "pdnTransistors": pdn_transistors,
-                "punTransistors": pun_transistors,
-                "inverterTransistors": inverter_count,
-                "totalTransistors": pdn_transistors + pun_transistors + inverter_count,
-                "invertedInputs": sorted(inverted_gates),
-            },
-            "export": {"format": "json"},
-        },
+        "class": f"0x{match.canonical:0{(1 << match.inputs) // 4}x}",
+        "inputs": match.inputs,
+        "leaves": match.leaves,
+        "optimal": match.optimal,
+    }
+
+
+def _exact_pair(
+    simplified: Expr,
+    factored: Expr,
+    factored_comp: Expr,
+    match: Any,
+    cache: TransformCache,
+    cancel: Optional[CancelToken] = None,
+    budget: Optional[Budget] = None,
+) -> Tuple[Expr, Expr, Dict[str, Any]]:
+    # The PDN formula for !F is the De Morgan dual of the PUN formula for F and
+    # has the same leaves, so one minimum formula fixes both networks.  The
+    # smaller of the two factored forms is the bound the search has to beat.
+    from ..synthesis.exact import MAX_VARS, minimum_formula
+
+    names = sorted(set(_collect_vars(simplified)))
+    if isinstance(simplified, Const) or not names or len(names) > MAX_VARS:
+        return factored, factored_comp, {"status": "skipped", "maxVars": MAX_VARS}
+    if literal_count(factored_comp) < literal_count(factored):
+        bound = nnf(Not(factored_comp), cache)
+    else:
+        bound = factored
+    if match is not None and match.optimal:
+        # The library entry already took part in the bound, which is therefore minimum.
+        step = {"status": "optimal", "source": "library", "leaves": literal_count(bound), "explored": 0, "ms": 0.0}
+        return bound, nnf(Not(bound), cache), step
+    if budget is not None:
+        cancel = budget.guard(cancel)
+    try:
+        result = minimum_formula(simplified, names, literal_count(bound), cancel)
+    except BudgetExhausted:
+        # The search keeps no best-so-far of its own; the bound is the answer.
+        step = {"status": "truncated", "source": "search", "leaves": literal_count(bound)}
+        return bound, nnf(Not(bound), cache), step
+    best = simplify(result.expr, cache) if result.expr is not None else bound
+    step = {
+        "status": "optimal" if result.optimal else "bounded",
+        "source": "search",
+        "leaves": literal_count(best),
+        "explored": result.explored,
+        "ms": round(result.ms, 3),
+    }
+    return best, nnf(Not(best), cache), step
+
+
+def _minimize_step(result: Any, style: RenderStyle) -> Dict[str, Any]:
+    return {
+        "expr": expr_to_str(result.expr, style),
+        "method": result.method,
+        "cubes": result.cubes,
+        "literals": result.literals,
     }
 
 
-def inspect_complement_nnf(expression: str) -> Dict[str, Any]:
+CHECK_METHODS = ("auto", "truthTable", "bdd", "sat", "random")
+
+
+def inspect_complement_nnf(
+    expression: Union[str, TokenStream],
+    cache: Optional[TransformCache] = None,
+    method: str = "auto",
+    cancel: Optional[CancelToken] = None,
+    timings: bool = False,
+) -> Dict[str, Any]:
+    stream = expression if isinstance(expression, TokenStream) else None
+    if stream is not None:
+        expression = stream.text
     if not isinstance(expression, str) or not expression.strip():
         raise SynthesisError("Expression must be a non-empty string.")
-
-    style = _detect_style(expression)
-    parsed = parse_expr(expression)
-    simplified = simplify(parsed)
+    if method not in CHECK_METHODS:
+        raise SynthesisError(f"Unknown check method {method!r}; expected one of {', '.join(CHECK_METHODS)}.")
+    cache = cache if cache is not None else TransformCache()
+    clock = _StageClock() if timings else _NULL_CLOCK
+
+    stream = stream if stream is not None else tokenize(expression)
+    style = stream.style
+    parsed = parse_expr(stream)
+    clock.lap("parse")
+    simplified = simplify(parsed, cache, cancel)
+    clock.lap("simplify")
+    clock.count("simplify", [parsed], [simplified])
     comp = complement(simplified)
-    nnf_expr = nnf(simplified)
-    nnf_comp = nnf(comp)
+    clock.lap("complement")
+    nnf_expr = nnf(simplified, cache, cancel)
+    nnf_comp = nnf(comp, cache, cancel)
+    clock.lap("nnf")
+    clock.count("nnf", [simplified, comp], [nnf_expr, nnf_comp])
+    if cancel is not None:
+        cancel.check()  # the equivalence engines below are bounded by their own budgets
 
     vars_: List[str] = sorted({name for name in _collect_vars(parsed)})
-    max_full_vars = 8
-    full = len(vars_) <= max_full_vars
-
-    if full:
-        rows = []
-        for mask in range(1 << len(vars_)):
-            env = {vars_[i]: bool((mask >> i) & 1) for i in range(len(vars_))}
-            f = _eval(parsed, env)
-            nnf_f = _eval(nnf_expr, env)
-            nnf_fc = _eval(nnf_comp, env)
-            rows.append(
-                {
-                    "in": {k: int(v) for k, v in env.items()},
-                    "f": int(f),
-                    "nnfF": int(nnf_f),
-                    "nnfNotF": int(nnf_fc),
-                }
-            )
-        checks = {
-            "checkedBy": "truthTable",
-            "vars": vars_,
-            "nnfEquivalent": all(r["f"] == r["nnfF"] for r in rows),
-            "nnfComplementEquivalent": all(r["nnfNotF"] == (1 - r["f"]) for r in rows),
-        }
-    else:
-        import random
-
-        samples = 256
-        ok_nnf = True
-        ok_comp = True
-        for _ in range(samples):
-            env = {k: bool(random.getrandbits(1)) for k in vars_}
-            f = _eval(parsed, env)
-            ok_nnf = ok_nnf and (_eval(nnf_expr, env) == f)
-            ok_comp = ok_comp and (_eval(nnf_comp, env) == (not f))
-        rows = []
-        checks = {
-            "checkedBy": "random",
-            "samples": samples,
-            "vars": vars_,
-            "nnfEquivalent": ok_nnf,
-            "nnfComplementEquivalent": ok_comp,
-        }
+    checks, rows = _check_equivalence(parsed, nnf_expr, nnf_comp, vars_, method)
+    clock.lap("check")
 
-    return {
+    result = {
         "input": {
             "expression": expression,
             "style": {
@@ -663,21 +1987,181 @@ def inspect_complement_nnf(expression: str) -> Dict[str, Any]:
         "checks": checks,
         "truthTable": rows,
     }
+    if timings:
+        clock.lap("render")
+        result["timings"] = clock.report()
+    return result
+
+
+def _check_equivalence(
+    parsed: Expr, nnf_expr: Expr, nnf_comp: Expr, vars_: List[str], method: str
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    # auto: exhaustive truth tables while they fit, then an exact BDD proof, then
+    # a SAT miter when the BDD blows past its node limit, and random sampling
+    # only if the SAT search also runs out of budget.
+    from ..verify import bdd, sat, truth_table
+
+    if method == "truthTable" or (method == "auto" and len(vars_) <= truth_table.MAX_VARS):
+        return _check_truth_table(parsed, nnf_expr, nnf_comp, vars_)
+    if method in ("auto", "bdd"):
+        try:
+            return _check_bdd(parsed, nnf_expr, nnf_comp, vars_, 50_000 if method == "auto" else None), []
+        except bdd.BDDLimitExceeded as e:
+            if method == "bdd":
+                raise SynthesisError(str(e))
+    if method in ("auto", "sat"):
+        try:
+            return _check_sat(parsed, nnf_expr, nnf_comp, vars_), []
+        except sat.SATBudgetExceeded as e:
+            if method == "sat":
+                raise SynthesisError(str(e))
+    return _check_random(parsed, nnf_expr, nnf_comp, vars_), []
+
+
+def _check_truth_table(
+    parsed: Expr, nnf_expr: Expr, nnf_comp: Expr, vars_: List[str]
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    from ..verify import truth_table
+
+    max_table_vars = 8  # rows listed in the response
+    f, nnf_f, nnf_fc = truth_table.truth_tables((parsed, nnf_expr, nnf_comp), vars_)
+    full = (1 << (1 << len(vars_))) - 1
+    rows = []
+    if len(vars_) <= max_table_vars:
+        for mask in range(1 << len(vars_)):
+            rows.append(
+                {
+                    "in": truth_table.row_assignment(mask, vars_),
+                    "f": (f >> mask) & 1,
+                    "nnfF": (nnf_f >> mask) & 1,
+                    "nnfNotF": (nnf_fc >> mask) & 1,
+                }
+            )
+    checks = {
+        "checkedBy": "truthTable",
+        "assignments": 1 << len(vars_),
+        "vars": vars_,
+        "nnfEquivalent": f == nnf_f,
+        "nnfComplementEquivalent": nnf_fc == f ^ full,
+    }
+    nnf_row = truth_table.first_difference(f, nnf_f)
+    comp_row = truth_table.first_difference(f ^ full, nnf_fc)
+    _add_counterexamples(
+        checks,
+        nnf=None if nnf_row is None else truth_table.row_assignment(nnf_row, vars_),
+        nnfComplement=None if comp_row is None else truth_table.row_assignment(comp_row, vars_),
+    )
+    return checks, rows
+
+
+def _check_bdd(
+    parsed: Expr, nnf_expr: Expr, nnf_comp: Expr, vars_: List[str], max_nodes: Optional[int] = None
+) -> Dict[str, Any]:
+    from ..verify import bdd
+
+    start = time.perf_counter()
+    order = bdd.dfs_order((parsed,))
+    manager = bdd.BDD(order) if max_nodes is None else bdd.BDD(order, max_nodes=max_nodes)
+    memo: Dict[Expr, int] = {}
+    f = manager.from_expr(parsed, memo)
+    nnf_f = manager.from_expr(nnf_expr, memo)
+    nnf_fc = manager.from_expr(nnf_comp, memo)
+    not_f = manager.negate(f)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    checks: Dict[str, Any] = {
+        "checkedBy": "bdd",
+        "vars": vars_,
+        "nnfEquivalent": nnf_f == f,
+        "nnfComplementEquivalent": nnf_fc == not_f,
+        "bdd": {
+            "order": manager.order,
+            "nodes": manager.node_count((f, nnf_f, nnf_fc)),
+            "fNodes": manager.node_count((f,)),
+            "allocated": len(manager),
+            "buildMs": round(build_ms, 3),
+        },
+    }
+    _add_counterexamples(
+        checks,
+        nnf=manager.satisfy_one(manager.xor(f, nnf_f)),
+        nnfComplement=manager.satisfy_one(manager.xor(not_f, nnf_fc)),
+    )
+    return checks
+
+
+def _check_sat(parsed: Expr, nnf_expr: Expr, nnf_comp: Expr, vars_: List[str]) -> Dict[str, Any]:
+    from ..verify import sat
+
+    nnf_result = sat.check_equivalence(parsed, nnf_expr)
+    comp_result = sat.check_equivalence(Not(parsed), nnf_comp)
+    checks: Dict[str, Any] = {
+        "checkedBy": "sat",
+        "vars": vars_,
+        "nnfEquivalent": nnf_result.equivalent,
+        "nnfComplementEquivalent": comp_result.equivalent,
+        "sat": {"nnf": nnf_result.to_dict(), "nnfComplement": comp_result.to_dict()},
+    }
+    _add_counterexamples(checks, nnf=nnf_result.counterexample, nnfComplement=comp_result.counterexample)
+    return checks
+
+
+def _check_random(parsed: Expr, nnf_expr: Expr, nnf_comp: Expr, vars_: List[str]) -> Dict[str, Any]:
+    import random
+
+    samples = 256
+    ok_nnf = True
+    ok_comp = True
+    for _ in range(samples):
+        env = {k: bool(random.getrandbits(1)) for k in vars_}
+        f = _eval(parsed, env)
+        ok_nnf = ok_nnf and (_eval(nnf_expr, env) == f)
+        ok_comp = ok_comp and (_eval(nnf_comp, env) == (not f))
+    return {
+        "checkedBy": "random",
+        "samples": samples,
+        "vars": vars_,
+        "nnfEquivalent": ok_nnf,
+        "nnfComplementEquivalent": ok_comp,
+    }
+
+
+def _add_counterexamples(checks: Dict[str, Any], **found: Optional[Dict[str, int]]) -> None:
+    counterexamples = {name: dict(sorted(env.items())) for name, env in found.items() if env is not None}
+    if counterexamples:
+        checks["counterexamples"] = counterexamples
 
 
 def _collect_vars(expr: Expr) -> Iterable[str]:
-    if isinstance(expr, Var):
-        yield expr.name
-    elif isinstance(expr, Const):
-        return
-    elif isinstance(expr, Not):
-        yield from _collect_vars(expr.child)
-    elif isinstance(expr, (And, Or)):
-        for c in expr.children:
-            yield from _collect_vars(c)
+    # Variable names in order of first appearance, each once.
+    seen: Set[int] = set()
+    stack = [expr]
+    while stack:
+        e = stack.pop()
+        if e.uid in seen:
+            continue
+        seen.add(e.uid)
+        if isinstance(e, Var):
+            yield e.name
+        elif isinstance(e, Not):
+            stack.append(e.child)
+        elif isinstance(e, (And, Or)):
+            stack.extend(reversed(e.children))
+
+
+# Expressions at most this tall are evaluated by plain recursion, which is
+# faster per call than the explicit stack below (about 1.5x on the bench
+# families, see bench/recursion.py) and stays far from the recursion limit.
+_EVAL_RECURSION_HEIGHT = 64
 
 
 def _eval(expr: Expr, env: Dict[str, bool]) -> bool:
+    if expr.height <= _EVAL_RECURSION_HEIGHT:
+        return _eval_recursive(expr, env)
+    return _eval_iterative(expr, env)
+
+
+def _eval_recursive(expr: Expr, env: Dict[str, bool]) -> bool:
     if isinstance(expr, Var):
         try:
             return env[expr.name]
@@ -686,72 +2170,101 @@ def _eval(expr: Expr, env: Dict[str, bool]) -> bool:
     if isinstance(expr, Const):
         return expr.value
     if isinstance(expr, Not):
-        return not _eval(expr.child, env)
+        return not _eval_recursive(expr.child, env)
     if isinstance(expr, And):
-        out = True
         for c in expr.children:
-            out = out and _eval(c, env)
-        return out
+            if not _eval_recursive(c, env):
+                return False
+        return True
     if isinstance(expr, Or):
-        out = False
         for c in expr.children:
-            out = out or _eval(c, env)
-        return out
+            if _eval_recursive(c, env):
+                return True
+        return False
     raise AssertionError(f"Unknown Expr: {type(expr)}")
 
 
-# ---- Optional FastAPI binding ----
-
-
-def _try_build_router():
-    try:
-        from fastapi import APIRouter, HTTPException
-        from pydantic import BaseModel
-    except Exception:
-        return None
-
-    router = APIRouter()
-
-    class SynthesizeRequest(BaseModel):
-        expr: str
-
-    @router.post("/synthesize")
-    def synthesize_route(payload: SynthesizeRequest) -> Dict[str, Any]:
-        try:
-            return synthesize(payload.expr)
-        except SynthesisError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-
-    @router.post("/debug/nnf")
-    def debug_nnf_route(payload: SynthesizeRequest) -> Dict[str, Any]:
-        try:
-            return inspect_complement_nnf(payload.expr)
-        except SynthesisError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-
-    @router.post("/debug/complement-nnf")
-    def debug_complement_nnf_route(payload: SynthesizeRequest) -> Dict[str, Any]:
-        try:
-            return inspect_complement_nnf(payload.expr)
-        except SynthesisError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-
-    return router
-
-
-router = _try_build_router()
+def _eval_iterative(expr: Expr, env: Dict[str, bool]) -> bool:
+    # Explicit-stack evaluation that short-circuits like `and` / `or`: descend
+    # along first operands to a leaf, then hand its value up the frames until
+    # one of them still needs its next operand.  A frame is the iterator over
+    # the remaining operands and the value that decides the connective (None
+    # for Not).
+    stack: List[Tuple[Optional[Iterator[Expr]], Optional[bool]]] = []
+    e: Optional[Expr] = expr
+    while True:
+        while True:
+            if isinstance(e, Not):
+                stack.append((None, None))
+                e = e.child
+            elif isinstance(e, And):
+                pending = iter(e.children)
+                stack.append((pending, False))
+                e = next(pending, None)
+                if e is None:  # no operands: the identity of the connective
+                    e = Const(True)
+            elif isinstance(e, Or):
+                pending = iter(e.children)
+                stack.append((pending, True))
+                e = next(pending, None)
+                if e is None:
+                    e = Const(False)
+            else:
+                break
+        if isinstance(e, Var):
+            try:
+                value = env[e.name]
+            except KeyError:
+                raise SynthesisError(f"Missing variable assignment: {e.name}")
+        elif isinstance(e, Const):
+            value = e.value
+        else:
+            raise AssertionError(f"Unknown Expr: {type(e)}")
+        while stack:
+            pending, decides = stack[-1]
+            if pending is None:
+                value = not value
+            elif value is not decides:
+                e = next(pending, None)
+                if e is not None:
+                    break
+            stack.pop()
+        else:
+            return value
 
 
 __all__ = [
     "SynthesisError",
+    "SynthesisCancelled",
+    "CancelToken",
+    "Budget",
+    "MemoTable",
+    "TransformCache",
+    "TokenStream",
+    "tokenize",
     "parse_expr",
     "simplify",
     "complement",
     "nnf",
     "factor",
+    "factor_local",
+    "literal_count",
     "build_network",
     "export_network_json",
+    "export_network_columns",
+    "export_network_shared",
+    "export_network",
+    "NETWORK_FORMATS",
+    "NETWORK_KINDS",
+    "SynthesisResult",
+    "select_steps",
     "synthesize",
+    "synthesize_batch",
+    "BatchRecords",
+    "read_batch",
+    "read_batch_lines",
+    "SYNTHESIS_MODES",
+    "SYNTHESIS_STEPS",
     "inspect_complement_nnf",
-    "router",
+    "interned_node_count",
 ]
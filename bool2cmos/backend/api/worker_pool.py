@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Sequence
+
+from .synthesize import (
+    BatchRecords,
+    CancelToken,
+    SynthesisCancelled,
+    SynthesisError,
+    TransformCache,
+    synthesize,
+)
+
+# Offloads pipeline calls from async routes to a dedicated, bounded pool.
+#
+# At most `workers` calls run at once and at most `queue_size` more wait for a
+# worker; anything beyond that is rejected straight away (PoolSaturated, a 503)
+# instead of piling up.  Every call gets a CancelToken with the request
+# deadline: when it passes, the route answers at once (SynthesisCancelled, a
+# 408) and the worker stops at its next cancellation check.  A slot is only
+# given back once its worker has actually stopped, so abandoned work still
+# counts against the bound until it is gone.
+#
+# A batch runs its expressions through the same pool one at a time, so it
+# holds at most one slot and each expression gets the request deadline.
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_TIMEOUT = 10.0
+
+
+class PoolSaturated(RuntimeError):
+    pass
+
+
+class SynthesisPool:
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+    ):
+        if workers <= 0 or queue_size < 0:
+            raise ValueError("workers must be positive and queue_size non-negative")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="synthesis")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "SynthesisPool":
+        """Settings from BOOL2CMOS_WORKERS / _QUEUE_SIZE / _TIMEOUT (seconds, 0 = none), where set."""
+        timeout = float(os.environ.get("BOOL2CMOS_TIMEOUT", DEFAULT_TIMEOUT))
+        return cls(
+            workers=int(os.environ.get("BOOL2CMOS_WORKERS", DEFAULT_WORKERS)),
+            queue_size=int(os.environ.get("BOOL2CMOS_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+            timeout=timeout if timeout > 0 else None,
+        )
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Awaits fn(*args, cancel=token, **kwargs) on the pool, within the deadline."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated("The synthesis queue is full; retry later.")
+        token = CancelToken(self.timeout)
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args, cancel=token, **kwargs)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            token.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise SynthesisCancelled(f"Synthesis did not finish within {self.timeout:g}s.")
+        except SynthesisCancelled:
+            # The worker saw the deadline first.
+            with self._lock:
+                self.timeouts += 1
+            raise
+        except asyncio.CancelledError:
+            token.cancel()  # the client went away
+            raise
+
+    async def batch(
+        self,
+        expressions: Iterable[Any],
+        mode: str = "default",
+        fields: Optional[Sequence[str]] = None,
+        metrics: Optional[Any] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        The records of synthesize_batch(), with every expression run on the pool.
+
+        PoolSaturated is raised if the first expression is rejected, before any
+        record is yielded; a later rejection is reported as that expression's
+        error.  Outcomes are recorded in `metrics` (a MetricsRegistry) under
+        the "batch" endpoint.
+        """
+        cache = TransformCache()
+        batch = BatchRecords(expressions)
+        timings = metrics is not None and metrics.enabled
+        for index, expression, outcome in batch:
+            failure = None
+            if outcome is None:
+                try:
+                    result = await self.run(
+                        synthesize, expression, cache=cache, mode=mode, fields=fields, timings=timings
+                    )
+                except PoolSaturated as e:
+                    if index == 0:
+                        failure = "rejected"
+                        raise
+                    failure, outcome = "rejected", ("error", str(e))
+                except SynthesisCancelled as e:
+                    failure, outcome = "timeout", ("error", str(e))
+                except SynthesisError as e:
+                    failure, outcome = "error", ("error", str(e))
+                else:
+                    if metrics is not None:
+                        metrics.observe("batch", result.pop("timings", None))
+                    outcome = ("result", result)
+                finally:
+                    if failure is not None and metrics is not None:
+                        metrics.failed("batch", failure)
+            # A rejected expression is retried when it comes up again.
+            yield batch.record(index, expression, outcome, remember=failure != "rejected")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queueSize": self.queue_size,
+                "timeout": self.timeout,
+                "inFlight": self._in_flight,
+                "completed": self.completed,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if future is not None:
+                self.completed += 1
+        self._slots.release()
+
+
+__all__ = ["PoolSaturated", "SynthesisPool"]
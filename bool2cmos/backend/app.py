@@ -1,20 +1,21 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Dict
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
 
-from .api.synthesize import SynthesisError, inspect_complement_nnf, synthesize
-
-
-class SynthesizeRequest(BaseModel):
-    expr: str
+from .api.metrics import MetricsRegistry
+from .api.result_cache import ResultCache
+from .api.routes import build_router
+from .api.sessions import SessionStore
+from .api.worker_pool import SynthesisPool
+from .synthesis.npn import default_library
 
 
 def create_app() -> FastAPI:
     app = FastAPI(title="bool2cmos", version="0.1.0")
+    default_library()  # map the NPN network library before the first request
 
     app.add_middleware(
         CORSMiddleware,
@@ -31,27 +32,14 @@ def create_app() -> FastAPI:
     def health() -> Dict[str, str]:
         return {"status": "ok"}
 
-    @app.post("/synthesize")
-    def synthesize_route(payload: SynthesizeRequest) -> Dict[str, Any]:
-        try:
-            return synthesize(payload.expr)
-        except SynthesisError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-
-    @app.post("/debug/nnf")
-    def debug_nnf_route(payload: SynthesizeRequest) -> Dict[str, Any]:
-        try:
-            return inspect_complement_nnf(payload.expr)
-        except SynthesisError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-
-    @app.post("/debug/complement-nnf")
-    def debug_complement_nnf_route(payload: SynthesizeRequest) -> Dict[str, Any]:
-        try:
-            return inspect_complement_nnf(payload.expr)
-        except SynthesisError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-
+    app.include_router(
+        build_router(
+            results=ResultCache.from_env(),
+            pool=SynthesisPool.from_env(),
+            metrics=MetricsRegistry.from_env(),
+            sessions=SessionStore.from_env(),
+        )
+    )
     return app
 
 
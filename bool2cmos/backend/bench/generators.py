@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import random
+from typing import Callable, Dict, List
+
+# Seeded expression families for the scaling benchmarks.
+#
+# Every generator takes a size parameter `n` and a seed and returns expression
+# text that both parsers accept (`!`, `&`, `|`, parentheses), so the same input
+# can be timed through api/synthesize.py and the legacy modules.  The legacy
+# tokenizer only knows single letters, so `many_vars` past 26 inputs is
+# api-only.  The same (family, n, seed) always gives the same text.
+
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def variable_names(count: int) -> List[str]:
+    """A..Z, then V26, V27, ... (identifiers only the api parser accepts)."""
+    return [LETTERS[i] if i < len(LETTERS) else f"V{i}" for i in range(count)]
+
+
+def _rng(family: str, n: int, seed: int) -> random.Random:
+    return random.Random(f"{family}:{n}:{seed}")
+
+
+def _literal(rng: random.Random, names: List[str], negate: float = 0.5) -> str:
+    name = rng.choice(names)
+    return "!" + name if rng.random() < negate else name
+
+
+def _random_tree(leaves: List[str], rng: random.Random, negate: float = 0.0) -> str:
+    # Joins random neighbours until one term is left: a random binary tree of
+    # depth O(log n) on average, built without recursion.
+    terms = list(leaves)
+    while len(terms) > 1:
+        i = rng.randrange(len(terms) - 1)
+        op = rng.choice("&|")
+        joined = f"({terms[i]} {op} {terms[i + 1]})"
+        if rng.random() < negate:
+            joined = "!" + joined
+        terms[i : i + 2] = [joined]
+    return terms[0]
+
+
+def wide_sop(n: int, seed: int = 0, width: int = 3, inputs: int = 8) -> str:
+    """Sum of `n` products of `width` literals over `inputs` variables."""
+    rng = _rng("wide_sop", n, seed)
+    names = variable_names(inputs)
+    terms = (" & ".join(_literal(rng, names) for _ in range(width)) for _ in range(n))
+    return " | ".join(terms)
+
+
+def deep_nesting(n: int, seed: int = 0, inputs: int = 8) -> str:
+    """`n` levels of parentheses, alternating AND and OR, each adding one literal."""
+    rng = _rng("deep_nesting", n, seed)
+    names = variable_names(inputs)
+    text = _literal(rng, names)
+    for level in range(n):
+        op = "&" if level % 2 else "|"
+        text = f"({text}) {op} {_literal(rng, names)}"
+    return text
+
+
+def xor_chain(n: int, seed: int = 0, inputs: int = 8) -> str:
+    """
+    `n` XOR-like links: t' = (x & !(t) | !x & y).  The running term appears once
+    per link, negated, so the text stays linear while NNF has to push a
+    negation through every level.
+    """
+    rng = _rng("xor_chain", n, seed)
+    names = variable_names(inputs)
+    text = _literal(rng, names, negate=0.0)
+    for _ in range(n):
+        x, y = rng.sample(names, 2)
+        text = f"({x} & !({text}) | !{x} & {y})"
+    return text
+
+
+def many_vars(n: int, seed: int = 0) -> str:
+    """Random AND/OR tree over `n` distinct variables, each used once."""
+    rng = _rng("many_vars", n, seed)
+    names = variable_names(n)
+    rng.shuffle(names)
+    return _random_tree([_literal(rng, [name], negate=0.3) for name in names], rng)
+
+
+def heavy_negation(n: int, seed: int = 0, inputs: int = 8) -> str:
+    """Random AND/OR tree with `n` leaves where most subterms are negated, some twice."""
+    rng = _rng("heavy_negation", n, seed)
+    names = variable_names(inputs)
+    leaves = [("!!" if rng.random() < 0.2 else "") + _literal(rng, names) for _ in range(n)]
+    return _random_tree(leaves, rng, negate=0.7)
+
+
+FAMILIES: Dict[str, Callable[..., str]] = {
+    "wide_sop": wide_sop,
+    "deep_nesting": deep_nesting,
+    "xor_chain": xor_chain,
+    "many_vars": many_vars,
+    "heavy_negation": heavy_negation,
+}
+
+
+__all__ = [
+    "FAMILIES",
+    "deep_nesting",
+    "heavy_negation",
+    "many_vars",
+    "variable_names",
+    "wide_sop",
+    "xor_chain",
+]
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import math
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..api.synthesize import (
+    Const,
+    Expr,
+    MemoTable,
+    Not,
+    TransformCache,
+    Var,
+    _collect_vars,
+    _eval_iterative,
+    _eval_recursive,
+    _nnf_expand,
+    _nnf_negated,
+    _simplify,
+    nnf,
+    parse_expr,
+)
+from .generators import FAMILIES
+
+# Recursive vs explicit-stack traversals on shallow inputs:
+# `python -m bool2cmos.backend.bench.recursion`.
+#
+# The traversals of api/synthesize.py run on explicit stacks so that deep
+# inputs cannot hit the recursion limit.  This measures what that costs on
+# the inputs that never come near it: the bench families at small sizes.
+#
+# - `eval`: _eval_recursive() vs _eval_iterative(), on a seeded assignment.
+#   _eval() takes the recursive path up to _EVAL_RECURSION_HEIGHT.
+# - `nnf`: nnf_recursive() below vs nnf(), each call with a fresh
+#   TransformCache.  Both expand nodes with the same helpers, so only the
+#   traversal differs.
+#
+# Samples of the two are interleaved, with gc collected before each one, and
+# gc stays enabled while timing: nodes are interned in a weak table, and with
+# gc off whatever a run leaves in a reference cycle keeps its nodes interned
+# for the next run, which then allocates less.  Each point is the median time
+# per call; `ratio` is iterative over recursive, summarized per traversal by
+# the geometric mean over the points.
+
+FORMAT_VERSION = 1
+DEFAULT_SIZES = (4, 8, 16, 32)
+DEFAULT_REPEAT = 15
+TRAVERSALS = ("eval", "nnf")
+_SAMPLE_SECONDS = 0.002  # calls per sample are chosen to take about this long
+
+
+def nnf_recursive(expr: Expr, cache: Optional[TransformCache] = None) -> Expr:
+    """nnf() as one recursive call per node."""
+    cache = cache if cache is not None else TransformCache(None)
+    return _nnf_node(_simplify(expr, cache.simplify), cache.simplify, cache.nnf)
+
+
+def _nnf_node(e: Expr, smemo: MemoTable, memo: MemoTable) -> Expr:
+    # A module-level function rather than a closure: closures calling each
+    # other form a reference cycle that keeps the cache alive until gc runs.
+    if isinstance(e, (Var, Const)):
+        return e
+    out = memo.get(e)
+    if out is not None:
+        return out
+    operands, op = _nnf_expand(e, smemo)
+    if op is Not:
+        out = _nnf_negated(operands[0])
+    elif op is None:
+        out = _nnf_node(operands[0], smemo, memo)
+    else:
+        out = _simplify(op(tuple([_nnf_node(c, smemo, memo) for c in operands])), smemo)
+    memo.put(e, out)
+    return out
+
+
+def _runners(traversal: str, expr: Expr, seed: int) -> Tuple[Callable[[], Any], Callable[[], Any]]:
+    if traversal == "eval":
+        rng = random.Random(seed)
+        env = {name: rng.random() < 0.5 for name in sorted(set(_collect_vars(expr)))}
+        return (lambda: _eval_recursive(expr, env)), (lambda: _eval_iterative(expr, env))
+    return (lambda: nnf_recursive(expr)), (lambda: nnf(expr))
+
+
+def _calls_per_sample(run: Callable[[], Any]) -> int:
+    start = time.perf_counter()
+    run()
+    once = time.perf_counter() - start
+    return max(1, int(_SAMPLE_SECONDS / max(once, 1e-7)))
+
+
+def _sample(run: Callable[[], Any], number: int) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(number):
+        run()
+    return (time.perf_counter() - start) / number
+
+
+def measure(recursive: Callable[[], Any], iterative: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Median microseconds per call of each, from `repeat` interleaved samples."""
+    if recursive() != iterative():
+        raise AssertionError("recursive and iterative results differ")
+    number = _calls_per_sample(recursive)
+    times: Dict[str, List[float]] = {"recursive": [], "iterative": []}
+    for i in range(repeat):
+        # Alternate which goes first, so drift hits both alike.
+        order = (("recursive", recursive), ("iterative", iterative))
+        for name, run in order if i % 2 == 0 else order[::-1]:
+            times[name].append(_sample(run, number))
+    point = {name: round(statistics.median(ts) * 1e6, 3) for name, ts in times.items()}
+    point["ratio"] = round(point["iterative"] / point["recursive"], 3)
+    point["calls"] = number
+    return point
+
+
+def run_benchmark(
+    families: Sequence[str] = tuple(FAMILIES),
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    traversals: Sequence[str] = TRAVERSALS,
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = 0,
+    progress: Optional[Any] = None,
+) -> Dict[str, Any]:
+    points = []
+    for family in families:
+        for n in sizes:
+            expr = parse_expr(FAMILIES[family](n, seed=seed))
+            for traversal in traversals:
+                point = {"traversal": traversal, "family": family, "n": n, "height": expr.height}
+                point.update(measure(*_runners(traversal, expr, seed), repeat))
+                points.append(point)
+                if progress is not None:
+                    progress.write(
+                        f"{traversal:<5} {family:<15} n={n:<4} recursive {point['recursive']:10.2f} us   "
+                        f"iterative {point['iterative']:10.2f} us   x{point['ratio']:.2f}\n"
+                    )
+    summary = {}
+    for traversal in traversals:
+        ratios = [p["ratio"] for p in points if p["traversal"] == traversal]
+        if ratios:
+            summary[traversal] = round(math.exp(statistics.fmean(math.log(r) for r in ratios)), 3)
+    return {
+        "version": FORMAT_VERSION,
+        "python": sys.version.split()[0],
+        "seed": seed,
+        "repeat": repeat,
+        "points": points,
+        "geomeanRatio": summary,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bool2cmos.backend.bench.recursion",
+        description="Compare recursive and explicit-stack traversals on shallow inputs.",
+    )
+    parser.add_argument("-o", "--output", default="-", help="JSON report (default: stdout)")
+    parser.add_argument("--families", nargs="+", choices=sorted(FAMILIES), help="expression families (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, help=f"family sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--traversals", nargs="+", choices=TRAVERSALS, help="default: all")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="samples per point (median)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-q", "--quiet", action="store_true", help="no table on stderr")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or DEFAULT_SIZES
+    if args.repeat < 1 or any(n < 1 for n in sizes):
+        parser.error("--repeat and --sizes must be positive")
+    report = run_benchmark(
+        args.families or tuple(FAMILIES),
+        sizes,
+        args.traversals or TRAVERSALS,
+        args.repeat,
+        args.seed,
+        None if args.quiet else sys.stderr,
+    )
+    text = json.dumps(report, indent=2) + "\n"
+    if args.output == "-":
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 0
+
+
+__all__ = ["main", "measure", "nnf_recursive", "run_benchmark"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ..api.encoding import iter_json
+from ..api.synthesize import Network, NetworkNode, Transistor, export_network_json, inspect_complement_nnf, synthesize
+
+# Response encoding benchmark: `python -m bool2cmos.backend.bench.responses`.
+#
+# Compares two ways of turning a result dict into the response body:
+#
+# - `dict`: what the routes did before, returning the dict and letting FastAPI
+#   encode it: jsonable_encoder() builds a copy of the whole result, and
+#   JSONResponse encodes that copy with json.dumps into one string and then
+#   into bytes.  Without FastAPI installed only the json.dumps part is run, and
+#   the report says so.
+# - `stream`: iter_json(), the bytes written chunk by chunk in one pass, each
+#   chunk dropped once "sent".
+#
+# Results are synthesize() responses whose pdn and pun are replaced by seeded
+# random series/parallel networks of the given transistor count, plus one
+# /debug/nnf response with a full truth table.  Each point reports the median
+# latency, the time to the first chunk, and the peak memory traced while
+# encoding (tracemalloc, on a separate run).
+
+FORMAT_VERSION = 1
+DEFAULT_SIZES = (1000, 10000, 50000)
+DEFAULT_REPEAT = 5
+
+
+def random_network(transistors: int, seed: int = 0) -> Network:
+    """A seeded series/parallel network with `transistors` leaves."""
+    rng = random.Random(seed)
+    # Split leaf counts top-down in breadth-first order, so that children come
+    # after their parent, then build the nodes bottom-up.
+    plan = [(transistors, 0)]
+    children: List[Optional[range]] = []
+    for n, depth in plan:
+        if n == 1:
+            children.append(None)
+            continue
+        cuts = sorted(rng.sample(range(1, n), rng.randint(2, min(4, n)) - 1))
+        first = len(plan)
+        plan.extend((hi - lo, depth + 1) for lo, hi in zip([0] + cuts, cuts + [n]))
+        children.append(range(first, len(plan)))
+    built: List[Network] = [None] * len(plan)  # type: ignore[list-item]
+    for i in reversed(range(len(plan))):
+        if children[i] is None:
+            built[i] = Transistor(
+                kind="nmos", gate=f"V{rng.randrange(64)}", gate_inverted=rng.random() < 0.3, on_when=rng.randrange(2)
+            )
+        else:
+            kind = "parallel" if plan[i][1] % 2 == 0 else "series"
+            built[i] = NetworkNode(kind=kind, children=tuple(built[j] for j in children[i]))
+    return built[0]
+
+
+def encode_dict(result: Dict[str, Any]) -> Callable[[], Any]:
+    try:
+        from fastapi.encoders import jsonable_encoder
+    except Exception:
+        jsonable_encoder = None
+
+    def run() -> Any:
+        content = jsonable_encoder(result) if jsonable_encoder is not None else result
+        # JSONResponse.render()
+        body = json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+        yield body.encode("utf-8")
+
+    run.jsonable_encoder = jsonable_encoder is not None  # type: ignore[attr-defined]
+    return run
+
+
+def encode_stream(result: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: iter_json(result)
+
+
+def measure(body: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    times = []
+    firsts = []
+    size = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        first = None
+        size = 0
+        for chunk in body():
+            if first is None:
+                first = time.perf_counter()
+            size += len(chunk)
+        end = time.perf_counter()
+        times.append((end - start) * 1000)
+        firsts.append((first - start) * 1000)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        for chunk in body():
+            del chunk
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return {
+        "ms": round(statistics.median(times), 3),
+        "firstChunkMs": round(statistics.median(firsts), 3),
+        "peakKiB": round(peak / 1024, 1),
+        "bytes": size,
+    }
+
+
+def run_benchmark(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = 0,
+    progress: Optional[Any] = None,
+) -> Dict[str, Any]:
+    cases = []
+    base = synthesize("A&B")
+    for n in sizes:
+        result = {**base, "steps": {**base["steps"]}}
+        for step, offset in (("pdn", 0), ("pun", 1)):
+            result["steps"][step] = {"network": export_network_json(random_network(n, seed + offset))}
+        cases.append((f"synthesize/{n}", n, result))
+    cases.append(("debug/nnf", None, inspect_complement_nnf("A&B|C&D|E&!F|G&H")))
+
+    points = []
+    jsonable = False
+    for name, n, result in cases:
+        dict_body = encode_dict(result)
+        jsonable = dict_body.jsonable_encoder
+        point = {
+            "case": name,
+            "transistors": n,
+            "dict": measure(dict_body, repeat),
+            "stream": measure(encode_stream(result), repeat),
+        }
+        points.append(point)
+        if progress is not None:
+            d, s = point["dict"], point["stream"]
+            progress.write(
+                f"{name:<18} dict {d['ms']:9.2f} ms {d['peakKiB']:10.1f} KiB   "
+                f"stream {s['ms']:9.2f} ms (first chunk {s['firstChunkMs']:.2f} ms) {s['peakKiB']:10.1f} KiB\n"
+            )
+    return {
+        "version": FORMAT_VERSION,
+        "python": sys.version.split()[0],
+        "jsonableEncoder": jsonable,
+        "repeat": repeat,
+        "points": points,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bool2cmos.backend.bench.responses",
+        description="Compare peak memory and latency of the dict and streaming JSON response paths.",
+    )
+    parser.add_argument("-o", "--output", default="-", help="JSON report (default: stdout)")
+    parser.add_argument("--sizes", nargs="+", type=int, help=f"transistors per network (default: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per point (median)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-q", "--quiet", action="store_true", help="no table on stderr")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or DEFAULT_SIZES
+    if args.repeat < 1 or any(n < 1 for n in sizes):
+        parser.error("--repeat and --sizes must be positive")
+    report = run_benchmark(sizes, args.repeat, args.seed, None if args.quiet else sys.stderr)
+    text = json.dumps(report, indent=2) + "\n"
+    if args.output == "-":
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 0
+
+
+__all__ = ["main", "random_network", "run_benchmark"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import argparse
+import datetime
+import gc
+import json
+import math
+import platform
+import statistics
+import sys
+from typing import IO, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..api.synthesize import CancelToken, TransformCache, _StageClock, synthesize, tokenize
+from .generators import FAMILIES
+
+# Scaling benchmarks: `python -m bool2cmos.backend.bench -o bench.json`.
+#
+# Every family is generated at growing sizes and run through two targets:
+# `api` (api/synthesize.py, stage times from its own `timings`) and `legacy`
+# (parser -> logic -> synthesis, timed here stage by stage).  Each point is the
+# median of `repeat` runs with a fresh transform cache.  A family stops growing
+# on a target once a run takes longer than `budget` seconds or fails (the
+# legacy modules only take single-letter variables and recurse once per
+# nesting level); the failure is recorded with the point.
+#
+# For each target, family and stage a power law `ms = c * size**k` is fitted by
+# least squares on log-log scale, with size the number of tokens.  A stage
+# whose exponent passes `superlinear` is flagged, and `--baseline` compares a
+# run with an earlier report: a slowdown past `max_slowdown` on any point, or an
+# exponent that grew by more than `max_exponent_increase`, is a regression and
+# makes the command exit with status 1.
+
+FORMAT_VERSION = 1
+DEFAULT_SIZES = (4, 8, 16, 32, 64, 128)
+QUICK_SIZES = (4, 8, 16)
+TARGETS = ("api", "legacy")
+DEFAULT_REPEAT = 3
+DEFAULT_BUDGET = 2.0
+DEFAULT_TIMEOUT = 10.0
+SUPERLINEAR = 1.25
+MAX_SLOWDOWN = 1.5
+MAX_EXPONENT_INCREASE = 0.2
+_NOISE_FLOOR_MS = 1.0  # points faster than this are too noisy to compare
+_MIN_FIT_POINTS = 3
+
+Timing = Tuple[Dict[str, float], float]  # stage ms, total ms
+
+
+def run_suite(
+    families: Sequence[str] = tuple(FAMILIES),
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    targets: Sequence[str] = TARGETS,
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = 0,
+    budget: float = DEFAULT_BUDGET,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    superlinear: float = SUPERLINEAR,
+    progress: Optional[IO[str]] = None,
+) -> Dict[str, Any]:
+    """Runs the benchmarks and returns the report (see module comment)."""
+    unknown = [f for f in families if f not in FAMILIES] + [t for t in targets if t not in TARGETS]
+    if unknown:
+        raise ValueError(f"Unknown families or targets: {', '.join(unknown)}")
+    synthesize("A&B")  # loads the NPN library outside the timed runs
+
+    measures: Dict[str, Callable[[str], Timing]] = {
+        "api": lambda text: _measure_api(text, timeout),
+        "legacy": _measure_legacy,
+    }
+    points: List[Dict[str, Any]] = []
+    for target in targets:
+        for family in families:
+            for n in sorted(sizes):
+                text = FAMILIES[family](n, seed)
+                point: Dict[str, Any] = {
+                    "target": target,
+                    "family": family,
+                    "n": n,
+                    "size": len(tokenize(text).tokens) - 1,
+                    "chars": len(text),
+                }
+                try:
+                    runs = [measures[target](text) for _ in range(repeat)]
+                except Exception as e:  # including RecursionError
+                    point["error"] = f"{type(e).__name__}: {e}"[:200]
+                else:
+                    point["stagesMs"] = {
+                        stage: round(statistics.median(r[0].get(stage, 0.0) for r in runs), 3) for stage in runs[0][0]
+                    }
+                    point["totalMs"] = round(statistics.median(r[1] for r in runs), 3)
+                points.append(point)
+                if progress is not None:
+                    outcome = point.get("error") or f"{point['totalMs']:.2f} ms"
+                    progress.write(f"{target:<7} {family:<15} n={n:<5} size={point['size']:<6} {outcome}\n")
+                if "error" in point or point["totalMs"] > budget * 1000:
+                    break
+
+    return {
+        "version": FORMAT_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "sizes": sorted(sizes),
+        "points": points,
+        "fits": fit_curves(points, superlinear),
+    }
+
+
+def _measure_api(text: str, timeout: Optional[float]) -> Timing:
+    gc.collect()
+    cancel = CancelToken(timeout) if timeout is not None else None
+    timings = synthesize(text, cache=TransformCache(), cancel=cancel, timings=True)["timings"]
+    return timings["stages"], timings["totalMs"]
+
+
+def _measure_legacy(text: str) -> Timing:
+    from ..logic.complement import get_complement
+    from ..logic.factor import factor
+    from ..logic.nnf import to_nnf
+    from ..logic.simplify import simplify
+    from ..parser import parse
+    from ..synthesis.pdn_builder import build_pdn
+    from ..synthesis.pun_builder import build_pun
+
+    gc.collect()
+    clock = _StageClock()
+    parsed = parse(text)
+    clock.lap("parse")
+    simplified = simplify(parsed)
+    clock.lap("simplify")
+    to_nnf(simplified)
+    clock.lap("nnf")
+    comp = get_complement(simplified)
+    clock.lap("complement")
+    factored = factor(comp)
+    clock.lap("factor")
+    pdn = build_pdn(factored)
+    clock.lap("pdn")
+    build_pun(pdn)
+    clock.lap("pun")
+    report = clock.report()
+    return report["stages"], report["totalMs"]
+
+
+def fit_power(xs: Sequence[float], ys: Sequence[float]) -> Optional[Dict[str, float]]:
+    """Least-squares fit of y = c * x**k on log-log scale: {"exponent", "coefficient", "r2"}."""
+    pairs = [(math.log(x), math.log(y)) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len(pairs) < 2 or len({lx for lx, _ in pairs}) < 2:
+        return None
+    mean_x = sum(lx for lx, _ in pairs) / len(pairs)
+    mean_y = sum(ly for _, ly in pairs) / len(pairs)
+    sxx = sum((lx - mean_x) ** 2 for lx, _ in pairs)
+    sxy = sum((lx - mean_x) * (ly - mean_y) for lx, ly in pairs)
+    syy = sum((ly - mean_y) ** 2 for _, ly in pairs)
+    k = sxy / sxx
+    r2 = 1.0 if syy == 0 else (sxy * sxy) / (sxx * syy)
+    return {"exponent": round(k, 3), "coefficient": math.exp(mean_y - k * mean_x), "r2": round(r2, 3)}
+
+
+def fit_curves(points: Sequence[Dict[str, Any]], superlinear: float = SUPERLINEAR) -> List[Dict[str, Any]]:
+    """One fit per target, family and stage (plus "total") with enough successful points."""
+    series: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for point in points:
+        if "error" not in point:
+            series.setdefault((point["target"], point["family"]), []).append(point)
+    fits = []
+    for (target, family), runs in series.items():
+        stages = list(runs[0]["stagesMs"]) + ["total"]
+        for stage in stages:
+            xs = [p["size"] for p in runs]
+            ys = [p["totalMs"] if stage == "total" else p["stagesMs"].get(stage, 0.0) for p in runs]
+            fit = fit_power(xs, ys)
+            if fit is None or len(runs) < _MIN_FIT_POINTS:
+                continue
+            fits.append(
+                {
+                    "target": target,
+                    "family": family,
+                    "stage": stage,
+                    "points": len(runs),
+                    **fit,
+                    "superlinear": fit["exponent"] > superlinear,
+                }
+            )
+    return fits
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    max_slowdown: float = MAX_SLOWDOWN,
+    max_exponent_increase: float = MAX_EXPONENT_INCREASE,
+) -> List[str]:
+    """Regressions of `current` against `baseline`, one message each."""
+    regressions = []
+    before = {(p["target"], p["family"], p["n"]): p for p in baseline.get("points", [])}
+    for point in current["points"]:
+        key = (point["target"], point["family"], point["n"])
+        old = before.get(key)
+        if old is None:
+            continue
+        label = "{} {} n={}".format(*key)
+        if "error" in point and "error" not in old:
+            regressions.append(f"{label}: now fails ({point['error']})")
+        elif "error" not in point and "error" not in old and old["totalMs"] >= _NOISE_FLOOR_MS:
+            ratio = point["totalMs"] / old["totalMs"]
+            if ratio > max_slowdown:
+                regressions.append(f"{label}: {old['totalMs']:.2f} ms -> {point['totalMs']:.2f} ms ({ratio:.2f}x)")
+    fitted = {(f["target"], f["family"], f["stage"]): f for f in baseline.get("fits", [])}
+    for fit in current["fits"]:
+        old = fitted.get((fit["target"], fit["family"], fit["stage"]))
+        if old is not None and fit["exponent"] - old["exponent"] > max_exponent_increase:
+            regressions.append(
+                f"{fit['target']} {fit['family']} {fit['stage']}: "
+                f"scaling exponent {old['exponent']:.2f} -> {fit['exponent']:.2f}"
+            )
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bool2cmos.backend.bench",
+        description="Time the synthesis pipeline on seeded expression families of growing size.",
+    )
+    parser.add_argument("-o", "--output", default="-", help="JSON report (default: stdout)")
+    parser.add_argument("--families", nargs="+", choices=sorted(FAMILIES), default=list(FAMILIES))
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--sizes", nargs="+", type=int, help=f"family sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--quick", action="store_true", help=f"sizes {QUICK_SIZES}, one run each")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per point (median)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="seconds before a family stops growing")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="api deadline per run (0 = none)")
+    parser.add_argument("--superlinear", type=float, default=SUPERLINEAR, help="exponent flagged as superlinear")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--max-slowdown", type=float, default=MAX_SLOWDOWN)
+    parser.add_argument("--max-exponent-increase", type=float, default=MAX_EXPONENT_INCREASE)
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress or summary on stderr")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    repeat = 1 if args.quick and args.repeat == DEFAULT_REPEAT else args.repeat
+    if repeat < 1 or any(n < 1 for n in sizes):
+        parser.error("--repeat and --sizes must be positive")
+    progress = None if args.quiet else sys.stderr
+    report = run_suite(
+        families=args.families,
+        sizes=sizes,
+        targets=args.targets,
+        repeat=repeat,
+        seed=args.seed,
+        budget=args.budget,
+        timeout=args.timeout if args.timeout > 0 else None,
+        superlinear=args.superlinear,
+        progress=progress,
+    )
+    regressions: List[str] = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.max_slowdown, args.max_exponent_increase)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2) + "\n"
+    if args.output == "-":
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    if progress is not None:
+        for fit in report["fits"]:
+            if fit["stage"] == "total" or fit["superlinear"]:
+                flag = "  superlinear" if fit["superlinear"] else ""
+                progress.write(
+                    f"{fit['target']:<7} {fit['family']:<15} {fit['stage']:<10} "
+                    f"k={fit['exponent']:.2f} r2={fit['r2']:.2f}{flag}\n"
+                )
+        for message in regressions:
+            progress.write(f"regression: {message}\n")
+    return 1 if regressions else 0
+
+
+__all__ = ["compare", "fit_curves", "fit_power", "main", "run_suite"]
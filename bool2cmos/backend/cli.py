@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import contextlib
+import itertools
+import json
+import os
+import sys
+import time
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .api.synthesize import (
+    SYNTHESIS_MODES,
+    SynthesisError,
+    TransformCache,
+    read_batch,
+    read_batch_lines,
+    select_steps,
+    synthesize_batch,
+)
+
+# Command-line entry point: `python -m bool2cmos batch <input> -o <output>`.
+#
+# synthesize() is pure Python and CPU-bound, so the batch command spreads the
+# work over a process pool.  Expressions are sent in chunks and each worker
+# returns its chunk already serialized as NDJSON lines, so the parent only
+# pays for pickling a list of strings per chunk.  At most a few chunks per
+# worker are in flight, which keeps memory flat however large the input is.
+
+DEFAULT_CHUNK_SIZE = 256
+_IN_FLIGHT_PER_WORKER = 4
+_PROGRESS_INTERVAL = 1.0
+
+Chunk = List[Tuple[int, Any]]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bool2cmos", description="CMOS network synthesis.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    batch = commands.add_parser(
+        "batch",
+        help="synthesize many expressions",
+        description="Synthesize expressions read from a file (or - for stdin) and write one NDJSON record per "
+        "expression. Input is NDJSON or one bare expression per line; a .json file holds a JSON array.",
+    )
+    batch.add_argument("input")
+    batch.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    batch.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    batch.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="expressions per task")
+    batch.add_argument("--mode", choices=SYNTHESIS_MODES, default="default")
+    batch.add_argument("--fields", help="comma-separated steps to include in each result (default: all)")
+    batch.add_argument(
+        "--unordered",
+        action="store_true",
+        help="write records as chunks finish instead of in input order",
+    )
+    batch.add_argument("-q", "--quiet", action="store_true", help="no progress or summary on stderr")
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1 or args.chunk_size < 1:
+        parser.error("--jobs and --chunk-size must be positive")
+    try:
+        fields = select_steps(args.fields)
+    except SynthesisError as e:
+        parser.error(str(e))
+    with contextlib.ExitStack() as stack:
+        source = sys.stdin if args.input == "-" else stack.enter_context(open(args.input, encoding="utf-8"))
+        sink = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "w", encoding="utf-8"))
+        if args.input.endswith(".json"):
+            expressions: Iterable[Any] = read_batch(source.read().encode("utf-8"))
+        else:
+            expressions = read_batch_lines(source)
+        stats = run_batch(
+            expressions,
+            sink,
+            jobs=args.jobs,
+            chunk_size=args.chunk_size,
+            mode=args.mode,
+            fields=fields,
+            ordered=not args.unordered,
+            progress=None if args.quiet else sys.stderr,
+        )
+    if not args.quiet:
+        print(
+            f"{stats['expressions']} expressions ({stats['errors']} errors) in {stats['seconds']:.2f}s, "
+            f"{stats['perSecond']:.0f}/s with {args.jobs} worker(s)",
+            file=sys.stderr,
+        )
+    return 0
+
+
+def run_batch(
+    expressions: Iterable[Any],
+    sink: IO[str],
+    jobs: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    mode: str = "default",
+    fields: Optional[Sequence[str]] = None,
+    ordered: bool = True,
+    progress: Optional[IO[str]] = None,
+) -> Dict[str, Any]:
+    """Writes one NDJSON record per expression to `sink`; returns counts and throughput."""
+    start = time.perf_counter()
+    chunks = _chunks(expressions, chunk_size)
+    done = errors = 0
+    last_report = start
+    if jobs == 1:
+        results: Iterator[Tuple[List[str], int]] = (_run_chunk(chunk, mode, fields) for chunk in chunks)
+        for lines, failed in results:
+            sink.writelines(lines)
+            done += len(lines)
+            errors += failed
+            last_report = _report(progress, done, start, last_report)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            for lines, failed in _dispatch(pool, chunks, mode, fields, jobs * _IN_FLIGHT_PER_WORKER, ordered):
+                sink.writelines(lines)
+                done += len(lines)
+                errors += failed
+                last_report = _report(progress, done, start, last_report)
+    sink.flush()
+    seconds = time.perf_counter() - start
+    if progress is not None and last_report != start:
+        progress.write("\n")
+    return {
+        "expressions": done,
+        "errors": errors,
+        "seconds": seconds,
+        "perSecond": done / seconds if seconds > 0 else 0.0,
+    }
+
+
+def _dispatch(
+    pool: concurrent.futures.Executor,
+    chunks: Iterator[Chunk],
+    mode: str,
+    fields: Optional[Sequence[str]],
+    limit: int,
+    ordered: bool,
+) -> Iterator[Tuple[List[str], int]]:
+    pending: Dict[concurrent.futures.Future, int] = {}
+    finished: Dict[int, Tuple[List[str], int]] = {}
+    submitted = emitted = 0
+    while True:
+        for chunk in itertools.islice(chunks, max(limit - len(pending) - len(finished), 0)):
+            pending[pool.submit(_run_chunk, chunk, mode, fields)] = submitted
+            submitted += 1
+        if not pending:
+            break
+        complete, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in complete:
+            seq = pending.pop(future)
+            if ordered:
+                finished[seq] = future.result()
+            else:
+                yield future.result()
+        while emitted in finished:
+            yield finished.pop(emitted)
+            emitted += 1
+
+
+def _chunks(expressions: Iterable[Any], size: int) -> Iterator[Chunk]:
+    numbered = enumerate(expressions)
+    while True:
+        chunk = list(itertools.islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+_worker_cache: Optional[TransformCache] = None
+
+
+def _run_chunk(chunk: Chunk, mode: str, fields: Optional[Sequence[str]] = None) -> Tuple[List[str], int]:
+    # Runs in a worker process.  The transform cache lives as long as the
+    # worker, so subterms repeated across chunks are only transformed once.
+    global _worker_cache
+    if _worker_cache is None:
+        _worker_cache = TransformCache()
+    lines = []
+    failed = 0
+    records = synthesize_batch((e for _, e in chunk), cache=_worker_cache, mode=mode, fields=fields)
+    for (index, _), record in zip(chunk, records):
+        record["index"] = index
+        failed += "error" in record
+        lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+    return lines, failed
+
+
+def _report(progress: Optional[IO[str]], done: int, start: float, last: float) -> float:
+    now = time.perf_counter()
+    if progress is None or now - last < _PROGRESS_INTERVAL:
+        return last
+    progress.write(f"\r{done} expressions, {done / (now - start):.0f}/s")
+    progress.flush()
+    return now
+
+
+if __name__ == "__main__":
+    sys.exit(main())
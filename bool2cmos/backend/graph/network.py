@@ -1,5 +1,7 @@
+import threading
+import weakref
 from enum import Enum
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 class NodeType(Enum):
     SERIES = "SERIES"
@@ -10,26 +12,69 @@ class MosType(Enum):
     NMOS = "NMOS"
     PMOS = "PMOS"
 
+# Nodes are slotted and `type` is a class attribute, so a node holds nothing
+# but its children (or its gate and MOS type).  Transistors are immutable
+# flyweights: Transistor(gate, mos_type) returns the one shared instance for
+# that pair, and leaves share the empty `children` tuple instead of each
+# allocating a list.
+
 class NetworkNode:
-    def __init__(self, node_type: NodeType):
-        self.type = node_type
-        self.children: List['NetworkNode'] = []
-        
+    __slots__ = ()
+
+    type: NodeType
+    children: Tuple['NetworkNode', ...] = ()
+
     def add_child(self, child: 'NetworkNode'):
         self.children.append(child)
-        
+
     def to_dict(self):
         return {
             "type": self.type.value,
             "children": [child.to_dict() for child in self.children]
         }
 
+_transistors: "weakref.WeakValueDictionary[Tuple[str, MosType], Transistor]" = weakref.WeakValueDictionary()
+_transistors_lock = threading.Lock()
+
 class Transistor(NetworkNode):
-    def __init__(self, gate: str, mos_type: MosType):
-        super().__init__(NodeType.TRANSISTOR)
-        self.gate = gate
-        self.mos_type = mos_type
-        
+    __slots__ = ("gate", "mos_type", "__weakref__")
+
+    type = NodeType.TRANSISTOR
+    gate: str
+    mos_type: MosType
+
+    def __new__(cls, gate: str, mos_type: MosType):
+        key = (gate, mos_type)
+        node = _transistors.get(key)
+        if node is not None:
+            return node
+        with _transistors_lock:
+            node = _transistors.get(key)
+            if node is None:
+                node = object.__new__(cls)
+                object.__setattr__(node, "gate", gate)
+                object.__setattr__(node, "mos_type", mos_type)
+                _transistors[key] = node
+        return node
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Transistor is immutable (instances are shared)")
+
+    def __delattr__(self, name):
+        raise AttributeError("Transistor is immutable (instances are shared)")
+
+    def __reduce__(self):
+        return (Transistor, (self.gate, self.mos_type))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def add_child(self, child: 'NetworkNode'):
+        raise TypeError("A transistor has no children")
+
     def to_dict(self):
         return {
             "type": self.type.value,
@@ -38,13 +83,17 @@ class Transistor(NetworkNode):
         }
 
 class Series(NetworkNode):
+    __slots__ = ("children",)
+
+    type = NodeType.SERIES
+
     def __init__(self, children: Optional[List[NetworkNode]] = None):
-        super().__init__(NodeType.SERIES)
-        if children:
-            self.children = children
+        self.children: List[NetworkNode] = children if children else []
 
 class Parallel(NetworkNode):
+    __slots__ = ("children",)
+
+    type = NodeType.PARALLEL
+
     def __init__(self, children: Optional[List[NetworkNode]] = None):
-        super().__init__(NodeType.PARALLEL)
-        if children:
-            self.children = children
+        self.children: List[NetworkNode] = children if children else []
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import heapq
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from bool2cmos.backend.api.synthesize import And, CancelToken, Expr, Or, literal_count
+
+# Algebraic (weak-division) factoring driven by kernels.
+#
+# A sum of products is read as a set of cubes over "atoms": the factors of each
+# term, which may themselves be compound sub-expressions.  A product of sums is
+# handled by the same code with the roles of And and Or swapped.  Cubes are int
+# bitmasks over atom indices, so dividing a cube by a cube is `c & ~d` and the
+# cubes divisible by d are found through a per-atom bitset of cube positions
+# instead of rescanning the cover.
+#
+# A kernel of F is a cube-free quotient F / c (no atom common to all its
+# cubes), c being its co-kernel; every multi-cube algebraic divisor of F
+# shares a kernel's cubes.  Each step divides F by the kernel with the best
+# literal gain, F = Q * K + R, and recurses on Q, K and R.
+#
+# Dividing F by K gives the quotient Q, with Q * K covering |K| * lits(Q) +
+# |Q| * lits(K) literals of F, so extracting K saves
+#     (|K| - 1) * lits(Q) + (|Q| - 1) * lits(K).
+# The co-kernels found during enumeration are a subset of Q, which gives a
+# cheap estimate; only the best few estimates are divided out exactly.
+
+MAX_CUBES = 512
+MAX_KERNELS = 256
+_EVALUATE = 8
+
+Cover = List[int]
+
+
+def kernel_factor(expr: Expr, cancel: Optional[CancelToken] = None) -> Optional[Expr]:
+    """
+    Factors an Or-of-products (or And-of-sums) through kernel extraction.
+    Returns None when `expr` has no such shape or is too large to search.
+    """
+    if isinstance(expr, Or):
+        product, total = And, Or
+    elif isinstance(expr, And):
+        product, total = Or, And
+    else:
+        return None
+    terms = expr.children
+    if len(terms) > MAX_CUBES:
+        return None
+    # Atoms are numbered in order of first appearance, which is deterministic
+    # because simplify() keeps children sorted.
+    atoms: Dict[Expr, int] = {}
+    cover = []
+    for t in terms:
+        cube = 0
+        for a in t.children if isinstance(t, product) else (t,):  # type: ignore[union-attr]
+            cube |= atoms.setdefault(a, 1 << len(atoms))
+        cover.append(cube)
+    return _Factoring(list(atoms), product, total, cancel).factor(_single_cube_containment(cover))
+
+
+def kernels(cover: Sequence[int], limit: int = MAX_KERNELS) -> List[Tuple[int, Tuple[int, ...]]]:
+    """(co-kernel, kernel) pairs of a cover; F itself comes with co-kernel 0 when cube-free."""
+    out: List[Tuple[int, Tuple[int, ...]]] = []
+
+    def walk(f: Sequence[int], start: int, cokernel: int) -> None:
+        index = _occurrences(f)
+        for bit in sorted(b for b in index if b >= start):
+            if len(out) >= limit:
+                return
+            rows = index[bit]
+            if rows & (rows - 1) == 0:
+                continue  # a single cube: no multi-cube quotient
+            members = [f[i] for i in _indices(rows)]
+            common = _common_cube(members)
+            if common & (bit - 1):
+                continue  # the same quotient was reached through a smaller atom
+            walk([c & ~common for c in members], bit << 1, cokernel | common)
+        if len(f) >= 2 and not _common_cube(f):
+            out.append((cokernel, tuple(sorted(f))))
+
+    base = _common_cube(cover)
+    walk([c & ~base for c in cover], 1, base)
+    return out
+
+
+def divide(
+    cover: Sequence[int], divisor: Sequence[int], index: Optional[Dict[int, int]] = None
+) -> Tuple[Cover, Cover]:
+    """Weak division: returns (Q, R) with cover == Q * divisor + R."""
+    if index is None:
+        index = _occurrences(cover)
+    everything = (1 << len(cover)) - 1
+    quotient: Optional[set] = None
+    for d in divisor:
+        rows = everything
+        for bit in _bits(d):
+            rows &= index.get(bit, 0)
+        part = {cover[i] & ~d for i in _indices(rows)}
+        quotient = part if quotient is None else quotient & part
+        if not quotient:
+            return [], list(cover)
+    assert quotient is not None
+    product = {q | d for q in quotient for d in divisor}
+    return sorted(quotient), [c for c in cover if c not in product]
+
+
+class _Factoring:
+    def __init__(
+        self,
+        atoms: Sequence[Expr],
+        product: Callable[..., Expr],
+        total: Callable[..., Expr],
+        cancel: Optional[CancelToken] = None,
+    ):
+        self.atoms = atoms
+        self.cancel = cancel
+        self.weights = [literal_count(a) for a in atoms]
+        self.unit = all(w == 1 for w in self.weights)
+        self.product = product
+        self.total = total
+
+    def factor(self, cover: Cover) -> Expr:
+        if len(cover) == 1:
+            return self.cube(cover[0])
+        common = _common_cube(cover)
+        if common:
+            return self.product(tuple(self.atom_list(common)) + (self.factor([c & ~common for c in cover]),))
+        if self.cancel is not None:
+            self.cancel.check()
+        best = self.best_division(cover)
+        if best is None:
+            return self.total(tuple(self.cube(c) for c in cover))
+        quotient, kernel, remainder = best
+        term = self.product((self.factor(quotient), self.factor(kernel)))
+        if not remainder:
+            return term
+        return self.total((term, self.factor(remainder)))
+
+    def best_division(self, cover: Cover) -> Optional[Tuple[Cover, Cover, Cover]]:
+        cokernels: Dict[Tuple[int, ...], List[int]] = {}
+        for cokernel, kernel in kernels(cover):
+            if cokernel:
+                cokernels.setdefault(kernel, []).append(cokernel)
+        # Max-heap on estimated gain; ties go to the kernel enumerated first,
+        # which keeps the output stable.
+        heap = [(-self.gain(cks, kernel), order, kernel) for order, (kernel, cks) in enumerate(cokernels.items())]
+        heapq.heapify(heap)
+        index = _occurrences(cover)
+        best: Optional[Tuple[int, Cover, Tuple[int, ...]]] = None
+        for _ in range(min(_EVALUATE, len(heap))):
+            _, _, kernel = heapq.heappop(heap)
+            quotient, _ = divide(cover, kernel, index)
+            if not quotient or 0 in quotient:
+                continue
+            gain = self.gain(quotient, kernel)
+            if gain > 0 and (best is None or gain > best[0]):
+                best = (gain, quotient, kernel)
+        if best is None:
+            return None
+        _, quotient, kernel = best
+        product = {q | d for q in quotient for d in kernel}
+        return quotient, list(kernel), [c for c in cover if c not in product]
+
+    def gain(self, quotient: Sequence[int], kernel: Sequence[int]) -> int:
+        return (len(kernel) - 1) * self.literals(quotient) + (len(quotient) - 1) * self.literals(kernel)
+
+    def literals(self, cover: Sequence[int]) -> int:
+        if self.unit:
+            return sum(bin(c).count("1") for c in cover)
+        weights = self.weights
+        return sum(weights[i] for c in cover for i in _indices(c))
+
+    def atom_list(self, cube: int) -> List[Expr]:
+        return [self.atoms[i] for i in _indices(cube)]
+
+    def cube(self, cube: int) -> Expr:
+        atoms = self.atom_list(cube)
+        return atoms[0] if len(atoms) == 1 else self.product(tuple(atoms))
+
+
+def _occurrences(cover: Sequence[int]) -> Dict[int, int]:
+    """Atom bit -> bitset of the positions of the cubes using it."""
+    index: Dict[int, int] = {}
+    for i, cube in enumerate(cover):
+        for bit in _bits(cube):
+            index[bit] = index.get(bit, 0) | 1 << i
+    return index
+
+
+def _common_cube(cover: Sequence[int]) -> int:
+    common = -1
+    for cube in cover:
+        common &= cube
+    return common if cover else 0
+
+
+def _single_cube_containment(cover: Sequence[int]) -> Cover:
+    # a + a&b == a: drop cubes that contain another cube's atoms.
+    out: Cover = []
+    for cube in sorted(set(cover), key=lambda c: (bin(c).count("1"), c)):
+        if not any(kept & cube == kept for kept in out):
+            out.append(cube)
+    return out
+
+
+def _bits(mask: int) -> List[int]:
+    out = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        out.append(bit)
+    return out
+
+
+def _indices(mask: int) -> List[int]:
+    out = []
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        out.append(low.bit_length() - 1)
+    return out
@@ -0,0 +1,579 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from bool2cmos.backend.api.synthesize import And, BudgetExhausted, CancelToken, Const, Expr, Not, Or, SynthesisError, Var
+from bool2cmos.backend.verify.truth_table import truth_tables, var_mask
+
+# Two-level (sum-of-products) minimization.
+#
+# A cube is a pair of ints (care, value): bit i of `care` says variable i
+# appears in the product, bit i of `value` gives its polarity (always 0 outside
+# `care`).  The universal cube is (0, 0).  A cover is a list of cubes.
+#
+# Small functions go through Quine-McCluskey prime generation plus an exact
+# branch-and-bound cover (Petrick's method without the product expansion).
+# Larger ones use an Espresso-style EXPAND / IRREDUNDANT / REDUCE loop on a
+# cover obtained by distributing the NNF.  Containment is decided by tautology
+# checks on cofactors, so the (often huge) off-set is never built.  Each search
+# is capped at _SPLIT_LIMIT splits and all of them share a budget of cube
+# visits, by default _WORK_PER_LITERAL per literal of the starting cover
+# (within _MIN_WORK and _WORK_LIMIT), so the heuristic's time grows with its
+# input; running out answers "not covered" / "cannot reduce", which only costs
+# quality, never correctness.
+
+Cube = Tuple[int, int]
+
+EXACT_MAX_VARS = 10
+MAX_CUBES = 1000
+_COVER_SEARCH_LIMIT = 20_000
+_SPLIT_LIMIT = 16
+_WORK_LIMIT = 250_000
+_MIN_WORK = 50_000
+_WORK_PER_LITERAL = 64
+
+
+class _Blowup(Exception):
+    pass
+
+
+class _Work:
+    """Cube visits left for the heuristic's containment searches."""
+
+    __slots__ = ("left",)
+
+    def __init__(self, left: int):
+        self.left = left
+
+
+@dataclass(frozen=True)
+class MinimizeResult:
+    expr: Expr
+    method: str  # "exact" | "heuristic" | "skipped"
+    cubes: int
+    literals: int
+
+
+def minimize(
+    expr: Expr,
+    max_exact_vars: int = EXACT_MAX_VARS,
+    max_cubes: int = MAX_CUBES,
+    cancel: Optional[CancelToken] = None,
+) -> MinimizeResult:
+    """Returns a minimized sum-of-products equivalent to the NNF expression `expr`."""
+    names = sorted(_collect_names(expr))
+    if len(names) <= max_exact_vars:
+        (onset,) = truth_tables([expr], names)
+        cover, complete = exact_cover(onset, len(names))
+        method = "exact" if complete else "heuristic"
+    else:
+        try:
+            cover = expr_to_cover(expr, names, max_cubes)
+            if cancel is not None:
+                cancel.check()
+            cover = espresso(cover, cancel=cancel)
+        except _Blowup:
+            return MinimizeResult(expr=expr, method="skipped", cubes=0, literals=0)
+        method = "heuristic"
+    return MinimizeResult(
+        expr=cover_to_expr(cover, names),
+        method=method,
+        cubes=len(cover),
+        literals=sum(_popcount(care) for care, _ in cover),
+    )
+
+
+# ---- Conversions ----
+
+
+def expr_to_cover(expr: Expr, names: Sequence[str], max_cubes: int = MAX_CUBES) -> List[Cube]:
+    """Distributes an NNF expression into a cover; raises _Blowup past `max_cubes`."""
+    index = {name: i for i, name in enumerate(names)}
+    memo: Dict[Expr, List[Cube]] = {}
+    stack = [(expr, False)]
+    while stack:
+        e, expanded = stack.pop()
+        if e in memo:
+            continue
+        if isinstance(e, Var):
+            bit = 1 << index[e.name]
+            memo[e] = [(bit, bit)]
+        elif isinstance(e, Not):
+            if not isinstance(e.child, Var):
+                raise SynthesisError("Two-level minimization expects an NNF expression.")
+            memo[e] = [(1 << index[e.child.name], 0)]
+        elif isinstance(e, Const):
+            memo[e] = [(0, 0)] if e.value else []
+        elif not expanded:
+            stack.append((e, True))
+            stack.extend((c, False) for c in e.children if c not in memo)  # type: ignore[union-attr]
+        elif isinstance(e, Or):
+            cover: List[Cube] = []
+            for c in e.children:
+                cover.extend(memo[c])
+            memo[e] = _single_cube_containment(_check_size(cover, max_cubes))
+        elif isinstance(e, And):
+            cover = [(0, 0)]
+            for c in e.children:
+                product = []
+                for care1, val1 in cover:
+                    for care2, val2 in memo[c]:
+                        if (care1 & care2) & (val1 ^ val2):
+                            continue  # x & !x
+                        product.append((care1 | care2, val1 | val2))
+                cover = _single_cube_containment(_check_size(product, max_cubes))
+            memo[e] = cover
+        else:
+            raise AssertionError(f"Unknown Expr: {type(e)}")
+    return memo[expr]
+
+
+def cover_to_expr(cover: Sequence[Cube], names: Sequence[str]) -> Expr:
+    terms: List[Expr] = []
+    for care, value in cover:
+        if not care:
+            return Const(True)
+        lits: List[Expr] = []
+        for i, name in enumerate(names):
+            bit = 1 << i
+            if care & bit:
+                lits.append(Var(name) if value & bit else Not(Var(name)))
+        terms.append(lits[0] if len(lits) == 1 else And(tuple(lits)))
+    if not terms:
+        return Const(False)
+    return terms[0] if len(terms) == 1 else Or(tuple(terms))
+
+
+# ---- Exact: Quine-McCluskey + branch-and-bound cover ----
+
+
+def prime_implicants(onset: int, num_vars: int) -> List[Cube]:
+    full = (1 << num_vars) - 1
+    current: Set[Cube] = set()
+    row = 0
+    bits = onset
+    while bits:
+        if bits & 1:
+            current.add((full, row))
+        bits >>= 1
+        row += 1
+    primes: List[Cube] = []
+    while current:
+        merged: Set[Cube] = set()
+        used: Set[Cube] = set()
+        for cube in current:
+            care, value = cube
+            zeros = care & ~value
+            while zeros:
+                bit = zeros & -zeros
+                zeros ^= bit
+                partner = (care, value | bit)
+                if partner in current:
+                    merged.add((care & ~bit, value))
+                    used.add(cube)
+                    used.add(partner)
+        primes.extend(c for c in current if c not in used)
+        current = merged
+    primes.sort(key=lambda c: (_popcount(c[0]), c))
+    return primes
+
+
+def exact_cover(onset: int, num_vars: int) -> Tuple[List[Cube], bool]:
+    """
+    Minimum cover (fewest cubes, then fewest literals) of the on-set.
+
+    Returns (cover, complete); `complete` is False when the search hit its
+    node limit and the best cover found so far is returned instead.
+    """
+    if not onset:
+        return [], True
+    if onset == (1 << (1 << num_vars)) - 1:
+        return [(0, 0)], True
+    masks = [var_mask(i, num_vars) for i in range(num_vars)]
+    full = (1 << (1 << num_vars)) - 1
+    primes = prime_implicants(onset, num_vars)
+    covers = []
+    for care, value in primes:
+        rows = full
+        for i in range(num_vars):
+            bit = 1 << i
+            if care & bit:
+                rows &= masks[i] if value & bit else full ^ masks[i]
+        covers.append(rows)
+    literals = [_popcount(care) for care, _ in primes]
+
+    # Essential primes: the only prime covering some minterm.
+    chosen: List[int] = []
+    uncovered = onset
+    options: Dict[int, List[int]] = {}
+    rows = onset
+    while rows:
+        low = rows & -rows
+        rows ^= low
+        options[low] = [p for p, rows_p in enumerate(covers) if rows_p & low]
+    for low, opts in options.items():
+        if len(opts) == 1 and opts[0] not in chosen:
+            chosen.append(opts[0])
+            uncovered &= ~covers[opts[0]]
+
+    best: List[Optional[List[int]]] = [None]
+    best_cost = [(len(primes) + 1, 0)]
+    budget = [_COVER_SEARCH_LIMIT]
+
+    def search(uncovered: int, picked: List[int], cost: Tuple[int, int]) -> None:
+        if budget[0] <= 0:
+            return
+        budget[0] -= 1
+        if not uncovered:
+            if cost < best_cost[0]:
+                best_cost[0] = cost
+                best[0] = list(picked)
+            return
+        if (cost[0] + 1, cost[1]) >= best_cost[0]:
+            return
+        # Branch on the uncovered minterm with the fewest candidate primes.
+        target = min(
+            (low for low in options if uncovered & low),
+            key=lambda low: len(options[low]),
+        )
+        for p in sorted(options[target], key=lambda p: -_popcount(covers[p] & uncovered)):
+            picked.append(p)
+            search(uncovered & ~covers[p], picked, (cost[0] + 1, cost[1] + literals[p]))
+            picked.pop()
+
+    search(uncovered, chosen, (len(chosen), sum(literals[p] for p in chosen)))
+    assert best[0] is not None
+    return [primes[p] for p in sorted(best[0])], budget[0] > 0
+
+
+# ---- Heuristic: Espresso-style loop ----
+
+
+def espresso(
+    cover: List[Cube], work_limit: Optional[int] = None, cancel: Optional[CancelToken] = None
+) -> List[Cube]:
+    cover = _single_cube_containment(cover)
+    if not cover or any(care == 0 for care, _ in cover):
+        return [(0, 0)] if cover else []
+    if work_limit is None:
+        literals = sum(_popcount(care) for care, _ in cover)
+        work_limit = min(_WORK_LIMIT, max(_MIN_WORK, _WORK_PER_LITERAL * literals))
+    work = _Work(work_limit)
+    cover = _irredundant(_expand(cover, work, cancel), work, cancel)
+    cost = _cost(cover)
+    while True:
+        try:
+            if cancel is not None:
+                cancel.check()
+            candidate = _irredundant(_expand(_reduce(cover, work, cancel), work, cancel), work, cancel)
+        except BudgetExhausted:
+            # Out of a synthesis budget (see api/synthesize.py): every cover
+            # since the first EXPAND is prime and irredundant, so stop here.
+            return cover
+        new_cost = _cost(candidate)
+        if new_cost >= cost:
+            return cover
+        cover, cost = candidate, new_cost
+
+
+def _expand(cover: List[Cube], work: _Work, cancel: Optional[CancelToken] = None) -> List[Cube]:
+    # Raise literals of each cube while it stays inside the function.  Since
+    # the cube itself is covered, dropping literal x is valid iff the half-cube
+    # with x flipped is covered, which only involves the cubes touching it.
+    # Literals shared by few other cubes go first: they are the likeliest to
+    # be redundant and raising them lets the cube swallow more neighbours.
+    counts: Dict[Cube, int] = {}
+    for care, value in cover:
+        for bit in _bits(care):
+            lit = (bit, value & bit)
+            counts[lit] = counts.get(lit, 0) + 1
+    index = _CoverIndex(cover)
+    out = _CoverIndex(())
+    for care, value in sorted(cover, key=lambda c: _popcount(c[0])):
+        if cancel is not None:
+            cancel.check()
+        if out.covers_cube((care, value)):
+            continue
+        for bit in sorted(_bits(care), key=lambda b: (counts[(b, value & b)], b)):
+            if work.left > 0 and _tautology(index.cofactor((care, value ^ bit)), work):
+                care &= ~bit
+                value &= ~bit
+        out.add((care, value))
+        index.add((care, value))
+    return _single_cube_containment(out.live())
+
+
+def _irredundant(cover: List[Cube], work: _Work, cancel: Optional[CancelToken] = None) -> List[Cube]:
+    keep = sorted(cover, key=lambda c: -_popcount(c[0]))  # smallest cubes go first
+    index = _CoverIndex(keep)
+    for i, cube in enumerate(keep):
+        if work.left <= 0:
+            break
+        if cancel is not None:
+            cancel.check()
+        if _tautology(index.cofactor(cube, skip=i), work):
+            index.remove(i)
+    return index.live()
+
+
+def _reduce(cover: List[Cube], work: _Work, cancel: Optional[CancelToken] = None) -> List[Cube]:
+    # Shrink each cube to the smallest cube still covering what no other cube does.
+    ordered = sorted(cover, key=lambda c: -_popcount(c[0]))
+    index = _CoverIndex(ordered)
+    for i, (care, value) in enumerate(ordered):
+        if work.left <= 0:
+            break
+        if cancel is not None:
+            cancel.check()
+        sc = _complement_supercube(index.cofactor((care, value), skip=i), work)
+        if sc != (0, 0):
+            index.remove(i)
+            if sc is not None:
+                index.add((care | sc[0], value | sc[1]))
+    return index.live()
+
+
+class _CoverIndex:
+    """
+    Append-only cover with, per literal, a bitset of the cubes using it, so a
+    cofactor only visits cubes that can intersect the cofactoring cube.
+    """
+
+    __slots__ = ("cubes", "alive", "_by_literal")
+
+    def __init__(self, cubes: Iterable[Cube]):
+        self.cubes: List[Cube] = []
+        self.alive = 0
+        self._by_literal: Dict[Cube, int] = {}
+        for cube in cubes:
+            self.add(cube)
+
+    def add(self, cube: Cube) -> int:
+        i = len(self.cubes)
+        self.cubes.append(cube)
+        self.alive |= 1 << i
+        care, value = cube
+        for bit in _bits(care):
+            lit = (bit, value & bit)
+            self._by_literal[lit] = self._by_literal.get(lit, 0) | 1 << i
+        return i
+
+    def remove(self, i: int) -> None:
+        self.alive &= ~(1 << i)
+
+    def live(self) -> List[Cube]:
+        return [self.cubes[i] for i in _indices(self.alive)]
+
+    def cofactor(self, cube: Cube, skip: int = -1) -> List[Cube]:
+        care, value = cube
+        rows = self.alive
+        if skip >= 0:
+            rows &= ~(1 << skip)
+        for bit in _bits(care):
+            rows &= ~self._by_literal.get((bit, ~value & bit), 0)
+        cubes = self.cubes
+        keep = ~care
+        return [(c & keep, v & keep) for c, v in (cubes[i] for i in _indices(rows))]
+
+    def covers_cube(self, cube: Cube) -> bool:
+        """True if a single live cube contains `cube`."""
+        care, value = cube
+        if not care:
+            return any(self.cubes[i][0] == 0 for i in _indices(self.alive))
+        # A containing cube only uses literals of `cube`: rule out the rest.
+        rows = self.alive
+        for lit, members in self._by_literal.items():
+            bit, polarity = lit
+            if not care & bit or (value & bit) != polarity:
+                rows &= ~members
+        return rows != 0
+
+
+def _cofactor(cover: Iterable[Cube], cube: Cube) -> List[Cube]:
+    care, value = cube
+    return [(c & ~care, v & ~care) for c, v in cover if not ((c & care) & (v ^ value))]
+
+
+def _split_var(cover: Sequence[Cube]) -> int:
+    """Most frequent binate variable, or the most frequent one if the cover is unate."""
+    # Per-variable occurrence counts as bit-sliced binary counters: bit i of
+    # slices[k] is bit k of variable i's count.
+    slices: List[int] = []
+    pos = neg = 0
+    for care, value in cover:
+        pos |= care & value
+        neg |= care & ~value
+        carry = care
+        for k in range(len(slices)):
+            if not carry:
+                break
+            slices[k], carry = slices[k] ^ carry, slices[k] & carry
+        if carry:
+            slices.append(carry)
+    candidates = (pos & neg) or (pos | neg)
+    for counter in reversed(slices):
+        if candidates & counter:
+            candidates &= counter
+    return candidates & -candidates
+
+
+def _tautology(cover: List[Cube], work: _Work, limit: int = _SPLIT_LIMIT) -> bool:
+    """True if `cover` fills the whole space; False when it doesn't or the budget runs out."""
+    stack = [cover]
+    while stack:
+        cover = stack.pop()
+        while True:
+            if not cover:
+                return False
+            work.left -= len(cover)
+            if work.left < 0:
+                return False
+            support = pos = neg = 0
+            for care, value in cover:
+                if not care:
+                    break
+                support |= care
+                pos |= care & value
+                neg |= care & ~value
+            else:
+                # Volume bound: the cubes cannot fill the space if their sizes don't add up.
+                width = bin(support).count("1")
+                if sum(1 << (width - bin(care).count("1")) for care, _ in cover) < 1 << width:
+                    return False
+                # A cube using a unate variable lies inside that variable's half of
+                # the space, so the cover is a tautology iff the remaining cubes are.
+                unate = support & ~(pos & neg)
+                if unate:
+                    cover = [c for c in cover if not c[0] & unate]
+                    continue
+                limit -= 1
+                if limit < 0:
+                    return False
+                bit = _split_var(cover)
+                stack.append(_cofactor(cover, (bit, bit)))
+                stack.append(_cofactor(cover, (bit, 0)))
+            break  # this branch holds the universal cube or has been split
+    return True
+
+
+def _complement_supercube(cover: List[Cube], work: _Work, limit: int = _SPLIT_LIMIT) -> Optional[Cube]:
+    """
+    Smallest cube containing the complement of `cover`; None if the cover is a
+    tautology.  Falls back to the universal cube when the budget runs out.
+    """
+    splits = [limit]
+
+    def walk(cover: List[Cube]) -> Optional[Cube]:
+        if not cover:
+            return (0, 0)
+        work.left -= len(cover)
+        if work.left < 0:
+            raise _Blowup()
+        pos = neg = 0
+        for care, value in cover:
+            if not care:
+                return None
+            pos |= care & value
+            neg |= care & ~value
+        if not pos & neg:
+            # Unate: the point opposing every literal is uncovered, and a variable
+            # stays fixed only where a one-literal cube pins it.
+            care = value = 0
+            for c_care, c_value in cover:
+                if not c_care & (c_care - 1):
+                    care |= c_care
+                    value |= c_care & ~c_value
+            return (care, value)
+        splits[0] -= 1
+        if splits[0] < 0:
+            raise _Blowup()
+        bit = _split_var(cover)
+        high = walk(_cofactor(cover, (bit, bit)))
+        low = walk(_cofactor(cover, (bit, 0)))
+        if high is None:
+            return None if low is None else (low[0] | bit, low[1])
+        if low is None:
+            return (high[0] | bit, high[1] | bit)
+        care = high[0] & low[0] & ~(high[1] ^ low[1])
+        return (care, high[1] & care)
+
+    try:
+        return walk(cover)
+    except _Blowup:
+        return (0, 0)
+
+
+# ---- Cube helpers ----
+
+
+def _contains(big: Cube, small: Cube) -> bool:
+    return (big[0] & small[0]) == big[0] and not ((small[1] ^ big[1]) & big[0])
+
+
+def _single_cube_containment(cover: List[Cube]) -> List[Cube]:
+    # A containing cube has a subset of the contained cube's literals, so each
+    # kept cube is filed under its first literal and only buckets for the
+    # candidate's own literals need checking.
+    out: List[Cube] = []
+    buckets: Dict[Cube, List[Cube]] = {}
+    for cube in sorted(set(cover), key=lambda c: (_popcount(c[0]), c)):
+        care, value = cube
+        if not care:
+            return [cube]
+        lits = [(bit, value & bit) for bit in _bits(care)]
+        if any(_contains(big, cube) for lit in lits for big in buckets.get(lit, ())):
+            continue
+        out.append(cube)
+        buckets.setdefault(lits[0], []).append(cube)
+    return out
+
+
+def _check_size(cover: List[Cube], max_cubes: int) -> List[Cube]:
+    if len(cover) > max_cubes:
+        raise _Blowup()
+    return cover
+
+
+def _cost(cover: Sequence[Cube]) -> Tuple[int, int]:
+    return (len(cover), sum(_popcount(care) for care, _ in cover))
+
+
+def _bits(mask: int) -> List[int]:
+    out = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        out.append(bit)
+    return out
+
+
+def _indices(mask: int) -> List[int]:
+    out = []
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        out.append(low.bit_length() - 1)
+    return out
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def _collect_names(expr: Expr) -> Set[str]:
+    names: Set[str] = set()
+    seen: Set[Expr] = set()
+    stack = [expr]
+    while stack:
+        e = stack.pop()
+        if e in seen:
+            continue
+        seen.add(e)
+        if isinstance(e, Var):
+            names.add(e.name)
+        elif isinstance(e, Not):
+            stack.append(e.child)
+        elif isinstance(e, (And, Or)):
+            stack.extend(e.children)
+    return names
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..api.synthesize import And, CancelToken, Expr, Not, Or, Var
+from ..verify.truth_table import truth_tables, var_mask
+
+# Exact minimum-leaf search for small functions.
+#
+# A series-parallel network is an And/Or formula with one transistor per
+# literal leaf.  The PDN realises !F, and by De Morgan the dual of a formula
+# for F is a formula for !F with the same leaves, so a minimum formula for F
+# gives a minimum PDN/PUN pair.
+#
+# Formulas are enumerated bottom-up by leaf count.  Functions are truth tables
+# held as ints (2**n bits) and each one is kept only at the size where it
+# first appears, so every level holds exactly the functions of that minimum
+# size.  Before a level is built in full the target is looked for among the
+# pairs that can produce it: an And root needs two supersets of F, an Or root
+# two subsets.  The search stops at the leaf count of the formula the caller
+# already has, which is then proven optimal.  The levels do not depend on the
+# target and are memoized per number of inputs.
+
+MAX_VARS = 5
+MAX_PAIRS = 4_000_000
+
+_LIT, _AND, _OR = range(3)
+
+
+@dataclass(frozen=True)
+class ExactResult:
+    expr: Optional[Expr]  # formula below the bound, None if nothing smaller exists or the budget ran out
+    leaves: Optional[int]
+    optimal: bool  # True when no formula has fewer leaves than `leaves` (or the bound)
+    explored: int  # distinct functions enumerated so far for this many inputs
+    ms: float
+
+
+def minimum_formula(
+    expr: Expr, variables: Sequence[str], upper_bound: int, cancel: Optional[CancelToken] = None
+) -> ExactResult:
+    """
+    Searches for a formula equivalent to `expr` with fewer than `upper_bound` leaves.
+
+    Returns the minimum one if it exists.  Otherwise `expr` is None and
+    `optimal` tells whether the bound itself was proven minimal (False when the
+    enumeration budget for this many inputs ran out first).
+    """
+    start = time.perf_counter()
+    if len(variables) > MAX_VARS:
+        raise ValueError(f"exact search is limited to {MAX_VARS} variables")
+    (target,) = truth_tables([expr], variables)
+    enum = _enumeration(len(variables))
+    with enum.lock:
+        leaves, optimal, root = enum.search(target, upper_bound, cancel)
+        found = None if root is None else enum.build_root(root, variables)
+        explored = len(enum.recipe)
+    return ExactResult(
+        expr=found,
+        leaves=leaves,
+        optimal=optimal,
+        explored=explored,
+        ms=(time.perf_counter() - start) * 1000,
+    )
+
+
+# The levels depend only on the number of inputs, so they are shared by every
+# search and grow on demand until MAX_PAIRS combinations have been tried.
+_ENUMERATIONS: Dict[int, "_Enumeration"] = {}
+_ENUMERATIONS_LOCK = threading.Lock()
+
+
+def _enumeration(num_vars: int) -> "_Enumeration":
+    with _ENUMERATIONS_LOCK:
+        enum = _ENUMERATIONS.get(num_vars)
+        if enum is None:
+            enum = _ENUMERATIONS[num_vars] = _Enumeration(num_vars, MAX_PAIRS)
+        return enum
+
+
+class _Enumeration:
+    def __init__(self, num_vars: int, max_pairs: int):
+        self.lock = threading.Lock()
+        self.full = (1 << (1 << num_vars)) - 1
+        self.max_pairs = max_pairs
+        self.pairs = 0
+        self.exhausted = False
+        # Truth table -> how it was first built: (_LIT, var, positive) or (op, left, right).
+        self.recipe: Dict[int, Tuple[int, int, int]] = {}
+        self.levels: List[List[int]] = [[], []]
+        for i in range(num_vars):
+            column = var_mask(i, num_vars)
+            for tt, positive in ((column, 1), (self.full ^ column, 0)):
+                if tt not in self.recipe:
+                    self.recipe[tt] = (_LIT, i, positive)
+                    self.levels[1].append(tt)
+
+    def search(
+        self, target: int, upper_bound: int, cancel: Optional[CancelToken] = None
+    ) -> Tuple[Optional[int], bool, Optional[Tuple[int, int, int]]]:
+        """(leaves, optimal, root to build) for the cheapest formula below the bound."""
+        if upper_bound > 1 and target in self.levels[1]:
+            return 1, True, self.recipe[target]
+        for k in range(2, upper_bound):
+            # The root stays out of `recipe`: build_level() takes every function
+            # in it for one of a smaller level, so a found target written there
+            # would be left out of its own level.
+            root = self.find_root(target, k)
+            if root is not None:
+                return k, True, root
+            if k == upper_bound - 1:
+                break  # nothing bigger is needed: the bound is optimal
+            if cancel is not None:
+                cancel.check()
+            if len(self.levels) <= k and not self.build_level(k, cancel):
+                return None, False, None
+        return upper_bound, True, None
+
+    def find_root(self, target: int, k: int) -> Optional[Tuple[int, int, int]]:
+        # Every level only holds functions of that exact minimum size, so a
+        # size-k formula for `target` must combine two entries of smaller levels.
+        for a in range(1, k // 2 + 1):
+            b = k - a
+            supersets = [g for g in self.levels[b] if g & target == target]
+            for f in self.levels[a]:
+                if f & target == target:
+                    for g in supersets:
+                        if f & g == target:
+                            return (_AND, f, g)
+            subsets = [g for g in self.levels[b] if g | target == target]
+            for f in self.levels[a]:
+                if f | target == target:
+                    for g in subsets:
+                        if f | g == target:
+                            return (_OR, f, g)
+        return None
+
+    def build_level(self, k: int, cancel: Optional[CancelToken] = None) -> bool:
+        splits = range(1, k // 2 + 1)
+        pairs = self.pairs + sum(len(self.levels[a]) * len(self.levels[k - a]) for a in splits)
+        if self.exhausted or pairs > self.max_pairs:
+            self.exhausted = True
+            return False
+        recipe = self.recipe
+        full = self.full
+        level: List[int] = []
+        try:
+            for a in splits:
+                left, right = self.levels[a], self.levels[k - a]
+                for i, f in enumerate(left):
+                    if cancel is not None and not i & 63:
+                        cancel.check()
+                    others = right[i:] if a == k - a else right
+                    # Levels are closed under complement, and !(f & g) == !f | !g,
+                    # so each new And also yields the Or of the complements.  The
+                    # combinations are formed in C; only new functions touch Python.
+                    for h, g in {f & g: g for g in others}.items():
+                        if h not in recipe:
+                            recipe[h] = (_AND, f, g)
+                            level.append(h)
+                            dual = full ^ h
+                            if dual not in recipe:
+                                recipe[dual] = (_OR, full ^ f, full ^ g)
+                                level.append(dual)
+        except BaseException:
+            # The enumeration is shared: drop the half-built level so later
+            # searches do not mistake its functions for enumerated ones.
+            for h in level:
+                del recipe[h]
+            raise
+        self.pairs = pairs
+        self.levels.append(level)
+        return True
+
+    def build(self, tt: int, variables: Sequence[str]) -> Expr:
+        return self.build_root(self.recipe[tt], variables)
+
+    def build_root(self, root: Tuple[int, int, int], variables: Sequence[str]) -> Expr:
+        kind, a, b = root
+        if kind == _LIT:
+            var = Var(variables[a])
+            return var if b else Not(var)
+        cls = And if kind == _AND else Or
+        return cls((self.build(a, variables), self.build(b, variables)))
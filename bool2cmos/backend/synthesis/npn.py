@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..api.synthesize import And, Expr, MemoTable, Not, Or, Var
+from ..verify.truth_table import var_mask
+
+# Precomputed minimum networks for NPN classes of small functions.
+#
+# Two functions are NPN-equivalent when one becomes the other by permuting
+# inputs, negating inputs and/or negating the output.  Each such transform
+# maps an And/Or formula to one with the same number of leaves (the output
+# negation through De Morgan), so one minimum formula per class serves every
+# member.  The canonical form of a class is its smallest truth table.
+#
+# The library file is written offline by `python -m bool2cmos.backend.synthesis.npn`
+# and memory-mapped when first used.  Layout (little-endian):
+#
+#     magic    8 bytes  b"B2CNPN\x00\x01"
+#     count    u32      number of classes
+#     keys     u64 * count        (inputs << 32) | canonical truth table, sorted
+#     offsets  u32 * (count + 1)  into the program area
+#     programs bytes              per class: flags (bit 0: proven optimal),
+#                                 then the formula in postfix
+#
+# A postfix byte below 0x80 is a literal, `2 * var + negated`; _AND_OP and
+# _OR_OP pop two operands.  Functions of up to 4 inputs are looked up as
+# 4-input functions; 5-input classes are stored only for the common ones.
+
+MAGIC = b"B2CNPN\x00\x01"
+MAX_INPUTS = 5
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "npn_library.bin")
+
+_BASE_INPUTS = 4
+# Canonical forms of the truth tables looked up lately: canonicalizing a
+# 5-input function walks all 3840 of its transforms.
+_CANONICAL = MemoTable(4096)
+_AND_OP, _OR_OP = 0x80, 0x81
+_HEADER = struct.Struct("<8sI")
+_KEY = struct.Struct("<Q")
+_OFFSET = struct.Struct("<I")
+
+
+# (permutation, input negations, output negation) taking a function to its
+# canonical form c: f(z) = c(x) ^ output, where x[perm[k]] = z[k] ^ bit k of
+# `negations`.
+Transform = Tuple[Tuple[int, ...], int, int]
+
+
+@dataclass(frozen=True)
+class LibraryMatch:
+    expr: Expr  # formula for the looked-up function, over its own variable names
+    leaves: int
+    optimal: bool
+    canonical: int
+    inputs: int
+
+
+def npn_canonical(tt: int, num_inputs: int) -> Tuple[int, Transform]:
+    """Smallest truth table in the NPN class of `tt`, and the transform reaching it."""
+    full = (1 << (1 << num_inputs)) - 1
+    flips, swaps = _schedule(num_inputs)
+    perm = list(range(num_inputs))
+    where = list(range(num_inputs))  # where[i] = k with perm[k] == i
+    negations = 0
+    best, best_transform = tt, (tuple(perm), 0, 0)
+    t = tt
+    for swap in swaps:
+        for i, mask, shift in flips:
+            if t < best:
+                best, best_transform = t, (tuple(perm), negations, 0)
+            if full ^ t < best:
+                best, best_transform = full ^ t, (tuple(perm), negations, 1)
+            t = ((t & mask) >> shift) | ((t << shift) & mask)
+            negations ^= 1 << where[i]
+        if swap is None:
+            break
+        i, keep, low, shift = swap
+        # The Gray code has come back to the same phase; exchange inputs i and i+1.
+        t = (t & keep) | ((t & low) << shift) | ((t >> shift) & low)
+        a, b = where[i], where[i + 1]
+        perm[a], perm[b] = i + 1, i
+        where[i], where[i + 1] = b, a
+    return best, best_transform
+
+
+def lookup(tt: int, variables: Sequence[str], library: Optional["NPNLibrary"] = None) -> Optional[LibraryMatch]:
+    """
+    Looks up the minimum formula for a function with truth table `tt` over
+    `variables` (see verify/truth_table.py for the bit order).  Returns None for
+    constants, functions outside the library and when no library is installed.
+    """
+    n = len(variables)
+    if not 0 < n <= MAX_INPUTS:
+        return None
+    library = library if library is not None else default_library()
+    if library is None:
+        return None
+    width = max(n, _BASE_INPUTS)
+    for _ in range(width - n):
+        tt |= tt << (1 << n)  # the extra inputs are don't-cares
+        n += 1
+    key = (width, tt)
+    found = _CANONICAL.get(key)
+    if found is None:
+        found = npn_canonical(tt, width)
+        _CANONICAL.put(key, found)
+    canonical, (perm, negations, output) = found
+    entry = library.get(width, canonical)
+    if entry is None:
+        return None
+    optimal, program = entry
+    # Canonical input perm[k] is the function's input k, negated by bit k.
+    literals: List[Optional[Tuple[str, int]]] = [None] * width
+    for k, m in enumerate(perm):
+        if k < len(variables):
+            literals[m] = (variables[k], (negations >> k) & 1)
+    found = _decode(program, literals, output)
+    if found is None:
+        return None
+    return LibraryMatch(expr=found, leaves=_leaves(program), optimal=optimal, canonical=canonical, inputs=width)
+
+
+class NPNLibrary:
+    """Read-only view of a library file; lookups binary-search the mapped keys."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an NPN library file")
+        self._keys = _HEADER.size
+        self._offsets = self._keys + _KEY.size * self.count
+        self._programs = self._offsets + _OFFSET.size * (self.count + 1)
+        self.path = path
+
+    def get(self, inputs: int, canonical: int) -> Optional[Tuple[bool, bytes]]:
+        key = inputs << 32 | canonical
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _KEY.unpack_from(self._map, self._keys + _KEY.size * mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count or _KEY.unpack_from(self._map, self._keys + _KEY.size * lo)[0] != key:
+            return None
+        start = self._programs + _OFFSET.unpack_from(self._map, self._offsets + _OFFSET.size * lo)[0]
+        end = self._programs + _OFFSET.unpack_from(self._map, self._offsets + _OFFSET.size * (lo + 1))[0]
+        return bool(self._map[start] & 1), self._map[start + 1 : end]
+
+    def close(self) -> None:
+        self._map.close()
+
+
+_default: Optional[NPNLibrary] = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+def default_library() -> Optional[NPNLibrary]:
+    """The library shipped next to this module, mapped once; None if it is missing."""
+    global _default, _default_loaded
+    if not _default_loaded:
+        with _default_lock:
+            if not _default_loaded:
+                _default = NPNLibrary(DEFAULT_PATH) if os.path.exists(DEFAULT_PATH) else None
+                _default_loaded = True
+    return _default
+
+
+def write_library(path: str, entries: Iterable[Tuple[int, int, bool, bytes]]) -> int:
+    """Writes (inputs, canonical, optimal, program) entries; returns the class count."""
+    rows = sorted((inputs << 32 | canonical, optimal, program) for inputs, canonical, optimal, program in entries)
+    programs = bytearray()
+    offsets = []
+    for _, optimal, program in rows:
+        offsets.append(len(programs))
+        programs.append(1 if optimal else 0)
+        programs += program
+    offsets.append(len(programs))
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(rows)))
+        f.write(b"".join(_KEY.pack(key) for key, _, _ in rows))
+        f.write(b"".join(_OFFSET.pack(o) for o in offsets))
+        f.write(programs)
+    os.replace(tmp, path)
+    return len(rows)
+
+
+def encode(expr: Expr, variables: Sequence[str]) -> bytes:
+    """Postfix program of an NNF formula over `variables` (n-ary nodes become binary)."""
+    index = {name: i for i, name in enumerate(variables)}
+    out = bytearray()
+    stack: List[Tuple[Expr, bool]] = [(expr, False)]
+    while stack:
+        e, expanded = stack.pop()
+        if isinstance(e, Var):
+            out.append(2 * index[e.name])
+        elif isinstance(e, Not) and isinstance(e.child, Var):
+            out.append(2 * index[e.child.name] + 1)
+        elif isinstance(e, (And, Or)):
+            if expanded:
+                out.extend([_AND_OP if isinstance(e, And) else _OR_OP] * (len(e.children) - 1))
+            else:
+                stack.append((e, True))
+                stack.extend((c, False) for c in reversed(e.children))
+        else:
+            raise ValueError("library formulas must be non-constant NNF")
+    return bytes(out)
+
+
+def _decode(program: bytes, literals: Sequence[Optional[Tuple[str, int]]], negate_output: int) -> Optional[Expr]:
+    # The output negation is applied through De Morgan: swap the operators and
+    # complement the leaves, which keeps the result in NNF.
+    stack: List[Expr] = []
+    for code in program:
+        if code < 0x80:
+            literal = literals[code >> 1]
+            if literal is None:
+                return None  # a padding input; minimum formulas never use one
+            name, negated = literal
+            var = Var(name)
+            stack.append(Not(var) if (code & 1) ^ negated ^ negate_output else var)
+        else:
+            right = stack.pop()
+            left = stack.pop()
+            conjunction = (code == _AND_OP) != bool(negate_output)
+            stack.append(And((left, right)) if conjunction else Or((left, right)))
+    (out,) = stack
+    return out
+
+
+def _leaves(program: bytes) -> int:
+    return sum(1 for code in program if code < 0x80)
+
+
+_SCHEDULES: Dict[int, Tuple[list, list]] = {}
+
+
+def _schedule(n: int) -> Tuple[list, list]:
+    # Every transform is visited by walking the input negations in Gray-code
+    # order (one negation per step, 2**n steps return to the start) for each
+    # permutation in plain-changes order (one adjacent swap per step), so each
+    # step costs a couple of shifts and masks on the truth table.
+    if n not in _SCHEDULES:
+        rows = 1 << n
+        full = (1 << rows) - 1
+        flips = []
+        for step in range(rows):
+            i = (step + 1 & -(step + 1)).bit_length() - 1 if step + 1 < rows else n - 1
+            flips.append((i, var_mask(i, n), 1 << i))
+        swaps: list = []
+        for i in _plain_changes(n):
+            a, b = var_mask(i, n), var_mask(i + 1, n)
+            low = a & (full ^ b)
+            swaps.append((i, full ^ low ^ (b & (full ^ a)), low, (1 << (i + 1)) - (1 << i)))
+        swaps.append(None)
+        _SCHEDULES[n] = (flips, swaps)
+    return _SCHEDULES[n]
+
+
+def _plain_changes(n: int) -> List[int]:
+    """Adjacent swaps (i, i+1) that walk through all n! permutations."""
+    if n <= 1:
+        return []
+    inner = _plain_changes(n - 1)
+    out: List[int] = []
+    down = True
+    for k in range(len(inner) + 1):
+        out.extend(range(n - 2, -1, -1) if down else range(n - 1))
+        if k < len(inner):
+            out.append(inner[k] + (1 if down else 0))
+        down = not down
+    return out
+
+
+# ---- Offline generator ----
+
+
+def _depends_on_all(tt: int, n: int) -> bool:
+    for i in range(n):
+        mask, shift = var_mask(i, n), 1 << i
+        if (tt & mask) >> shift == tt & ((1 << (1 << n)) - 1 ^ mask):
+            return False
+    return True
+
+
+def _orbit(tt: int, n: int) -> Iterable[int]:
+    full = (1 << (1 << n)) - 1
+    flips, swaps = _schedule(n)
+    t = tt
+    for swap in swaps:
+        for _, mask, shift in flips:
+            yield t
+            yield full ^ t
+            t = ((t & mask) >> shift) | ((t << shift) & mask)
+        if swap is None:
+            break
+        _, keep, low, shift = swap
+        t = (t & keep) | ((t & low) << shift) | ((t >> shift) & low)
+
+
+def generate(five_input_leaves: int = 8, max_pairs: int = 2_000_000_000, log=print) -> List[Tuple[int, int, bool, bytes]]:
+    """
+    Minimum formulas for every 4-input NPN class (which covers all functions of
+    fewer inputs) and for the 5-input classes that depend on all five inputs
+    and have a formula of at most `five_input_leaves` leaves.  Both come from the
+    exhaustive enumeration in exact.py, so every stored formula is optimal.
+    """
+    from .exact import _Enumeration
+
+    entries = []
+    names = [f"X{i}" for i in range(MAX_INPUTS)]
+    for n, top in ((_BASE_INPUTS, None), (MAX_INPUTS, five_input_leaves)):
+        start = time.perf_counter()
+        enum = _Enumeration(n, max_pairs)
+        full = (1 << (1 << n)) - 1
+        k = 2
+        while len(enum.recipe) <= full and (top is None or k <= top):
+            if not enum.build_level(k):
+                raise RuntimeError(f"enumeration budget exhausted at {k} leaves for {n} inputs")
+            k += 1
+        seen = set()
+        for level in enum.levels:
+            for tt in level:
+                # Constants show up as A & !A; the pipeline folds them itself.
+                if tt in (0, full) or tt in seen or (n == MAX_INPUTS and not _depends_on_all(tt, n)):
+                    continue
+                canonical, _ = npn_canonical(tt, n)
+                orbit = set(_orbit(canonical, n))
+                seen |= orbit
+                # Levels hold functions at their minimum size and the class is
+                # closed under the transforms, so the canonical member is
+                # enumerated at this same level.
+                entries.append((n, canonical, True, encode(enum.build(canonical, names), names[:n])))
+        log(f"{n} inputs: {sum(1 for e in entries if e[0] == n)} classes in {time.perf_counter() - start:.1f}s")
+    return entries
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the NPN network library.")
+    parser.add_argument("output", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument(
+        "--five-input-leaves",
+        type=int,
+        default=8,
+        help="store 5-input classes whose minimum formula has at most this many leaves",
+    )
+    args = parser.parse_args(argv)
+    count = write_library(args.output, generate(args.five_input_leaves))
+    print(f"wrote {count} classes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,16 +23,11 @@ def build_pdn(expr: Node) -> NetworkNode:
             raise ValueError("Complex NOT expressions should be simplified before synthesis.")
             
     elif isinstance(expr, And):
-        series = Series()
-        series.add_child(build_pdn(expr.left))
-        series.add_child(build_pdn(expr.right))
-        return series
+        # Children passed in at once: the list is allocated at its exact size.
+        return Series([build_pdn(expr.left), build_pdn(expr.right)])
         
     elif isinstance(expr, Or):
-        parallel = Parallel()
-        parallel.add_child(build_pdn(expr.left))
-        parallel.add_child(build_pdn(expr.right))
-        return parallel
+        return Parallel([build_pdn(expr.left), build_pdn(expr.right)])
         
     else:
         raise TypeError(f"Unknown expression type: {type(expr)}")
\ No newline at end of file
@@ -0,0 +1,49 @@
+import importlib
+import unittest
+from unittest import mock
+
+from bool2cmos.backend.api.synthesize import SynthesisError, read_batch, synthesize, synthesize_batch
+
+# The package re-exports the synthesize() function under the module's name.
+api = importlib.import_module("bool2cmos.backend.api.synthesize")
+
+
+class TestSynthesizeBatch(unittest.TestCase):
+    def test_results_in_order_with_inline_errors(self):
+        records = list(synthesize_batch(["A&B", "A&(", "", "!A"]))
+        self.assertEqual([r["index"] for r in records], [0, 1, 2, 3])
+        self.assertEqual(records[0]["result"], synthesize("A&B"))
+        self.assertIn("error", records[1])
+        self.assertIn("error", records[2])
+        self.assertEqual(records[3]["result"]["steps"]["count"]["totalTransistors"], 2)
+
+    def test_duplicates_are_synthesized_once(self):
+        with mock.patch.object(api, "synthesize", wraps=api.synthesize) as spy:
+            records = list(synthesize_batch(["A|B", "C", "A|B", "A|B"]))
+        self.assertEqual(spy.call_count, 2)
+        self.assertEqual(records[0]["result"], records[3]["result"])
+        self.assertEqual(records[2]["expr"], "A|B")
+
+    def test_unknown_mode_is_reported_per_item(self):
+        (record,) = synthesize_batch(["A"], mode="fastest")
+        self.assertIn("Unknown synthesis mode", record["error"])
+
+
+class TestReadBatch(unittest.TestCase):
+    def test_json_forms(self):
+        self.assertEqual(read_batch(b'["A", {"expr": "B"}]'), ["A", "B"])
+        self.assertEqual(read_batch(b'{"expressions": ["A&B"]}'), ["A&B"])
+
+    def test_ndjson_accepts_strings_objects_and_bare_lines(self):
+        body = b'"A&B"\n{"expr": "C|D"}\n\n!E\n1\n'
+        self.assertEqual(read_batch(body, "application/x-ndjson"), ["A&B", "C|D", "!E", "1"])
+
+    def test_malformed_json_body(self):
+        with self.assertRaises(SynthesisError):
+            read_batch(b"[1,")
+        with self.assertRaises(SynthesisError):
+            read_batch(b'{"expr": "A"}')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from bool2cmos.backend.api.synthesize import SynthesisError, inspect_complement_nnf, parse_expr
+from bool2cmos.backend.verify.bdd import FALSE, TRUE, BDD, BDDLimitExceeded, dfs_order
+
+
+class TestBDD(unittest.TestCase):
+    def test_equivalent_expressions_share_a_root(self):
+        manager = BDD(["A", "B", "C"])
+        f = manager.from_expr(parse_expr("A&B|A&C"))
+        g = manager.from_expr(parse_expr("A&(C|B)"))
+        self.assertEqual(f, g)
+        self.assertNotEqual(f, manager.from_expr(parse_expr("A|B&C")))
+        self.assertEqual(manager.node_count((f,)), 3)
+
+    def test_terminals_and_negation(self):
+        manager = BDD(["A"])
+        a = manager.var("A")
+        self.assertEqual(manager.conjoin(a, manager.negate(a)), FALSE)
+        self.assertEqual(manager.disjoin(a, manager.negate(a)), TRUE)
+        self.assertEqual(manager.negate(manager.negate(a)), a)
+
+    def test_satisfy_one(self):
+        manager = BDD(["A", "B", "C"])
+        f = manager.from_expr(parse_expr("!A&B&!C"))
+        self.assertEqual(manager.satisfy_one(f), {"A": 0, "B": 1, "C": 0})
+        self.assertIsNone(manager.satisfy_one(FALSE))
+
+    def test_node_limit(self):
+        manager = BDD([f"X{i}" for i in range(12)], max_nodes=20)
+        with self.assertRaises(BDDLimitExceeded):
+            manager.from_expr(parse_expr("|".join(f"X{i}&X{i + 6}" for i in range(6))))
+
+    def test_dfs_order_keeps_terms_together(self):
+        self.assertEqual(dfs_order([parse_expr("A&D|B&C|A&B")]), ["A", "D", "B", "C"])
+
+    def test_inspect_proves_wide_control_expression(self):
+        expr = "|".join(f"S{i}&!S{i + 1}&(D{i}|!E{i})" for i in range(20))
+        checks = inspect_complement_nnf(expr)["checks"]
+        self.assertEqual(checks["checkedBy"], "bdd")
+        self.assertEqual(len(checks["vars"]), 61)
+        self.assertTrue(checks["nnfEquivalent"])
+        self.assertTrue(checks["nnfComplementEquivalent"])
+        self.assertGreater(checks["bdd"]["nodes"], 0)
+        self.assertNotIn("counterexamples", checks)
+
+    def test_inspect_method_selection(self):
+        checks = inspect_complement_nnf("A&(B|!C)", method="bdd")["checks"]
+        self.assertEqual(checks["checkedBy"], "bdd")
+        self.assertTrue(checks["nnfEquivalent"])
+        with self.assertRaises(SynthesisError):
+            inspect_complement_nnf("A", method="magic")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import copy
+import re
+import unittest
+
+from bool2cmos.backend.api.synthesize import _count_transistors, nnf, parse_expr
+from bool2cmos.backend.bench.generators import FAMILIES, variable_names
+from bool2cmos.backend.bench.recursion import nnf_recursive
+from bool2cmos.backend.bench.recursion import run_benchmark as run_recursion_benchmark
+from bool2cmos.backend.bench.responses import random_network, run_benchmark
+from bool2cmos.backend.bench.suite import compare, fit_curves, fit_power, run_suite
+from bool2cmos.backend.parser import parse
+
+
+class TestGenerators(unittest.TestCase):
+    def test_seeded_and_parseable(self):
+        for name, generate in FAMILIES.items():
+            with self.subTest(family=name):
+                text = generate(12, seed=3)
+                self.assertEqual(text, generate(12, seed=3))
+                self.assertNotEqual(text, generate(12, seed=4))
+                parse_expr(text)
+                parse(text)  # the legacy parser takes the same text
+
+    def test_sizes_grow(self):
+        for name, generate in FAMILIES.items():
+            with self.subTest(family=name):
+                self.assertLess(len(generate(8)), len(generate(32)))
+
+    def test_many_vars_past_the_alphabet(self):
+        self.assertEqual(variable_names(28)[-3:], ["Z", "V26", "V27"])
+        text = FAMILIES["many_vars"](40)
+        parse_expr(text)
+        self.assertEqual(len(set(re.findall(r"[A-Z]\w*", text))), 40)
+
+
+class TestFits(unittest.TestCase):
+    def test_fit_power_recovers_exponent(self):
+        xs = [10, 20, 40, 80]
+        fit = fit_power(xs, [0.5 * x**2 for x in xs])
+        self.assertAlmostEqual(fit["exponent"], 2.0, places=3)
+        self.assertAlmostEqual(fit["coefficient"], 0.5, places=6)
+        self.assertEqual(fit["r2"], 1.0)
+        self.assertIsNone(fit_power([5, 5], [1, 2]))
+
+    def test_fit_curves_flags_superlinear_stages(self):
+        points = [
+            {"target": "api", "family": "f", "n": n, "size": n, "stagesMs": {"a": n, "b": n * n}, "totalMs": n + n * n}
+            for n in (4, 8, 16)
+        ]
+        fits = {f["stage"]: f for f in fit_curves(points)}
+        self.assertFalse(fits["a"]["superlinear"])
+        self.assertTrue(fits["b"]["superlinear"])
+        self.assertEqual(fits["total"]["points"], 3)
+
+
+class TestSuite(unittest.TestCase):
+    def test_report_and_comparison(self):
+        report = run_suite(families=["wide_sop", "many_vars"], sizes=[2, 4, 30], repeat=1)
+        legacy = [p for p in report["points"] if p["target"] == "legacy" and p["family"] == "many_vars"]
+        self.assertIn("SyntaxError", legacy[-1]["error"])  # V26 is not a legacy identifier
+        api = [p for p in report["points"] if p["target"] == "api" and p["family"] == "wide_sop"]
+        self.assertEqual([p["n"] for p in api], [2, 4, 30])
+        self.assertIn("simplify", api[0]["stagesMs"])
+        self.assertTrue(any(f["stage"] == "total" for f in report["fits"]))
+        self.assertEqual(compare(report, report), [])
+
+        slower = copy.deepcopy(report)
+        for point in slower["points"]:
+            if "totalMs" in point:
+                point["totalMs"] = point["totalMs"] * 3 + 1
+        for fit in slower["fits"]:
+            fit["exponent"] += 1
+        regressions = compare(report, slower)
+        self.assertTrue(any("x)" in r for r in regressions))
+        self.assertTrue(any("scaling exponent" in r for r in regressions))
+
+
+class TestRecursion(unittest.TestCase):
+    def test_report(self):
+        report = run_recursion_benchmark(families=["wide_sop", "heavy_negation"], sizes=[2, 4], repeat=1)
+        self.assertEqual(len(report["points"]), 8)
+        point = report["points"][0]
+        self.assertEqual((point["traversal"], point["family"], point["n"]), ("eval", "wide_sop", 2))
+        self.assertGreater(point["recursive"], 0)
+        self.assertEqual(sorted(report["geomeanRatio"]), ["eval", "nnf"])
+
+    def test_nnf_recursive_matches_nnf(self):
+        for name, generate in FAMILIES.items():
+            with self.subTest(family=name):
+                expr = parse_expr(generate(16))
+                self.assertEqual(nnf_recursive(expr), nnf(expr))
+
+
+class TestResponses(unittest.TestCase):
+    def test_random_network(self):
+        self.assertEqual(_count_transistors(random_network(500, seed=2)), 500)
+        self.assertEqual(random_network(40, seed=2), random_network(40, seed=2))
+
+    def test_report(self):
+        report = run_benchmark(sizes=[20], repeat=1)
+        self.assertEqual([p["case"] for p in report["points"]], ["synthesize/20", "debug/nnf"])
+        for point in report["points"]:
+            self.assertEqual(point["dict"]["bytes"], point["stream"]["bytes"])
+            self.assertGreaterEqual(point["stream"]["peakKiB"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
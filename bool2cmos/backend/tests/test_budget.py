@@ -0,0 +1,64 @@
+import unittest
+
+from bool2cmos.backend.api.result_cache import ResultCache
+from bool2cmos.backend.api.synthesize import (
+    Budget,
+    SynthesisError,
+    TransformCache,
+    factor,
+    nnf,
+    parse_expr,
+    simplify,
+    synthesize,
+)
+from bool2cmos.backend.verify.truth_table import truth_tables
+
+EXPR = "A&B|C&D|!(A&C)|B&!D&E|(A|B)&(A|C)&(D|!E)"
+NAMES = ["A", "B", "C", "D", "E"]
+
+
+class TestBudget(unittest.TestCase):
+    def test_truncated_results_stay_equivalent(self):
+        (want,) = truth_tables([parse_expr(EXPR)], NAMES)
+        for mode in ("default", "exact"):
+            for visits in (1, 5, 20, 80, 300):
+                with self.subTest(mode=mode, visits=visits):
+                    result = synthesize(EXPR, mode=mode, budget=Budget(max_visits=visits))
+                    factored = parse_expr(result["steps"]["factor"]["expr"])
+                    self.assertEqual(truth_tables([factored], NAMES), [want])
+                    self.assertGreater(result["steps"]["count"]["totalTransistors"], 0)
+        self.assertTrue(synthesize(EXPR, budget=Budget(max_visits=1))["truncated"])
+
+    def test_generous_budget_matches_unbudgeted(self):
+        budget = Budget(timeout=60, max_visits=10**9)
+        self.assertEqual(synthesize(EXPR, budget=budget), synthesize(EXPR))
+        self.assertFalse(budget.truncated)
+        self.assertGreater(budget.visits, 0)
+
+    def test_transforms_return_best_form_so_far(self):
+        expr = parse_expr("!(A&!(B|!C))|D&D")
+        self.assertIs(simplify(expr, budget=Budget(max_visits=1)), expr)
+        budget = Budget(max_visits=1)
+        self.assertEqual(nnf(expr, budget=budget), nnf(expr))  # charged, never cut short
+        self.assertGreater(budget.visits, 1)
+        sop = nnf(parse_expr("A&B|A&C|D&B|D&C"))
+        self.assertEqual(factor(sop, budget=Budget(max_visits=1)), sop)
+
+    def test_truncated_forms_are_not_memoized(self):
+        cache = TransformCache()
+        synthesize(EXPR, cache=cache, budget=Budget(max_visits=30))
+        self.assertEqual(synthesize(EXPR, cache=cache), synthesize(EXPR))
+        results = ResultCache()
+        self.assertTrue(results.synthesize(EXPR, budget=Budget(max_visits=1))["truncated"])
+        self.assertEqual(results.stats()["entries"], 0)
+        results.synthesize(EXPR)
+        self.assertNotIn("truncated", results.synthesize(EXPR, budget=Budget(max_visits=1)))
+
+    def test_rejects_non_positive_limits(self):
+        for kwargs in ({"timeout": 0}, {"max_visits": 0}, {"timeout": -1}):
+            with self.assertRaises(SynthesisError):
+                Budget(**kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
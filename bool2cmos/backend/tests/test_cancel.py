@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from bool2cmos.backend.api.synthesize import (
+    CancelToken,
+    SynthesisCancelled,
+    SynthesisError,
+    TransformCache,
+    nnf,
+    parse_expr,
+    synthesize,
+    synthesize_batch,
+)
+from bool2cmos.backend.api.worker_pool import PoolSaturated, SynthesisPool
+from bool2cmos.backend.synthesis.exact import _Enumeration
+
+
+class _CancelAfter(CancelToken):
+    """Cancels itself after `checks` cancellation checks."""
+
+    def __init__(self, checks):
+        super().__init__()
+        self.left = checks
+
+    def check(self):
+        self.left -= 1
+        if self.left < 0:
+            self.cancel()
+        super().check()
+
+
+class TestCancelToken(unittest.TestCase):
+    def test_stages_stop_on_cancel(self):
+        token = CancelToken()
+        token.cancel()
+        with self.assertRaises(SynthesisCancelled):
+            synthesize("A&B|C", cancel=token)
+        with self.assertRaises(SynthesisCancelled):
+            nnf(parse_expr("!(A&B|C)"), cancel=token)
+
+    def test_deadline(self):
+        token = CancelToken(timeout=0.01)
+        time.sleep(0.02)
+        self.assertTrue(token.cancelled)
+        with self.assertRaises(SynthesisCancelled):
+            synthesize("A&B|C", cancel=token)
+        self.assertIsInstance(SynthesisCancelled("x"), SynthesisError)
+
+    def test_cancelled_midway_then_rerun(self):
+        cache = TransformCache()
+        text = "|".join(f"X{i}&(Y{i}|!Z{i})" for i in range(20))
+        with self.assertRaises(SynthesisCancelled):
+            synthesize(text, cache=cache, cancel=_CancelAfter(25))
+        self.assertEqual(synthesize(text, cache=cache), synthesize(text))
+
+    def test_cancelled_enumeration_level_is_rolled_back(self):
+        enum = _Enumeration(3, 10**9)
+        for k in range(2, 5):
+            enum.build_level(k)
+        before = dict(enum.recipe)
+        with self.assertRaises(SynthesisCancelled):
+            enum.build_level(5, _CancelAfter(1))
+        self.assertEqual(enum.recipe, before)
+        fresh = _Enumeration(3, 10**9)
+        for k in range(2, 6):
+            fresh.build_level(k)
+        enum.build_level(5)
+        self.assertEqual(sorted(enum.levels[5]), sorted(fresh.levels[5]))
+
+    def test_batch_item_timeout_is_inline(self):
+        records = list(synthesize_batch(["A&B"], item_timeout=1e-9))
+        self.assertIn("deadline", records[0]["error"])
+
+
+class TestSynthesisPool(unittest.TestCase):
+    def test_runs_with_token(self):
+        pool = SynthesisPool(workers=2, queue_size=2, timeout=5)
+        try:
+            result = asyncio.run(pool.run(synthesize, "A&B"))
+            self.assertEqual(result, synthesize("A&B"))
+        finally:
+            pool.shutdown()
+
+    def test_timeout_stops_the_worker(self):
+        stopped = threading.Event()
+
+        def spin(cancel):
+            try:
+                while True:
+                    cancel.check()
+                    time.sleep(0.001)
+            finally:
+                stopped.set()
+
+        pool = SynthesisPool(workers=1, queue_size=0, timeout=0.05)
+        try:
+            with self.assertRaises(SynthesisCancelled):
+                asyncio.run(pool.run(spin))
+            self.assertTrue(stopped.wait(1))
+            self.assertEqual(pool.stats()["timeouts"], 1)
+        finally:
+            pool.shutdown()
+
+    def test_rejects_when_full(self):
+        release = threading.Event()
+
+        def block(cancel):
+            release.wait(5)
+            return "done"
+
+        pool = SynthesisPool(workers=1, queue_size=0, timeout=5)
+
+        async def scenario():
+            first = asyncio.ensure_future(pool.run(block))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(PoolSaturated):
+                await pool.run(block)
+            release.set()
+            return await first
+
+        try:
+            self.assertEqual(asyncio.run(scenario()), "done")
+            self.assertEqual(pool.stats()["rejected"], 1)
+        finally:
+            pool.shutdown()
+
+    def test_batch_runs_on_the_pool(self):
+        release = threading.Event()
+
+        def block(cancel):
+            release.wait(5)
+
+        pool = SynthesisPool(workers=1, queue_size=0, timeout=5)
+
+        async def collect(expressions):
+            return [record async for record in pool.batch(expressions, fields=["count"])]
+
+        async def scenario():
+            records = await collect(["A&B", "A&(", "A&B"])
+            self.assertEqual(list(synthesize_batch(["A&B", "A&(", "A&B"], fields=["count"])), records)
+            busy = asyncio.ensure_future(pool.run(block))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(PoolSaturated):
+                await collect(["A"])
+            release.set()
+            await busy
+
+        try:
+            asyncio.run(scenario())
+            stats = pool.stats()
+            self.assertEqual((stats["completed"], stats["rejected"]), (3, 1))
+        finally:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from bool2cmos.backend.api.synthesize import synthesize
+from bool2cmos.backend.cli import main, run_batch
+
+EXPRESSIONS = ["A&B", "A|(B&C)", "A&(", "!(A&B)|C", "A&B", "1"]
+
+
+def _records(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+class TestBatchCLI(unittest.TestCase):
+    def test_run_batch_in_process(self):
+        out = io.StringIO()
+        stats = run_batch(EXPRESSIONS, out, jobs=1, chunk_size=4)
+        records = _records(out.getvalue())
+        self.assertEqual([r["index"] for r in records], list(range(len(EXPRESSIONS))))
+        self.assertEqual(records[1]["result"], synthesize("A|(B&C)"))
+        self.assertIn("error", records[2])
+        self.assertEqual((stats["expressions"], stats["errors"]), (6, 1))
+
+    def test_process_pool_matches_in_process(self):
+        expected = io.StringIO()
+        run_batch(EXPRESSIONS * 5, expected, jobs=1)
+        ordered = io.StringIO()
+        run_batch(EXPRESSIONS * 5, ordered, jobs=2, chunk_size=3)
+        self.assertEqual(ordered.getvalue(), expected.getvalue())
+        unordered = io.StringIO()
+        run_batch(EXPRESSIONS * 5, unordered, jobs=2, chunk_size=3, ordered=False)
+        self.assertEqual(sorted(unordered.getvalue().splitlines()), sorted(expected.getvalue().splitlines()))
+
+    def test_main_reads_lines_and_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            lines, array, out = (os.path.join(tmp, name) for name in ("in.txt", "in.json", "out.ndjson"))
+            with open(lines, "w") as f:
+                f.write('A&B\n{"expr": "C|D"}\n\n"!E"\n')
+            with open(array, "w") as f:
+                json.dump(["A&B", "C|D", "!E"], f)
+            stderr = io.StringIO()
+            for path in (lines, array):
+                with redirect_stderr(stderr):
+                    self.assertEqual(main(["batch", path, "-o", out, "-j", "1"]), 0)
+                with open(out) as f:
+                    self.assertEqual([r["expr"] for r in _records(f.read())], ["A&B", "C|D", "!E"])
+            self.assertIn("3 expressions (0 errors)", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
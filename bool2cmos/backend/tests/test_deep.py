@@ -0,0 +1,100 @@
+import re
+import sys
+import unittest
+
+from bool2cmos.backend.api.synthesize import (
+    And,
+    Const,
+    NetworkNode,
+    Not,
+    Or,
+    SynthesisError,
+    Transistor,
+    Var,
+    _EVAL_RECURSION_HEIGHT,
+    _count_transistors,
+    _eval,
+    _eval_iterative,
+    _eval_recursive,
+    export_network_json,
+    expr_to_str,
+    inspect_complement_nnf,
+    nnf,
+    parse_expr,
+    simplify,
+    synthesize,
+)
+from bool2cmos.backend.bench.generators import deep_nesting, xor_chain
+
+# Well past what the recursive traversals could take.
+DEPTH = 2 * sys.getrecursionlimit()
+
+
+class TestDeepInputs(unittest.TestCase):
+    def test_deep_parentheses_and_negations(self):
+        self.assertIs(parse_expr("(" * DEPTH + "A" + ")" * DEPTH), Var("A"))
+        chain = parse_expr("!" * DEPTH + "A")
+        self.assertIs(simplify(chain), Var("A"))
+        self.assertIs(nnf(parse_expr("!" * (DEPTH + 1) + "(A&B)")), parse_expr("!A|!B"))
+        self.assertEqual(expr_to_str(chain), "!" * DEPTH + "A")
+
+    def test_parse_errors_are_unchanged(self):
+        cases = {
+            "(A": "Expected ), got EOF",
+            "A)": "Unexpected trailing token: )",
+            "A&": "Expected identifier/constant/parenthesized expression, got EOF",
+            "!(A|)": "Expected identifier/constant/parenthesized expression, got )",
+            "((A)))": "Unexpected trailing token: )",
+        }
+        for text, message in cases.items():
+            with self.subTest(text=text):
+                with self.assertRaisesRegex(SynthesisError, "^" + re.escape(message)):
+                    parse_expr(text)
+
+    def test_render_round_trip(self):
+        text = deep_nesting(DEPTH)
+        expr = parse_expr(text)
+        self.assertIs(parse_expr(expr_to_str(expr)), expr)
+
+    def test_pipeline_on_deep_expressions(self):
+        for text in (deep_nesting(DEPTH), xor_chain(DEPTH // 4)):
+            with self.subTest(chars=len(text)):
+                result = synthesize(text)
+                self.assertGreater(result["steps"]["count"]["totalTransistors"], 0)
+                checks = inspect_complement_nnf(text)["checks"]
+                self.assertTrue(checks["nnfEquivalent"])
+                self.assertTrue(checks["nnfComplementEquivalent"])
+
+    def test_deep_network_export(self):
+        deep = Transistor(kind="pmos", gate="B", gate_inverted=True, on_when=0)
+        for _ in range(DEPTH):
+            deep = NetworkNode(kind="series", children=(deep,))
+        exported = export_network_json(deep)
+        for _ in range(DEPTH):
+            exported = exported["children"][0]
+        self.assertEqual(exported["gate"], "B")
+        self.assertEqual(_count_transistors(deep), 1)
+
+    def test_eval_short_circuits(self):
+        chain = parse_expr("!" * DEPTH + "(A&B)")
+        self.assertTrue(_eval(chain, {"A": True, "B": True}))
+        # Operands after a deciding one are never looked at, as with `and`/`or`.
+        self.assertFalse(_eval(And((Const(False), Var("Q"))), {}))
+        with self.assertRaises(SynthesisError):
+            _eval(Not(And((Const(True), Var("Q")))), {})
+
+    def test_eval_paths_agree_around_the_threshold(self):
+        env = {"A": True, "B": False}
+        expr = Var("A")
+        heights = set()
+        for i in range(_EVAL_RECURSION_HEIGHT + 4):
+            expr = Not(expr) if i % 3 else Or((And((expr, Var("B"))), Not(Var("B"))))
+            if abs(expr.height - _EVAL_RECURSION_HEIGHT) <= 3:
+                heights.add(expr.height)
+                with self.subTest(height=expr.height):
+                    self.assertEqual(_eval_recursive(expr, env), _eval_iterative(expr, env))
+                    self.assertEqual(_eval(expr, env), _eval_iterative(expr, env))
+        self.assertTrue(min(heights) <= _EVAL_RECURSION_HEIGHT < max(heights))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+import json
+import sys
+import unittest
+
+from bool2cmos.backend.api.encoding import iter_json, json_size, packb, response_format, unpackb
+from bool2cmos.backend.api.result_cache import ResultCache
+from bool2cmos.backend.api.synthesize import (
+    NetworkNode,
+    SynthesisError,
+    Transistor,
+    build_network,
+    export_network_columns,
+    export_network_json,
+    export_network_shared,
+    parse_expr,
+    synthesize,
+)
+
+
+def nested_from_columns(columns):
+    # Rebuilds the nested export: every node follows its parent, in order.
+    nodes = []
+    for kind, parent, gate, flags in zip(columns["kind"], columns["parent"], columns["gate"], columns["flags"]):
+        kind = columns["kinds"][kind]
+        if gate < 0:
+            node = {"type": "node", "kind": kind, "children": []}
+        else:
+            node = {
+                "type": "transistor",
+                "kind": kind,
+                "gate": columns["gates"][gate],
+                "gateInverted": bool(flags & 1),
+                "onWhen": flags >> 1 & 1,
+            }
+        if parent >= 0:
+            nodes[parent]["children"].append(node)
+        nodes.append(node)
+    return nodes[0]
+
+
+class TestColumns(unittest.TestCase):
+    def test_same_network_as_nested(self):
+        for text in ("A", "A&B | !C", "(A|B)&(C|!D)&E | A&!E", "A!B|!AB"):
+            result = synthesize(text)
+            columns = synthesize(text, network_format="columns")
+            for step in ("pdn", "pun"):
+                with self.subTest(text=text, step=step):
+                    network = columns["steps"][step]["network"]
+                    self.assertEqual(nested_from_columns(network), result["steps"][step]["network"])
+            self.assertEqual(columns["steps"]["export"], {"format": "columns"})
+            self.assertEqual(columns["steps"]["count"], result["steps"]["count"])
+
+    def test_layout(self):
+        net = NetworkNode(
+            kind="series",
+            children=(
+                Transistor(kind="nmos", gate="B", gate_inverted=False, on_when=1),
+                NetworkNode(
+                    kind="parallel",
+                    children=(
+                        Transistor(kind="nmos", gate="A", gate_inverted=True, on_when=0),
+                        Transistor(kind="nmos", gate="B", gate_inverted=False, on_when=1),
+                    ),
+                ),
+            ),
+        )
+        columns = export_network_columns(net)
+        self.assertEqual(columns["gates"], ["B", "A"])
+        self.assertEqual(columns["kind"], [0, 2, 1, 2, 2])
+        self.assertEqual(columns["parent"], [-1, 0, 0, 2, 2])
+        self.assertEqual(columns["gate"], [-1, 0, -1, 1, 0])
+        self.assertEqual(columns["flags"], [0, 2, 0, 1, 2])
+        self.assertEqual(nested_from_columns(columns), export_network_json(net))
+
+    def test_unknown_format(self):
+        with self.assertRaisesRegex(SynthesisError, "Unknown network format 'flat'"):
+            synthesize("A", network_format="flat")
+        cache = ResultCache()
+        cache.synthesize("A&B")
+        columns = cache.synthesize("A&B", network_format="columns")
+        self.assertEqual(columns["steps"]["pdn"]["network"]["format"], "columns")
+
+
+def expand_refs(node, nodes=None):
+    # Inverse of export_network_shared(): every ref replaced by a copy of its node.
+    nodes = {} if nodes is None else nodes
+    if node["type"] == "ref":
+        return expand_refs(nodes[node["ref"]], nodes)
+    if node["type"] == "transistor":
+        return node
+    if "id" in node:
+        nodes[node["id"]] = node
+    return {
+        "type": "node",
+        "kind": node["kind"],
+        "children": [expand_refs(c, nodes) for c in node["children"]],
+    }
+
+
+class TestSharedExport(unittest.TestCase):
+    TEXT = "(A1|A2|A3)&(B1|B2) | (A1|A2|A3)&C1&(D1|D2) | (B1|B2)&(D1|D2)&E1 | (A1|A2|A3)&(D1|D2)&!E1"
+
+    def test_builder_shares_repeated_subterms(self):
+        net = build_network(parse_expr("(A|B)&C | (A|B)&D&!C"), "pmos")
+        first, second = ([c for c in branch.children if isinstance(c, NetworkNode)] for branch in net.children)
+        self.assertIs(first[0], second[0])
+
+    def test_repeats_are_written_once(self):
+        net = build_network(parse_expr("(A|B)&C | (A|B)&D&!C"), "pmos")
+        shared = export_network_shared(net)
+        first, second = ([c for c in branch["children"] if c["type"] != "transistor"] for branch in shared["children"])
+        self.assertEqual(first[0]["id"], 0)
+        self.assertEqual(second, [{"type": "ref", "ref": 0}])
+        self.assertEqual(expand_refs(shared), export_network_json(net))
+
+    def test_synthesize(self):
+        nested = synthesize(self.TEXT)
+        shared = synthesize(self.TEXT, network_format="shared")
+        self.assertEqual(shared["steps"]["export"], {"format": "shared"})
+        self.assertEqual(shared["steps"]["count"], nested["steps"]["count"])
+        for step in ("pdn", "pun"):
+            with self.subTest(step=step):
+                network = shared["steps"][step]["network"]
+                self.assertIn('"ref"', json.dumps(network))
+                self.assertEqual(expand_refs(network), nested["steps"][step]["network"])
+        # Without repeats the export is the nested one.
+        self.assertEqual(synthesize("A&B|C", network_format="shared")["steps"]["pdn"], synthesize("A&B|C")["steps"]["pdn"])
+
+
+class TestMessagePack(unittest.TestCase):
+    def test_round_trip(self):
+        values = [
+            None,
+            True,
+            0.25,
+            -1,
+            -33,
+            300,
+            2**40,
+            -(2**40),
+            "x" * 40,
+            "ü" * 300,
+            b"\x00\x01",
+            [],
+            list(range(-32, 128)),
+            [-1, 5000, -70000],
+            [True, 2],
+            {"a": [1, {"b": None}], "c": {}},
+        ]
+        for value in values:
+            with self.subTest(value=repr(value)[:20]):
+                self.assertEqual(unpackb(packb(value)), value)
+
+    def test_wire_format(self):
+        self.assertEqual(packb({"a": [1, -1, None]}), b"\x81\xa1a\x93\x01\xff\xc0")
+        self.assertEqual(packb([300, 1]), b"\x92\xd2\x00\x00\x01\x2c\xd2\x00\x00\x00\x01")
+        self.assertEqual(packb("x" * 32)[:2], b"\xd9\x20")
+        self.assertEqual(packb(list(range(16)))[:3], b"\xdc\x00\x10")
+
+    def test_response(self):
+        result = synthesize("A&(B|C)", network_format="columns")
+        self.assertEqual(unpackb(packb(result)), result)
+        self.assertLess(len(packb(result)), len(str(synthesize("A&(B|C)"))))
+
+
+class TestStreamingJSON(unittest.TestCase):
+    def test_same_bytes_as_json_dumps(self):
+        values = [
+            synthesize("A&(B|!C)", timings=True),
+            {"a": [], "b": {}, "c": [1, -2, 3.5, None, True, "x"], 1: "int key", None: False, 2.5: [[]]},
+            ["ü\n\"", ["nested", [1, [2.0]]], float("nan"), float("inf"), -float("inf"), 10**30],
+            (("tuple", 1),),
+            "plain",
+            7,
+        ]
+        for value in values:
+            with self.subTest(value=repr(value)[:30]):
+                expected = json.dumps(value, separators=(",", ":")).encode()
+                self.assertEqual(b"".join(iter_json(value)), expected)
+                self.assertEqual(json_size(value), len(expected))
+        with self.assertRaises(TypeError):
+            b"".join(iter_json({"a": object()}))
+
+    def test_chunks(self):
+        value = {"rows": [{"i": i, "tag": "r"} for i in range(1000)]}
+        chunks = list(iter_json(value, chunk_items=64))
+        self.assertGreater(len(chunks), 10)
+        self.assertEqual(json.loads(b"".join(chunks)), value)
+
+    def test_depth_past_the_recursion_limit(self):
+        value = inner = {}
+        for _ in range(2 * sys.getrecursionlimit()):
+            inner["children"] = [{}]
+            inner = inner["children"][0]
+        self.assertEqual(json_size(value), len(b"".join(iter_json(value))))
+        cache = ResultCache()
+        cache.put("deep", value)
+        self.assertGreater(cache.stats()["bytes"], 0)
+
+
+class TestNegotiation(unittest.TestCase):
+    def test_format_wins_over_accept(self):
+        self.assertEqual(response_format(), "json")
+        self.assertEqual(response_format("columns", "application/msgpack"), "columns")
+        with self.assertRaisesRegex(SynthesisError, "Unknown format 'xml'"):
+            response_format("xml")
+
+    def test_accept(self):
+        cases = {
+            "application/msgpack": "msgpack",
+            "application/x-msgpack, application/json;q=0.5": "msgpack",
+            "application/json, application/msgpack;q=0.9": "json",
+            "application/vnd.bool2cmos.columns+json": "columns",
+            "application/vnd.bool2cmos.shared+json": "shared",
+            "text/html, application/msgpack;q=0": "json",
+            "*/*": "json",
+        }
+        for accept, fmt in cases.items():
+            with self.subTest(accept=accept):
+                self.assertEqual(response_format(None, accept), fmt)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import random
+import unittest
+
+from bool2cmos.backend.api.synthesize import SynthesisError, literal_count, nnf, parse_expr, synthesize
+from bool2cmos.backend.synthesis.exact import MAX_PAIRS, _Enumeration, minimum_formula
+from bool2cmos.backend.verify.truth_table import truth_tables
+
+
+class TestExactSynthesis(unittest.TestCase):
+    def test_finds_formula_below_bound(self):
+        expr = nnf(parse_expr("AB+AC+AD+BC"))
+        result = minimum_formula(expr, ["A", "B", "C", "D"], literal_count(expr))
+        self.assertTrue(result.optimal)
+        self.assertEqual(result.leaves, 6)
+        self.assertEqual(literal_count(result.expr), 6)
+        self.assertEqual(*truth_tables([expr, result.expr], ["A", "B", "C", "D"]))
+
+    def test_proves_bound_optimal(self):
+        # XOR needs four leaves; nothing smaller exists.
+        result = minimum_formula(parse_expr("A!B+!AB"), ["A", "B"], 4)
+        self.assertIsNone(result.expr)
+        self.assertTrue(result.optimal)
+        self.assertEqual(result.leaves, 4)
+
+    def test_shared_enumeration_matches_fresh_ones(self):
+        # Earlier searches must not change what later ones find.  These
+        # orders used to leave found targets out of their level.
+        names = ["A", "B", "C"]
+        for seed in (16, 32):
+            targets = list(range(1, 255))
+            random.Random(seed).shuffle(targets)
+            shared = _Enumeration(3, MAX_PAIRS)
+            for target in targets:
+                with self.subTest(seed=seed, target=bin(target)):
+                    leaves, optimal, root = shared.search(target, 16)
+                    self.assertEqual(leaves, _Enumeration(3, MAX_PAIRS).search(target, 16)[0])
+                    formula = shared.build_root(root, names)
+                    self.assertEqual(truth_tables([formula], names), [target])
+                    self.assertEqual(literal_count(formula), leaves)
+
+    def test_pipeline_exact_mode(self):
+        steps = synthesize("AB+AC+BC", mode="exact")["steps"]
+        self.assertEqual(steps["exact"]["status"], "optimal")
+        self.assertEqual(steps["exact"]["leaves"], 5)
+        self.assertEqual(steps["count"]["pdnTransistors"], 5)
+        self.assertEqual(steps["count"]["punTransistors"], 5)
+        names = ["A", "B", "C"]
+        f = parse_expr(steps["factor"]["expr"])
+        g = parse_expr(steps["factorComplement"]["expr"])
+        tf, tg = truth_tables([f, g], names)
+        self.assertEqual(tf, truth_tables([parse_expr("AB+AC+BC")], names)[0])
+        self.assertEqual(tf ^ tg, (1 << 8) - 1)
+        self.assertNotIn("exact", synthesize("AB+AC+BC")["steps"])
+
+    def test_exact_mode_skips_wide_functions(self):
+        steps = synthesize("X1&X2|X3&X4|X5&X6", mode="exact")["steps"]
+        self.assertEqual(steps["exact"]["status"], "skipped")
+        self.assertEqual(steps["count"]["totalTransistors"], 24)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(SynthesisError):
+            synthesize("A", mode="fastest")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import copy
+import pickle
+import unittest
+
+from bool2cmos.backend.api.synthesize import (
+    And,
+    Const,
+    Not,
+    Or,
+    Var,
+    expr_to_str,
+    factor,
+    parse_expr,
+    simplify,
+)
+
+
+class TestExprDag(unittest.TestCase):
+    def test_structurally_equal_nodes_are_identical(self):
+        a1 = And((Var("A"), Not(Var("B"))))
+        a2 = And((Var("A"), Not(Var("B"))))
+        self.assertIs(a1, a2)
+        self.assertEqual(hash(a1), a1.uid)
+        self.assertIsNot(a1, And((Not(Var("B")), Var("A"))))
+
+    def test_const_is_normalized_to_bool(self):
+        self.assertIs(Const(1), Const(True))
+        self.assertIsNot(Const(True), Const(False))
+
+    def test_parser_shares_repeated_subterms(self):
+        expr = parse_expr("(A&B)|(C&(A&B))")
+        self.assertIsInstance(expr, Or)
+        left, right = expr.children
+        self.assertIs(left, right.children[1])
+
+    def test_nodes_are_immutable(self):
+        v = Var("A")
+        with self.assertRaises(AttributeError):
+            v.name = "B"  # type: ignore[misc]
+
+    def test_pickle_and_copy_reintern(self):
+        expr = parse_expr("A&(B|!C)")
+        self.assertIs(pickle.loads(pickle.dumps(expr)), expr)
+        self.assertIs(copy.deepcopy(expr), expr)
+
+    def test_sort_key_matches_rendered_order_for_literals_and_terms(self):
+        nodes = [
+            parse_expr(t)
+            for t in ("B", "!A", "A&B", "A|B", "1", "!(B&C)", "A", "!C", "A&!B")
+        ]
+        by_key = sorted(nodes, key=lambda e: e.sort_key)
+        by_str = sorted(nodes, key=expr_to_str)
+        self.assertEqual([expr_to_str(e) for e in by_key], [expr_to_str(e) for e in by_str])
+
+    def test_sort_key_is_independent_of_construction_order(self):
+        self.assertEqual(expr_to_str(simplify(parse_expr("C|B&A|!D"))), "!D|A&B|C")
+        self.assertEqual(expr_to_str(simplify(parse_expr("!D|A&B|C"))), "!D|A&B|C")
+
+    def test_deep_sort_keys_compare_without_recursing(self):
+        left, right = Var("X"), Var("Y")
+        for i in range(500):
+            left = And((Var(f"V{i % 3}"), Or((Var("W"), left))))
+            right = And((Var(f"V{i % 3}"), Or((Var("W"), right))))
+        self.assertEqual(left.sort_key[2], 1)  # digest form past the depth limit
+        self.assertNotEqual(left.sort_key, right.sort_key)
+        sorted([left, right], key=lambda e: e.sort_key)
+
+    def test_transforms_return_interned_nodes(self):
+        expr = parse_expr("A&B | A&C")
+        self.assertIs(simplify(expr), simplify(parse_expr("A&C | B&A")))
+        self.assertIs(factor(expr), And((Var("A"), Or((Var("B"), Var("C"))))))
+
+
+if __name__ == "__main__":
+    unittest.main()
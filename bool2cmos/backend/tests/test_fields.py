@@ -0,0 +1,77 @@
+import importlib
+import unittest
+from unittest import mock
+
+from bool2cmos.backend.api.result_cache import ResultCache
+from bool2cmos.backend.api.synthesize import (
+    SYNTHESIS_STEPS,
+    SynthesisError,
+    SynthesisResult,
+    synthesize,
+    synthesize_batch,
+)
+
+# The package re-exports the synthesize() function under the module's name.
+api = importlib.import_module("bool2cmos.backend.api.synthesize")
+
+
+class TestFieldSelection(unittest.TestCase):
+    def test_all_steps_by_default(self):
+        full = synthesize("A&B | !C")
+        self.assertEqual(synthesize("A&B | !C", fields=SYNTHESIS_STEPS), full)
+        self.assertEqual(list(full["steps"]), [s for s in SYNTHESIS_STEPS if s not in ("exact",)])
+
+    def test_count_only_renders_nothing(self):
+        with mock.patch.object(api, "expr_to_str", wraps=api.expr_to_str) as render:
+            with mock.patch.object(api, "export_network_json", wraps=api.export_network_json) as export:
+                result = synthesize("A&(B|C) | !A&D", fields=["count"])
+        self.assertEqual(render.call_count, 0)
+        self.assertEqual(export.call_count, 0)
+        self.assertEqual(list(result["steps"]), ["count"])
+        self.assertEqual(result["steps"]["count"], synthesize("A&(B|C) | !A&D")["steps"]["count"])
+
+    def test_only_the_stages_needed_run(self):
+        with mock.patch.object(api, "build_network", wraps=api.build_network) as build:
+            with mock.patch.object(api, "_minimize", wraps=api._minimize) as minimize:
+                result = synthesize("A+B", fields="nnfComplement,parse")
+        self.assertEqual(build.call_count, 0)
+        self.assertEqual(minimize.call_count, 0)
+        self.assertEqual(result["steps"], {"parse": {"expr": "A+B"}, "nnfComplement": {"expr": "!A!B"}})
+
+    def test_steps_follow_the_response_order(self):
+        result = synthesize("A&B", fields=["pun", "factor", "pun"])
+        self.assertEqual(list(result["steps"]), ["factor", "pun"])
+        self.assertEqual(list(synthesize("A&B", fields=["exact"])["steps"]), [])
+        self.assertIn("exact", synthesize("A&B", mode="exact", fields=["exact"])["steps"])
+
+    def test_lazy_result(self):
+        result = SynthesisResult("A|B&C")
+        with mock.patch.object(api, "export_network_json", wraps=api.export_network_json) as export:
+            pdn = result.step("pdn")
+            self.assertIs(result.step("pdn"), pdn)
+            self.assertEqual(export.call_count, 1)
+        self.assertEqual(result.to_dict(), synthesize("A|B&C"))
+
+    def test_unknown_step(self):
+        with self.assertRaisesRegex(SynthesisError, "Unknown step 'pdnn'"):
+            synthesize("A", fields=["pdnn"])
+        with self.assertRaisesRegex(SynthesisError, "Unknown step 'count '"):
+            SynthesisResult("A").step("count ")
+        records = list(synthesize_batch(["A", "B&C"], fields=["count"]))
+        self.assertEqual([list(r["result"]["steps"]) for r in records], [["count"], ["count"]])
+
+    def test_timings_cover_the_stages_run(self):
+        timings = synthesize("A&B", timings=True, fields=["simplify"])["timings"]
+        self.assertEqual(list(timings["stages"]), ["parse", "simplify", "render"])
+
+    def test_result_cache_keys_on_fields(self):
+        cache = ResultCache()
+        count = cache.synthesize("A&B", fields=["count"])
+        self.assertEqual(list(count["steps"]), ["count"])
+        self.assertEqual(list(cache.synthesize("A & B", fields=("count",))["steps"]), ["count"])
+        self.assertIn("pdn", cache.synthesize("A&B")["steps"])
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
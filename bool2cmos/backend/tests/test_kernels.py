@@ -0,0 +1,41 @@
+import unittest
+
+from bool2cmos.backend.api.synthesize import expr_to_str, factor, literal_count, nnf, parse_expr, simplify
+from bool2cmos.backend.logic.kernels import divide, kernel_factor, kernels
+
+
+class TestKernels(unittest.TestCase):
+    def test_kernels_and_cokernels(self):
+        # a&b | a&c | d&b | d&c with atoms a=1, b=2, c=4, d=8.
+        cover = [0b0011, 0b0101, 0b1010, 0b1100]
+        found = set(kernels(cover))
+        self.assertIn((0b0001, (0b0010, 0b0100)), found)  # a * (b + c)
+        self.assertIn((0b1000, (0b0010, 0b0100)), found)  # d * (b + c)
+        self.assertIn((0b0010, (0b0001, 0b1000)), found)  # b * (a + d)
+        self.assertIn((0, tuple(sorted(cover))), found)  # the cover is cube-free
+
+    def test_weak_division(self):
+        # (a&b | a&c | d&b | d&c | e) / (b + c) = (a + d), remainder e.
+        cover = [0b00011, 0b00101, 0b01010, 0b01100, 0b10000]
+        self.assertEqual(divide(cover, [0b0010, 0b0100]), ([0b0001, 0b1000], [0b10000]))
+        self.assertEqual(divide(cover, [0b10000, 0b0001]), ([], cover))
+
+    def test_partial_sharing(self):
+        for text, expected in (
+            ("A&B|A&C|D&B|D&C", "(A|D)&(B|C)"),
+            ("A&C|A&D|B&C|B&D|E", "(A|B)&(C|D)|E"),
+            ("(A|B)&(A|C)&(D|B)&(D|C)", "A&D|B&C"),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(expr_to_str(factor(simplify(parse_expr(text)))), expected)
+
+    def test_factor_never_grows_literals(self):
+        for text in ("A+B", "AB", "ABC+ABD+E", "ABE+ACE+ADE+BF+CF"):
+            expr = nnf(parse_expr(text))
+            self.assertLessEqual(literal_count(factor(expr)), literal_count(expr))
+        self.assertEqual(literal_count(factor(nnf(parse_expr("ABE+ACE+ADE+BF+CF")))), 8)
+        self.assertIsNone(kernel_factor(parse_expr("A")))
+
+
+if __name__ == "__main__":
+    unittest.main()
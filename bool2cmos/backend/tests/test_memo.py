@@ -0,0 +1,55 @@
+import unittest
+
+from bool2cmos.backend.api.synthesize import (
+    MemoTable,
+    TransformCache,
+    Var,
+    nnf,
+    parse_expr,
+    synthesize,
+)
+
+
+class TestMemoTable(unittest.TestCase):
+    def test_lru_eviction(self):
+        table = MemoTable(maxsize=2)
+        a, b, c = Var("A"), Var("B"), Var("C")
+        table.put(a, 1)
+        table.put(b, 2)
+        self.assertEqual(table.get(a), 1)  # a is now most recently used
+        table.put(c, 3)
+        self.assertIsNone(table.get(b))
+        self.assertEqual(table.get(a), 1)
+        self.assertEqual(table.get(c), 3)
+        self.assertEqual(table.stats(), {"hits": 3, "misses": 1, "evictions": 1, "size": 2, "maxsize": 2})
+
+    def test_rejects_non_positive_size(self):
+        with self.assertRaises(ValueError):
+            MemoTable(maxsize=0)
+
+
+class TestTransformCache(unittest.TestCase):
+    def test_shared_subterms_are_simplified_once(self):
+        cache = TransformCache()
+        nnf(parse_expr("!((A&B)|(C&(A&B))|!(A&B))"), cache)
+        stats = cache.stats()
+        self.assertGreater(stats["simplify"]["hits"], 0)
+
+    def test_cache_shared_across_requests(self):
+        cache = TransformCache()
+        first = synthesize("A&B|C&D|!(A&C)|E&F", cache=cache)
+        misses = {name: s["misses"] for name, s in cache.stats().items()}
+        second = synthesize("A&B|C&D|!(A&C)|E&F", cache=cache)
+        self.assertEqual(first, second)
+        after = cache.stats()
+        for name, s in after.items():
+            self.assertEqual(s["misses"], misses[name], name)
+        self.assertGreater(after["factor"]["hits"], 0)
+
+    def test_bounded_cache_matches_unbounded(self):
+        expr = "A&(B|C)|!(D&(A|!B))|C&D"
+        self.assertEqual(synthesize(expr, cache=TransformCache(maxsize=1)), synthesize(expr))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from bool2cmos.backend.api.metrics import Histogram, MetricsRegistry
+from bool2cmos.backend.api.result_cache import ResultCache
+from bool2cmos.backend.api.synthesize import inspect_complement_nnf, synthesize
+
+
+class TestStageTimings(unittest.TestCase):
+    def test_synthesize_reports_every_stage(self):
+        result = synthesize("A&B | !C&(D|E)", timings=True)
+        timings = result["timings"]
+        self.assertEqual(
+            list(timings["stages"]),
+            ["parse", "simplify", "complement", "nnf", "library", "minimize", "factor", "pdn", "pun", "count", "render"],
+        )
+        self.assertTrue(all(ms >= 0 for ms in timings["stages"].values()))
+        self.assertAlmostEqual(timings["totalMs"], sum(timings["stages"].values()), delta=0.01)
+        self.assertEqual(timings["nodes"]["simplify"], {"before": 10, "after": 10})
+        self.assertEqual(set(timings["nodes"]), {"simplify", "nnf", "minimize", "factor"})
+
+        exact = synthesize("A&B | !C&(D|E)", mode="exact", timings=True)["timings"]
+        self.assertIn("exact", exact["stages"])
+
+    def test_node_counts_share_subterms(self):
+        # (A|B) appears twice but is one node: 8 DAG nodes against 11 in the tree.
+        timings = synthesize("(A|B)&C | (A|B)&D", timings=True)["timings"]
+        self.assertEqual(timings["nodes"]["simplify"]["before"], 8)
+
+    def test_inspect_reports_stages(self):
+        timings = inspect_complement_nnf("!(A&B)", timings=True)["timings"]
+        self.assertEqual(list(timings["stages"]), ["parse", "simplify", "complement", "nnf", "check", "render"])
+
+    def test_off_by_default(self):
+        self.assertNotIn("timings", synthesize("A&B"))
+        self.assertNotIn("timings", inspect_complement_nnf("A&B"))
+        self.assertEqual(synthesize("A&B", timings=True)["steps"], synthesize("A&B")["steps"])
+
+    def test_result_cache_does_not_store_timings(self):
+        cache = ResultCache()
+        first = cache.synthesize("A|B", timings=True)
+        self.assertIn("stages", first["timings"])
+        self.assertEqual(cache.synthesize("A | B", timings=True)["timings"], {"cached": True})
+        self.assertNotIn("timings", cache.synthesize("A|B"))
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        h = Histogram("x_seconds", "help", (0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            h.observe(value, stage="parse")
+        lines = h.render()
+        self.assertIn('x_seconds_bucket{stage="parse",le="0.1"} 1', lines)
+        self.assertIn('x_seconds_bucket{stage="parse",le="1"} 2', lines)
+        self.assertIn('x_seconds_bucket{stage="parse",le="+Inf"} 3', lines)
+        self.assertIn('x_seconds_sum{stage="parse"} 5.55', lines)
+        self.assertIn('x_seconds_count{stage="parse"} 3', lines)
+
+    def test_registry_renders_prometheus_text(self):
+        registry = MetricsRegistry()
+        registry.observe("synthesize", synthesize("A&B|C", timings=True)["timings"])
+        registry.observe("synthesize", {"cached": True})
+        registry.failed("synthesize", "error")
+        text = registry.render({"bool2cmos_pool": {"inFlight": 2, "timeout": None}})
+        self.assertTrue(text.endswith("\n"))
+        self.assertIn("# TYPE bool2cmos_stage_seconds histogram", text)
+        self.assertIn('bool2cmos_stage_seconds_count{endpoint="synthesize",stage="parse"} 1', text)
+        self.assertIn(
+            'bool2cmos_transform_nodes_count{endpoint="synthesize",phase="before",transform="simplify"} 1', text
+        )
+        self.assertIn('bool2cmos_requests_total{endpoint="synthesize",outcome="ok"} 1', text)
+        self.assertIn('bool2cmos_requests_total{endpoint="synthesize",outcome="cached"} 1', text)
+        self.assertIn('bool2cmos_requests_total{endpoint="synthesize",outcome="error"} 1', text)
+        self.assertIn("bool2cmos_pool_in_flight 2", text)
+        self.assertNotIn("bool2cmos_pool_timeout", text)
+
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        registry.observe("synthesize", synthesize("A", timings=True)["timings"])
+        registry.failed("synthesize", "timeout")
+        self.assertNotIn("bool2cmos_requests_total{", registry.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import importlib
+import unittest
+from unittest import mock
+
+from bool2cmos.backend.api.synthesize import Const, nnf, parse_expr, synthesize
+from bool2cmos.backend.logic import minimize as heuristic
+from bool2cmos.backend.logic.minimize import (
+    espresso,
+    exact_cover,
+    minimize,
+    prime_implicants,
+)
+from bool2cmos.backend.verify.truth_table import truth_tables
+
+api = importlib.import_module("bool2cmos.backend.api.synthesize")
+
+
+def _same_function(a, b, names):
+    ta, tb = truth_tables([a, b], names)
+    return ta == tb
+
+
+class TestMinimize(unittest.TestCase):
+    def test_prime_implicants_of_majority(self):
+        # A&B | A&C | B&C over (A, B, C): rows 3, 5, 6, 7.
+        onset = (1 << 3) | (1 << 5) | (1 << 6) | (1 << 7)
+        self.assertEqual(sorted(prime_implicants(onset, 3)), [(0b011, 0b011), (0b101, 0b101), (0b110, 0b110)])
+
+    def test_exact_cover_drops_consensus_term(self):
+        result = minimize(nnf(parse_expr("AB+!AC+BC")))
+        self.assertEqual(result.method, "exact")
+        self.assertEqual((result.cubes, result.literals), (2, 4))
+        self.assertTrue(_same_function(result.expr, parse_expr("AB+!AC"), ["A", "B", "C"]))
+
+    def test_exact_cover_constants(self):
+        self.assertEqual(exact_cover(0, 3), ([], True))
+        self.assertEqual(exact_cover((1 << 8) - 1, 3), ([(0, 0)], True))
+        self.assertIs(minimize(nnf(parse_expr("A|!A"))).expr, Const(True))
+
+    def test_heuristic_path_keeps_function(self):
+        # 12 variables: above the exact limit.  Every X_i&Y_i&Z term is covered
+        # by X_i&Y_i, and the last two terms merge on Z.
+        names = sorted({f"X{i}" for i in range(4)} | {f"Y{i}" for i in range(4)} | {"Z", "W", "U", "V"})
+        text = "|".join(f"X{i}&Y{i}|X{i}&Y{i}&Z" for i in range(4)) + "|Z&W&U&V|!Z&W&U&V"
+        expr = nnf(parse_expr(text))
+        result = minimize(expr)
+        self.assertEqual(result.method, "heuristic")
+        self.assertEqual((result.cubes, result.literals), (5, 11))
+        self.assertTrue(_same_function(expr, result.expr, names))
+
+    def test_espresso_merges_adjacent_cubes(self):
+        # a&b | a&!b | !a&b  ->  a | b
+        cover = [(0b11, 0b11), (0b11, 0b01), (0b11, 0b10)]
+        self.assertEqual(sorted(espresso(cover)), [(0b01, 0b01), (0b10, 0b10)])
+
+    def test_distribution_blowup_is_skipped(self):
+        expr = nnf(parse_expr("&".join(f"(X{i}|Y{i})" for i in range(12))))
+        result = minimize(expr, max_cubes=64)
+        self.assertEqual(result.method, "skipped")
+        self.assertIs(result.expr, expr)
+
+    def test_pipeline_uses_minimized_form_only_when_smaller(self):
+        # Six inputs, so that the NPN library does not answer first.
+        steps = synthesize("(AB+AC+DB+DC)EF")["steps"]
+        self.assertEqual(steps["minimizeComplement"]["method"], "exact")
+        self.assertEqual(steps["factorComplement"]["expr"], "!A!D+!B!C+!E+!F")
+        self.assertEqual(steps["count"]["pdnTransistors"], 6)
+        steps = synthesize("A(B+C)+DEF")["steps"]
+        self.assertEqual(steps["factor"]["expr"], "A(B+C)+DEF")
+
+    def test_pipeline_factors_one_form_per_polarity(self):
+        text = "|".join(f"X{i}&Y{i}|X{i}&Y{i}&Z" for i in range(4)) + "|Z&W&U&V|!Z&W&U&V"
+        with mock.patch.object(api, "factor", wraps=api.factor) as factor:
+            steps = synthesize(text)["steps"]
+        self.assertEqual(factor.call_count, 2)
+        self.assertEqual(steps["minimize"]["literals"], 11)
+        self.assertLessEqual(steps["count"]["punTransistors"], 11)
+
+    def test_heuristic_work_scales_with_the_cover(self):
+        limits = []
+        real = heuristic._Work
+
+        def work(left):
+            limits.append(left)
+            return real(left)
+
+        small = [(0b11, 0b11), (0b11, 0b01), (0b11, 0b10)]
+        large = [(0xFFFFF, i * 7919 & 0xFFFFF) for i in range(300)]
+        with mock.patch.object(heuristic, "_Work", side_effect=work):
+            espresso(small)
+            espresso(large)
+            espresso(small, work_limit=10)
+        self.assertEqual(limits[0], heuristic._MIN_WORK)
+        self.assertEqual(limits[1], min(heuristic._WORK_LIMIT, 20 * 300 * heuristic._WORK_PER_LITERAL))
+        self.assertEqual(limits[2], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
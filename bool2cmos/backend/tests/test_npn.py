@@ -0,0 +1,108 @@
+import importlib
+import itertools
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from bool2cmos.backend.api.synthesize import literal_count, parse_expr, synthesize
+from bool2cmos.backend.synthesis.npn import (
+    NPNLibrary,
+    encode,
+    lookup,
+    npn_canonical,
+    write_library,
+    _plain_changes,
+)
+from bool2cmos.backend.verify.truth_table import truth_tables
+
+api = importlib.import_module("bool2cmos.backend.api.synthesize")
+
+
+def _transform(tt, n, perm, negations, output):
+    # c(x) = output ^ f(y) with y[k] = x[perm[k]] ^ bit k of negations.
+    out = 0
+    for x in range(1 << n):
+        y = sum((((x >> perm[k]) & 1) ^ ((negations >> k) & 1)) << k for k in range(n))
+        out |= (((tt >> y) & 1) ^ output) << x
+    return out
+
+
+class TestNPN(unittest.TestCase):
+    def test_plain_changes_visit_every_permutation(self):
+        for n in range(1, 6):
+            perm = list(range(n))
+            seen = {tuple(perm)}
+            for i in _plain_changes(n):
+                perm[i], perm[i + 1] = perm[i + 1], perm[i]
+                seen.add(tuple(perm))
+            self.assertEqual(len(seen), len(list(itertools.permutations(range(n)))))
+
+    def test_canonical_form_is_class_invariant(self):
+        rng = random.Random(7)
+        for n in (3, 4, 5):
+            for _ in range(10):
+                tt = rng.getrandbits(1 << n)
+                canonical, transform = npn_canonical(tt, n)
+                self.assertEqual(_transform(tt, n, *transform), canonical)
+                perm = list(range(n))
+                rng.shuffle(perm)
+                other = _transform(tt, n, perm, rng.getrandbits(n), rng.getrandbits(1))
+                self.assertEqual(npn_canonical(other, n)[0], canonical)
+
+    def test_library_round_trip(self):
+        names = ["A", "B", "C", "D"]
+        majority = parse_expr("A&(B|C)|B&C")
+        (tt,) = truth_tables([majority], names[:3])
+        canonical, _ = npn_canonical(tt | tt << 8, 4)
+        # Entries hold a formula for the canonical member of the class.
+        formula = lookup(canonical, names).expr
+        self.assertEqual(truth_tables([formula], names)[0], canonical)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lib.bin")
+            self.assertEqual(write_library(path, [(4, canonical, True, encode(formula, names))]), 1)
+            library = NPNLibrary(path)
+            try:
+                self.assertIsNone(library.get(4, canonical + 1))
+                # The complement is in the same class and comes back as the dual.
+                match = lookup(tt ^ 0xFF, ["X", "Y", "Z"], library)
+                self.assertEqual(match.leaves, 5)
+                self.assertEqual(truth_tables([match.expr], ["X", "Y", "Z"])[0], tt ^ 0xFF)
+            finally:
+                library.close()
+
+    def test_shipped_library_covers_four_inputs(self):
+        rng = random.Random(3)
+        names = ["P", "Q", "R", "S"]
+        for _ in range(50):
+            tt = rng.randrange(1, (1 << 16) - 1)
+            match = lookup(tt, names)
+            self.assertTrue(match.optimal)
+            self.assertEqual(truth_tables([match.expr], names)[0], tt)
+            self.assertEqual(literal_count(match.expr), match.leaves)
+
+    def test_pipeline_uses_library(self):
+        # One-hot of four inputs: the SOP factors to 16 leaves, the minimum is 12.
+        steps = synthesize("A!B!C!D+!AB!C!D+!A!BC!D+!A!B!CD")["steps"]
+        self.assertEqual(steps["library"]["leaves"], 12)
+        self.assertEqual(steps["count"]["punTransistors"], 12)
+        self.assertEqual(steps["count"]["pdnTransistors"], 12)
+        steps = synthesize("AB+CD+E", mode="exact")["steps"]
+        self.assertEqual(steps["library"]["inputs"], 5)
+        self.assertEqual(steps["exact"]["source"], "library")
+        self.assertNotIn("library", synthesize("X1&X2|X3&X4|X5&X6")["steps"])
+
+    def test_library_hit_skips_minimize_and_factor(self):
+        with mock.patch.object(api, "factor", wraps=api.factor) as factor:
+            with mock.patch.object(api, "_minimize", wraps=api._minimize) as minimize:
+                steps = synthesize("A&B|C&D|E")["steps"]
+                self.assertEqual((factor.call_count, minimize.call_count), (0, 0))
+                self.assertEqual(steps["minimize"]["method"], "skipped")
+                self.assertEqual(steps["count"]["punTransistors"], steps["library"]["leaves"])
+                synthesize("X1&X2|X3&X4|X5&X6")
+                self.assertEqual((factor.call_count, minimize.call_count), (2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
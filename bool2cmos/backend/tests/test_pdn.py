@@ -3,7 +3,7 @@ from bool2cmos.backend.parser.ast import Var, And, Or, Not
 from bool2cmos.backend.synthesis.pdn_builder import build_pdn
 from bool2cmos.backend.synthesis.pun_builder import build_pun
 from bool2cmos.backend.synthesis.inverter import get_required_inverters, count_inverter_transistors
-from bool2cmos.backend.graph.network import NodeType, MosType
+from bool2cmos.backend.graph.network import NodeType, MosType, Transistor
 
 class TestSynthesis(unittest.TestCase):
     def setUp(self):
@@ -75,5 +75,23 @@ class TestSynthesis(unittest.TestCase):
         self.assertEqual(invs, ['~C'])
         self.assertEqual(count_inverter_transistors(invs), 2)
 
+    def test_transistors_are_shared(self):
+        pdn = build_pdn(Or(And(Var('A'), Var('B')), And(Var('A'), Not(Var('C')))))
+        self.assertIs(pdn.children[0].children[0], pdn.children[1].children[0])
+        self.assertIs(Transistor('A', MosType.NMOS), pdn.children[0].children[0])
+        self.assertIsNot(Transistor('A', MosType.PMOS), pdn.children[0].children[0])
+        leaf = pdn.children[0].children[0]
+        self.assertEqual(leaf.children, ())
+        self.assertFalse(hasattr(leaf, '__dict__'))
+        with self.assertRaises(AttributeError):
+            leaf.gate = 'B'
+        self.assertEqual(build_pun(pdn).to_dict()['children'][0], {
+            "type": "PARALLEL",
+            "children": [
+                {"type": "TRANSISTOR", "gate": "A", "mos_type": "PMOS"},
+                {"type": "TRANSISTOR", "gate": "B", "mos_type": "PMOS"},
+            ],
+        })
+
 if __name__ == '__main__':
     unittest.main()
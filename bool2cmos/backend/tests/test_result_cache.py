@@ -0,0 +1,71 @@
+import unittest
+
+from bool2cmos.backend.api.result_cache import ResultCache, request_key
+from bool2cmos.backend.api.synthesize import SynthesisError, synthesize
+
+
+class TestResultCache(unittest.TestCase):
+    def test_aliases_share_an_entry(self):
+        cache = ResultCache()
+        first = cache.synthesize("A&(B|C)")
+        for text in ("A & (B | C)", "a*(b|c)", "A AND (B OR C)"):
+            result = cache.synthesize(text)
+            self.assertEqual(result["input"]["expression"], text)
+            self.assertEqual(result["steps"], first["steps"])
+            self.assertEqual(result, synthesize(text))
+        self.assertEqual(cache.stats()["hits"], 3)
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_render_style_and_options_are_part_of_the_key(self):
+        self.assertNotEqual(request_key("A+B"), request_key("A|B"))
+        self.assertNotEqual(request_key("AB"), request_key("A&B"))
+        cache = ResultCache()
+        cache.synthesize("A|B")
+        cache.synthesize("A|B", mode="exact")
+        cache.inspect_complement_nnf("A|B")
+        self.assertEqual(cache.stats()["entries"], 3)
+        self.assertEqual(cache.synthesize("A+B")["steps"]["factor"]["expr"], "A+B")
+
+    def test_lru_eviction_by_entries_and_bytes(self):
+        cache = ResultCache(max_entries=2)
+        cache.synthesize("A")
+        cache.synthesize("B")
+        cache.synthesize("A")  # B is now least recently used
+        cache.synthesize("C")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.synthesize("A")
+        self.assertEqual(cache.stats()["hits"], 2)
+
+        one = ResultCache()
+        one.synthesize("A")
+        size = one.stats()["bytes"]
+        cache = ResultCache(max_bytes=2 * size + 1)
+        for text in ("A", "B", "C"):
+            cache.synthesize(text)
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["evictions"]), (2, 1))
+        self.assertLessEqual(stats["bytes"], 2 * size + 1)
+
+    def test_ttl_expiry(self):
+        now = [0.0]
+        cache = ResultCache(ttl=10, clock=lambda: now[0])
+        cache.synthesize("A&B")
+        now[0] = 5
+        cache.synthesize("A&B")
+        now[0] = 16
+        cache.synthesize("A&B")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["expirations"]), (1, 2, 1))
+
+    def test_errors_are_not_cached(self):
+        cache = ResultCache()
+        for _ in range(2):
+            with self.assertRaises(SynthesisError):
+                cache.synthesize("A&(")
+        with self.assertRaises(SynthesisError):
+            cache.synthesize("A#B")
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import itertools
+import random
+import unittest
+
+from bool2cmos.backend.api.synthesize import factor, inspect_complement_nnf, nnf, parse_expr
+from bool2cmos.backend.verify.sat import SATBudgetExceeded, SATSolver, check_equivalence
+
+
+def _pigeonhole(pigeons, holes):
+    solver = SATSolver()
+    x = {(p, h): solver.new_var() for p in range(pigeons) for h in range(holes)}
+    for p in range(pigeons):
+        solver.add_clause([x[p, h] for h in range(holes)])
+    for h in range(holes):
+        for a, b in itertools.combinations(range(pigeons), 2):
+            solver.add_clause([-x[a, h], -x[b, h]])
+    return solver
+
+
+class TestSATSolver(unittest.TestCase):
+    def test_matches_brute_force_on_random_cnf(self):
+        rng = random.Random(7)
+        for _ in range(150):
+            n = rng.randint(2, 8)
+            clauses = [
+                [rng.choice((1, -1)) * rng.randint(1, n) for _ in range(rng.randint(1, 3))]
+                for _ in range(rng.randint(1, 4 * n))
+            ]
+            solver = SATSolver()
+            for _ in range(n):
+                solver.new_var()
+            for clause in clauses:
+                solver.add_clause(clause)
+            expected = any(
+                all(any((lit > 0) == bits[abs(lit) - 1] for lit in c) for c in clauses)
+                for bits in itertools.product((False, True), repeat=n)
+            )
+            self.assertEqual(solver.solve(), expected, clauses)
+            if expected:
+                for c in clauses:
+                    self.assertTrue(any((lit > 0) == solver.value(abs(lit)) for lit in c))
+
+    def test_pigeonhole_is_unsat(self):
+        solver = _pigeonhole(6, 5)
+        self.assertFalse(solver.solve())
+        self.assertGreater(solver.conflicts, 0)
+        self.assertGreater(solver.learnt, 0)
+
+    def test_conflict_budget(self):
+        with self.assertRaises(SATBudgetExceeded):
+            _pigeonhole(8, 7).solve(max_conflicts=10)
+
+
+class TestMiter(unittest.TestCase):
+    def test_counterexample(self):
+        result = check_equivalence(parse_expr("A&B"), parse_expr("A|B"))
+        self.assertFalse(result.equivalent)
+        env = result.counterexample
+        self.assertNotEqual(env["A"] and env["B"], env["A"] or env["B"])
+
+    def test_transformed_outputs_are_equivalent(self):
+        parsed = parse_expr("!(A&(B|!C))|D&(A|E)&!(B&E)")
+        self.assertTrue(check_equivalence(parsed, nnf(parsed)).equivalent)
+        self.assertTrue(check_equivalence(parsed, factor(nnf(parsed))).equivalent)
+
+    def test_constants(self):
+        self.assertTrue(check_equivalence(parse_expr("A|!A"), parse_expr("1")).equivalent)
+        self.assertFalse(check_equivalence(parse_expr("A&0"), parse_expr("A")).equivalent)
+
+    def test_inspect_falls_back_to_sat_when_bdd_blows_up(self):
+        rng = random.Random(5)
+        names = [f"S{i}" for i in range(50)]
+        expr = "|".join(
+            "&".join(("!" if rng.random() < 0.4 else "") + rng.choice(names) for _ in range(4))
+            for _ in range(40)
+        )
+        checks = inspect_complement_nnf(expr)["checks"]
+        self.assertEqual(checks["checkedBy"], "sat")
+        self.assertTrue(checks["nnfEquivalent"])
+        self.assertTrue(checks["nnfComplementEquivalent"])
+
+    def test_inspect_method_sat(self):
+        checks = inspect_complement_nnf("A&(B|!C)", method="sat")["checks"]
+        self.assertEqual(checks["checkedBy"], "sat")
+        self.assertTrue(checks["nnfEquivalent"])
+        self.assertIn("conflicts", checks["sat"]["nnf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
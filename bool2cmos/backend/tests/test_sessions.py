@@ -0,0 +1,128 @@
+import unittest
+
+from bool2cmos.backend.api.result_cache import ResultCache
+from bool2cmos.backend.api.sessions import SessionStore
+from bool2cmos.backend.api.synthesize import (
+    INCREMENTAL_MINIMIZE_VARS,
+    SynthesisError,
+    TransformCache,
+    build_network,
+    factor_local,
+    nnf,
+    parse_expr,
+    synthesize,
+)
+from bool2cmos.backend.verify.truth_table import truth_tables
+
+TERMS = ["A&B", "C&!D", "E&(F|G)", "!H&A", "B&C&E", "D&!F", "G&H", "!A&!E"]
+
+
+def expression(terms):
+    return "|".join(f"({t})" for t in terms)
+
+
+def misses(cache):
+    return {name: s["misses"] for name, s in cache.stats().items()}
+
+
+class TestIncrementalSynthesis(unittest.TestCase):
+    def test_edit_only_transforms_the_changed_spine(self):
+        cache = TransformCache()
+        nnf(parse_expr(expression(TERMS)), cache)
+        before = misses(cache)
+        edited = TERMS[:3] + ["!H&B"] + TERMS[4:]
+        nnf(parse_expr(expression(edited)), cache)
+        after = misses(cache)
+        # The new term and the root: a handful of nodes, not the whole tree.
+        self.assertLessEqual(after["simplify"] - before["simplify"], 4)
+        self.assertLess(after["simplify"] - before["simplify"], before["simplify"])
+        self.assertLessEqual(after["nnf"] - before["nnf"], 4)
+
+    def test_edited_result_matches_a_cold_run(self):
+        cache = TransformCache()
+        synthesize(expression(TERMS), cache=cache)
+        edited = TERMS[:3] + ["!H&B"] + TERMS[4:]
+        self.assertEqual(synthesize(expression(edited), cache=cache), synthesize(expression(edited)))
+        before = misses(cache)
+        synthesize(expression(TERMS), cache=cache)  # undo
+        self.assertEqual(misses(cache), before)
+
+    def test_incremental_mode_refactors_only_the_changed_spine(self):
+        cache = TransformCache()
+        factor_local(nnf(parse_expr(expression(TERMS)), cache), cache)
+        before = misses(cache)
+        edited = TERMS[:3] + ["!H&B"] + TERMS[4:]
+        factor_local(nnf(parse_expr(expression(edited)), cache), cache)
+        self.assertLessEqual(misses(cache)["factor"] - before["factor"], 2)
+
+    def test_incremental_mode_stays_equivalent(self):
+        names = sorted({c for t in TERMS for c in t if c.isalpha()})
+        self.assertGreater(len(names), INCREMENTAL_MINIMIZE_VARS)
+        cache = TransformCache()
+        for cut in range(1, len(TERMS) + 1):
+            expr = expression(TERMS[:cut])
+            with self.subTest(expr=expr):
+                result = synthesize(expr, cache=cache, mode="incremental")
+                factored = parse_expr(result["steps"]["factor"]["expr"])
+                self.assertEqual(truth_tables([factored], names), truth_tables([parse_expr(expr)], names))
+        self.assertEqual(result["steps"]["minimize"]["method"], "skipped")
+        self.assertNotEqual(synthesize("A&B|A&C|D&E|D&F", mode="incremental")["steps"]["minimize"]["method"], "skipped")
+
+    def test_unchanged_subnetworks_are_reused(self):
+        cache = TransformCache()
+        first = build_network(nnf(parse_expr("(A&B|C)&(D|E&F)"), cache), "nmos", cache=cache)
+        second = build_network(nnf(parse_expr("(A&B|C)&(D|E&G)"), cache), "nmos", cache=cache)
+        self.assertIsNot(first, second)
+        shared = {id(c) for c in first.children} & {id(c) for c in second.children}
+        self.assertEqual(len(shared), 1)
+        self.assertGreater(cache.stats()["network"]["hits"], 0)
+        self.assertIs(build_network(nnf(parse_expr("(A&B|C)&(D|E&F)"), cache), "nmos", cache=cache), first)
+        pmos = build_network(nnf(parse_expr("(A&B|C)&(D|E&F)"), cache), "pmos", cache=cache)
+        self.assertIsNot(pmos, first)
+
+    def test_result_cache_runs_misses_on_the_session_cache(self):
+        cache = TransformCache()
+        results = ResultCache()
+        results.synthesize("A&B|C", cache=cache)
+        self.assertGreater(cache.stats()["simplify"]["size"], 0)
+        results.synthesize("A&B|C", cache=TransformCache())
+        self.assertEqual(results.stats()["hits"], 1)
+
+
+class TestSessionStore(unittest.TestCase):
+    def test_cache_is_kept_per_session(self):
+        store = SessionStore()
+        self.assertIs(store.cache("a"), store.cache("a"))
+        self.assertIsNot(store.cache("a"), store.cache("b"))
+        self.assertTrue(store.drop("a"))
+        self.assertFalse(store.drop("a"))
+        self.assertEqual(store.stats()["sessions"], 1)
+        self.assertEqual(store.stats()["created"], 2)
+
+    def test_lru_and_idle_expiry(self):
+        now = [0.0]
+        store = SessionStore(max_sessions=2, ttl=60, clock=lambda: now[0])
+        a = store.cache("a")
+        store.cache("b")
+        store.cache("a")  # b is now least recently used
+        store.cache("c")
+        self.assertEqual(store.stats()["evictions"], 1)
+        self.assertIs(store.cache("a"), a)
+        now[0] = 30
+        store.cache("c")
+        now[0] = 70
+        self.assertEqual(store.stats()["sessions"], 1)
+        self.assertIsNot(store.cache("a"), a)
+        self.assertEqual(store.stats()["expirations"], 1)
+
+    def test_rejects_bad_ids(self):
+        store = SessionStore()
+        for session_id in ("", "x" * 129):
+            with self.assertRaises(SynthesisError):
+                store.cache(session_id)
+        with self.assertRaises(ValueError):
+            SessionStore(ttl=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
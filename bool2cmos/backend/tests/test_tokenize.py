@@ -0,0 +1,66 @@
+import importlib
+import unittest
+from unittest import mock
+
+from bool2cmos.backend.api import result_cache
+from bool2cmos.backend.api.result_cache import ResultCache
+from bool2cmos.backend.api.synthesize import SynthesisError, TokenStream, parse_expr, synthesize, tokenize
+
+# The package re-exports the synthesize() function under the module's name.
+api = importlib.import_module("bool2cmos.backend.api.synthesize")
+
+
+class TestTokenize(unittest.TestCase):
+    def test_implicit_ands_are_inserted_in_one_pass(self):
+        kinds = [kind for kind, _ in tokenize("AB(C+1)!D").tokens]
+        self.assertEqual(
+            kinds,
+            ["IDENT", "AND", "IDENT", "AND", "(", "IDENT", "OR", "CONST", ")", "AND", "NOT", "IDENT", "EOF"],
+        )
+        self.assertEqual(
+            tokenize("a1 and Not b_2").tokens,
+            (("IDENT", "A1"), ("AND", "and"), ("NOT", "Not"), ("IDENT", "B_2"), ("EOF", "")),
+        )
+        self.assertEqual(tokenize("10").tokens, (("CONST", "1"), ("AND", ""), ("CONST", "0"), ("EOF", "")))
+
+    def test_style_comes_from_the_aliases_seen(self):
+        cases = {
+            "A&B|!C": ("!", "|", False),
+            "~A*B+C": ("~", "+", False),
+            "!A~B": ("!", "|", True),
+            "A+B": ("!", "+", True),
+            "AB|C": ("!", "|", True),
+            "A AND B OR NOT C": ("!", "|", False),
+            "A|B+C": ("!", "+", True),
+        }
+        for text, (not_op, or_op, implicit_and) in cases.items():
+            with self.subTest(text=text):
+                style = tokenize(text).style
+                self.assertEqual((style.not_op, style.or_op, style.implicit_and), (not_op, or_op, implicit_and))
+
+    def test_errors(self):
+        with self.assertRaisesRegex(SynthesisError, "Only constants 0/1 are supported, got: 2"):
+            tokenize("A&2")
+        with self.assertRaisesRegex(SynthesisError, "Unexpected character: '#'"):
+            tokenize("A#B")
+
+    def test_key_ignores_spacing_case_and_aliases(self):
+        self.assertEqual(tokenize("a AND (b OR c)").key(), tokenize("A&(B|C)").key())
+        self.assertNotEqual(tokenize("A+B").key(), tokenize("A|B").key())
+
+    def test_pipeline_reuses_a_stream(self):
+        stream = tokenize("A+B!C")
+        self.assertIsInstance(stream, TokenStream)
+        self.assertIs(parse_expr(stream), parse_expr("A+B!C"))
+        self.assertEqual(synthesize(stream), synthesize("A+B!C"))
+
+    def test_result_cache_lexes_once_per_request(self):
+        with mock.patch.object(result_cache, "tokenize", wraps=api.tokenize) as cache_lex:
+            with mock.patch.object(api, "tokenize", wraps=api.tokenize) as pipeline_lex:
+                ResultCache().synthesize("A&B | C")
+        self.assertEqual(cache_lex.call_count, 1)
+        self.assertEqual(pipeline_lex.call_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
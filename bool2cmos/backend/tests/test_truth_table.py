@@ -0,0 +1,66 @@
+import itertools
+import unittest
+
+from bool2cmos.backend.api.synthesize import SynthesisError, _eval, inspect_complement_nnf, parse_expr
+from bool2cmos.backend.verify.truth_table import (
+    MAX_VARS,
+    first_difference,
+    row_assignment,
+    truth_tables,
+    var_mask,
+)
+
+
+class TestTruthTable(unittest.TestCase):
+    def test_var_masks(self):
+        self.assertEqual(var_mask(0, 2), 0b1010)
+        self.assertEqual(var_mask(1, 2), 0b1100)
+        for n in (3, 5):
+            for i in range(n):
+                expected = sum(1 << r for r in range(1 << n) if (r >> i) & 1)
+                self.assertEqual(var_mask(i, n), expected)
+
+    def test_matches_row_by_row_evaluation(self):
+        variables = ["A", "B", "C", "D"]
+        exprs = [parse_expr(t) for t in ("A&!B|C&(D|!A)", "!(A|B)&(C|1)", "A&0|!D")]
+        columns = truth_tables(exprs, variables)
+        for expr, column in zip(exprs, columns):
+            for row, bits in enumerate(itertools.product((0, 1), repeat=4)):
+                env = {name: bool((row >> i) & 1) for i, name in enumerate(variables)}
+                self.assertEqual(bool((column >> row) & 1), _eval(expr, env))
+
+    def test_chunked_columns_above_chunk_size(self):
+        variables = [f"X{i}" for i in range(18)]
+        (column,) = truth_tables([parse_expr("X17&!X0|X16&X3")], variables)
+        for row in (0, 1, 0b1000, 1 << 17, (1 << 17) | 1, (1 << 16) | 0b1000, (1 << 18) - 1):
+            env = row_assignment(row, variables)
+            expected = (env["X17"] and not env["X0"]) or (env["X16"] and env["X3"])
+            self.assertEqual((column >> row) & 1, int(expected), row)
+
+    def test_counterexample_row(self):
+        a, b = truth_tables([parse_expr("A&B"), parse_expr("A|B")], ["A", "B"])
+        row = first_difference(a, b)
+        self.assertEqual(row_assignment(row, ["A", "B"]), {"A": 1, "B": 0})
+        self.assertIsNone(first_difference(a, a))
+
+    def test_too_many_variables(self):
+        with self.assertRaises(SynthesisError):
+            truth_tables([parse_expr("A")], [f"X{i}" for i in range(MAX_VARS + 1)])
+
+    def test_inspect_is_exhaustive_beyond_listed_rows(self):
+        expr = "|".join(f"X{i}&!X{i + 1}" for i in range(12))
+        out = inspect_complement_nnf(expr)
+        self.assertEqual(out["checks"]["checkedBy"], "truthTable")
+        self.assertEqual(out["checks"]["assignments"], 1 << 13)
+        self.assertTrue(out["checks"]["nnfEquivalent"])
+        self.assertTrue(out["checks"]["nnfComplementEquivalent"])
+        self.assertEqual(out["truthTable"], [])
+
+    def test_inspect_lists_rows_for_small_inputs(self):
+        out = inspect_complement_nnf("A&B")
+        self.assertEqual(len(out["truthTable"]), 4)
+        self.assertEqual(out["truthTable"][3], {"in": {"A": 1, "B": 1}, "f": 1, "nnfF": 1, "nnfNotF": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
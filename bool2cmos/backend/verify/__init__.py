@@ -0,0 +1 @@
+"""Equivalence-checking engines used by the debug endpoints."""
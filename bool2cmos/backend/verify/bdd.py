@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..api.synthesize import And, Const, Expr, Not, Or, Var
+
+# Reduced ordered BDDs.  Nodes are integers indexing parallel arrays; 0 and 1
+# are the terminals.  A unique table keeps every (level, lo, hi) triple once,
+# so two functions are equal exactly when their root ids are equal, and a
+# computed table memoizes ITE.
+
+FALSE = 0
+TRUE = 1
+
+
+class BDDLimitExceeded(RuntimeError):
+    pass
+
+
+class BDD:
+    def __init__(self, order: Sequence[str], max_nodes: Optional[int] = 200_000):
+        self.order: List[str] = list(order)
+        self.max_nodes = max_nodes
+        terminal_level = len(self.order)
+        self._level: List[int] = [terminal_level, terminal_level]
+        self._lo: List[int] = [FALSE, TRUE]
+        self._hi: List[int] = [FALSE, TRUE]
+        self._unique: Dict[Tuple[int, int, int], int] = {}
+        self._computed: Dict[Tuple[int, int, int], int] = {}
+        self._index = {name: i for i, name in enumerate(self.order)}
+
+    def __len__(self) -> int:
+        """Number of nodes allocated so far, terminals included."""
+        return len(self._level)
+
+    def var(self, name: str) -> int:
+        return self._mk(self._index[name], FALSE, TRUE)
+
+    def _mk(self, level: int, lo: int, hi: int) -> int:
+        if lo == hi:
+            return lo
+        key = (level, lo, hi)
+        node = self._unique.get(key)
+        if node is None:
+            node = len(self._level)
+            if self.max_nodes is not None and node >= self.max_nodes:
+                raise BDDLimitExceeded(f"BDD exceeded {self.max_nodes} nodes")
+            self._level.append(level)
+            self._lo.append(lo)
+            self._hi.append(hi)
+            self._unique[key] = node
+        return node
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+        key = (f, g, h)
+        out = self._computed.get(key)
+        if out is not None:
+            return out
+        level = min(self._level[f], self._level[g], self._level[h])
+        f0, f1 = self._cofactors(f, level)
+        g0, g1 = self._cofactors(g, level)
+        h0, h1 = self._cofactors(h, level)
+        out = self._mk(level, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self._computed[key] = out
+        return out
+
+    def _cofactors(self, f: int, level: int) -> Tuple[int, int]:
+        if self._level[f] != level:
+            return f, f
+        return self._lo[f], self._hi[f]
+
+    def negate(self, f: int) -> int:
+        return self.ite(f, FALSE, TRUE)
+
+    def conjoin(self, f: int, g: int) -> int:
+        return self.ite(f, g, FALSE)
+
+    def disjoin(self, f: int, g: int) -> int:
+        return self.ite(f, TRUE, g)
+
+    def xor(self, f: int, g: int) -> int:
+        return self.ite(f, self.negate(g), g)
+
+    def from_expr(self, expr: Expr, memo: Optional[Dict[Expr, int]] = None) -> int:
+        """Builds the BDD of `expr`; pass the same `memo` to share subterms across roots."""
+        memo = memo if memo is not None else {}
+        stack = [(expr, False)]
+        while stack:
+            e, expanded = stack.pop()
+            if e in memo:
+                continue
+            if isinstance(e, Var):
+                memo[e] = self.var(e.name)
+            elif isinstance(e, Const):
+                memo[e] = TRUE if e.value else FALSE
+            elif not expanded:
+                stack.append((e, True))
+                children = (e.child,) if isinstance(e, Not) else e.children  # type: ignore[union-attr]
+                stack.extend((c, False) for c in reversed(children) if c not in memo)
+            elif isinstance(e, Not):
+                memo[e] = self.negate(memo[e.child])
+            elif isinstance(e, And):
+                out = TRUE
+                for c in e.children:
+                    out = self.conjoin(out, memo[c])
+                memo[e] = out
+            elif isinstance(e, Or):
+                out = FALSE
+                for c in e.children:
+                    out = self.disjoin(out, memo[c])
+                memo[e] = out
+            else:
+                raise AssertionError(f"Unknown Expr: {type(e)}")
+        return memo[expr]
+
+    def node_count(self, roots: Iterable[int]) -> int:
+        """Number of distinct non-terminal nodes reachable from `roots`."""
+        seen = set()
+        stack = [r for r in roots if r > TRUE]
+        while stack:
+            f = stack.pop()
+            if f in seen:
+                continue
+            seen.add(f)
+            for c in (self._lo[f], self._hi[f]):
+                if c > TRUE and c not in seen:
+                    stack.append(c)
+        return len(seen)
+
+    def satisfy_one(self, f: int) -> Optional[Dict[str, int]]:
+        """One assignment making `f` true (unlisted variables are 0), or None."""
+        if f == FALSE:
+            return None
+        out = {name: 0 for name in self.order}
+        while f != TRUE:
+            name = self.order[self._level[f]]
+            if self._lo[f] != FALSE:
+                f = self._lo[f]
+            else:
+                out[name] = 1
+                f = self._hi[f]
+        return out
+
+
+def dfs_order(exprs: Sequence[Expr]) -> List[str]:
+    """
+    Variable order by first occurrence in a depth-first walk of `exprs`.
+
+    Variables that meet in the same subterm end up adjacent in the order, which
+    keeps BDDs of sum-of-products and factored forms small in practice.
+    """
+    order: List[str] = []
+    seen_vars = set()
+    visited = set()
+    stack = list(reversed(exprs))
+    while stack:
+        e = stack.pop()
+        if e in visited:
+            continue
+        visited.add(e)
+        if isinstance(e, Var):
+            if e.name not in seen_vars:
+                seen_vars.add(e.name)
+                order.append(e.name)
+        elif isinstance(e, Not):
+            stack.append(e.child)
+        elif isinstance(e, (And, Or)):
+            stack.extend(reversed(e.children))
+    return order
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..api.synthesize import And, Const, Expr, Not, Or, Var
+
+# A small CDCL SAT solver (two watched literals, first-UIP clause learning,
+# VSIDS-style branching with phase saving, Luby restarts) and a Tseitin miter
+# on top of it.  Literals are non-zero ints in DIMACS style: v is the variable,
+# -v its negation.
+
+_RESTART_UNIT = 100
+
+
+class SATBudgetExceeded(RuntimeError):
+    pass
+
+
+def _luby(i: int) -> int:
+    # 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ...
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i %= size
+    return 1 << seq
+
+
+def _index(lit: int) -> int:
+    return 2 * lit if lit > 0 else -2 * lit + 1
+
+
+class SATSolver:
+    def __init__(self) -> None:
+        self.num_vars = 0
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.restarts = 0
+        self.learnt = 0
+        self.clauses = 0  # problem clauses added, learnt ones excluded
+        self._clauses: List[List[int]] = []
+        self._watches: List[List[int]] = [[], []]
+        self._value: List[int] = [0]  # per variable: 1 true, -1 false, 0 unassigned
+        self._level: List[int] = [0]
+        self._reason: List[int] = [-1]
+        self._activity: List[float] = [0.0]
+        self._phase: List[bool] = [False]
+        self._trail: List[int] = []
+        self._trail_lim: List[int] = []
+        self._qhead = 0
+        self._var_inc = 1.0
+        self._heap: List[Tuple[float, int]] = []
+        self._ok = True
+
+    # -- problem construction --
+
+    def new_var(self) -> int:
+        self.num_vars += 1
+        v = self.num_vars
+        self._watches.extend(([], []))
+        self._value.append(0)
+        self._level.append(0)
+        self._reason.append(-1)
+        self._activity.append(0.0)
+        self._phase.append(False)
+        heapq.heappush(self._heap, (0.0, v))
+        return v
+
+    def add_clause(self, lits: Iterable[int]) -> bool:
+        """Adds a clause at decision level 0; returns False once the formula is unsatisfiable."""
+        if not self._ok:
+            return False
+        clause: List[int] = []
+        for lit in lits:
+            value = self._lit_value(lit)
+            if value == 1 or -lit in clause:
+                return True  # satisfied or tautological
+            if value == 0 and lit not in clause:
+                clause.append(lit)
+        self.clauses += 1
+        if not clause:
+            self._ok = False
+        elif len(clause) == 1:
+            self._enqueue(clause[0], -1)
+            self._ok = self._propagate() == -1
+        else:
+            self._attach(clause)
+        return self._ok
+
+    def value(self, var: int) -> Optional[bool]:
+        v = self._value[var]
+        return None if v == 0 else v > 0
+
+    # -- search --
+
+    def solve(self, max_conflicts: Optional[int] = None) -> bool:
+        """
+        Returns True (satisfiable, model readable through `value`) or False.
+
+        Raises SATBudgetExceeded after `max_conflicts` conflicts.
+        """
+        if not self._ok:
+            return False
+        self._cancel_until(0)
+        if self._propagate() != -1:
+            self._ok = False
+            return False
+        restart = 0
+        while True:
+            budget = _luby(restart) * _RESTART_UNIT
+            if max_conflicts is not None:
+                remaining = max_conflicts - self.conflicts
+                if remaining <= 0:
+                    self._cancel_until(0)
+                    raise SATBudgetExceeded(f"SAT search exceeded {max_conflicts} conflicts")
+                budget = min(budget, remaining)
+            status = self._search(budget)
+            if status is not None:
+                return status
+            restart += 1
+            self.restarts += 1
+
+    def _search(self, budget: int) -> Optional[bool]:
+        conflicts = 0
+        while True:
+            confl = self._propagate()
+            if confl != -1:
+                self.conflicts += 1
+                conflicts += 1
+                if not self._trail_lim:
+                    self._ok = False
+                    return False
+                learnt, backjump = self._analyze(confl)
+                self._cancel_until(backjump)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], -1)
+                else:
+                    self._enqueue(learnt[0], self._attach(learnt))
+                    self.learnt += 1
+                self._var_inc /= 0.95
+                continue
+            if conflicts >= budget:
+                self._cancel_until(0)
+                return None
+            v = self._pick_branch()
+            if v == 0:
+                return True
+            self.decisions += 1
+            self._trail_lim.append(len(self._trail))
+            self._enqueue(v if self._phase[v] else -v, -1)
+
+    def _attach(self, clause: List[int]) -> int:
+        ci = len(self._clauses)
+        self._clauses.append(clause)
+        self._watches[_index(clause[0])].append(ci)
+        self._watches[_index(clause[1])].append(ci)
+        return ci
+
+    def _lit_value(self, lit: int) -> int:
+        v = self._value[lit if lit > 0 else -lit]
+        return v if lit > 0 else -v
+
+    def _enqueue(self, lit: int, reason: int) -> None:
+        v = lit if lit > 0 else -lit
+        self._value[v] = 1 if lit > 0 else -1
+        self._level[v] = len(self._trail_lim)
+        self._reason[v] = reason
+        self._trail.append(lit)
+
+    def _propagate(self) -> int:
+        """Unit propagation; returns a conflicting clause index or -1."""
+        clauses = self._clauses
+        watches = self._watches
+        value = self._value
+        trail = self._trail
+        while self._qhead < len(trail):
+            false_lit = -trail[self._qhead]
+            self._qhead += 1
+            self.propagations += 1
+            ws = watches[_index(false_lit)]
+            i = j = 0
+            n = len(ws)
+            while i < n:
+                ci = ws[i]
+                i += 1
+                c = clauses[ci]
+                if c[0] == false_lit:
+                    c[0], c[1] = c[1], false_lit
+                first = c[0]
+                fv = value[first] if first > 0 else -value[-first]
+                if fv == 1:
+                    ws[j] = ci
+                    j += 1
+                    continue
+                for k in range(2, len(c)):
+                    lit = c[k]
+                    if (value[lit] if lit > 0 else -value[-lit]) != -1:
+                        c[1], c[k] = lit, false_lit
+                        watches[_index(lit)].append(ci)
+                        break
+                else:
+                    ws[j] = ci
+                    j += 1
+                    if fv == -1:
+                        while i < n:
+                            ws[j] = ws[i]
+                            j += 1
+                            i += 1
+                        del ws[j:]
+                        self._qhead = len(trail)
+                        return ci
+                    self._enqueue(first, ci)
+            del ws[j:]
+        return -1
+
+    def _analyze(self, confl: int) -> Tuple[List[int], int]:
+        # First-UIP learning: resolve backwards along the trail until a single
+        # literal of the current decision level remains.
+        level = self._level
+        current = len(self._trail_lim)
+        seen = set()
+        learnt = [0]
+        pending = 0
+        idx = len(self._trail) - 1
+        clause: Sequence[int] = self._clauses[confl]
+        p = 0
+        while True:
+            for q in clause if p == 0 else clause[1:]:
+                v = q if q > 0 else -q
+                if v in seen or level[v] == 0:
+                    continue
+                seen.add(v)
+                self._bump(v)
+                if level[v] == current:
+                    pending += 1
+                else:
+                    learnt.append(q)
+            while True:
+                p = self._trail[idx]
+                idx -= 1
+                if (p if p > 0 else -p) in seen:
+                    break
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self._clauses[self._reason[p if p > 0 else -p]]
+        learnt[0] = -p
+        if len(learnt) == 1:
+            return learnt, 0
+        best = max(range(1, len(learnt)), key=lambda k: level[abs(learnt[k])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, level[abs(learnt[1])]
+
+    def _bump(self, v: int) -> None:
+        self._activity[v] += self._var_inc
+        if self._activity[v] > 1e100:
+            self._activity = [a * 1e-100 for a in self._activity]
+            self._var_inc *= 1e-100
+            self._heap = [(-self._activity[u], u) for u in range(1, self.num_vars + 1) if self._value[u] == 0]
+            heapq.heapify(self._heap)
+        if self._value[v] == 0:
+            heapq.heappush(self._heap, (-self._activity[v], v))
+
+    def _pick_branch(self) -> int:
+        heap = self._heap
+        while heap:
+            _, v = heapq.heappop(heap)
+            if self._value[v] == 0:
+                return v
+        return 0
+
+    def _cancel_until(self, level: int) -> None:
+        if len(self._trail_lim) <= level:
+            return
+        start = self._trail_lim[level]
+        for lit in self._trail[start:]:
+            v = lit if lit > 0 else -lit
+            self._phase[v] = lit > 0
+            self._value[v] = 0
+            self._reason[v] = -1
+            heapq.heappush(self._heap, (-self._activity[v], v))
+        del self._trail[start:]
+        del self._trail_lim[level:]
+        self._qhead = len(self._trail)
+        if len(self._heap) > 8 * self.num_vars + 64:
+            # Drop stale entries left behind by lazy deletion.
+            self._heap = [(-self._activity[u], u) for u in range(1, self.num_vars + 1) if self._value[u] == 0]
+            heapq.heapify(self._heap)
+
+
+class Tseitin:
+    """Encodes expression DAGs into a solver, one fresh variable per gate."""
+
+    def __init__(self, solver: SATSolver):
+        self.solver = solver
+        self.inputs: Dict[str, int] = {}
+        self._memo: Dict[Expr, int] = {}
+
+    def encode(self, expr: Expr) -> int:
+        memo = self._memo
+        stack = [(expr, False)]
+        while stack:
+            e, expanded = stack.pop()
+            if e in memo:
+                continue
+            if isinstance(e, Var):
+                if e.name not in self.inputs:
+                    self.inputs[e.name] = self.solver.new_var()
+                memo[e] = self.inputs[e.name]
+            elif isinstance(e, Const):
+                t = self.solver.new_var()
+                self.solver.add_clause([t])
+                memo[e] = t if e.value else -t
+            elif not expanded:
+                stack.append((e, True))
+                children = (e.child,) if isinstance(e, Not) else e.children  # type: ignore[union-attr]
+                stack.extend((c, False) for c in reversed(children) if c not in memo)
+            elif isinstance(e, Not):
+                memo[e] = -memo[e.child]
+            elif isinstance(e, (And, Or)):
+                lits = [memo[c] for c in e.children]
+                if isinstance(e, Or):
+                    lits = [-lit for lit in lits]  # g = Or(xs)  <=>  -g = And(-xs)
+                g = self.solver.new_var()
+                for lit in lits:
+                    self.solver.add_clause([-g, lit])
+                self.solver.add_clause([g] + [-lit for lit in lits])
+                memo[e] = g if isinstance(e, And) else -g
+            else:
+                raise AssertionError(f"Unknown Expr: {type(e)}")
+        return memo[expr]
+
+
+@dataclass(frozen=True)
+class MiterResult:
+    equivalent: bool
+    counterexample: Optional[Dict[str, int]]
+    variables: int
+    clauses: int
+    conflicts: int
+    decisions: int
+    ms: float = field(default=0.0)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "equivalent": self.equivalent,
+            "variables": self.variables,
+            "clauses": self.clauses,
+            "conflicts": self.conflicts,
+            "decisions": self.decisions,
+            "ms": round(self.ms, 3),
+        }
+
+
+def check_equivalence(a: Expr, b: Expr, max_conflicts: Optional[int] = 200_000) -> MiterResult:
+    """
+    Proves `a` == `b` by showing the miter `a XOR b` unsatisfiable, or returns
+    a distinguishing input assignment.  Raises SATBudgetExceeded if the search
+    runs out of conflicts.
+    """
+    start = time.perf_counter()
+    solver = SATSolver()
+    encoder = Tseitin(solver)
+    la = encoder.encode(a)
+    lb = encoder.encode(b)
+    # a != b
+    solver.add_clause([la, lb])
+    solver.add_clause([-la, -lb])
+    sat = solver.solve(max_conflicts)
+    counterexample = None
+    if sat:
+        counterexample = {name: int(bool(solver.value(v))) for name, v in sorted(encoder.inputs.items())}
+    return MiterResult(
+        equivalent=not sat,
+        counterexample=counterexample,
+        variables=solver.num_vars,
+        clauses=solver.clauses,
+        conflicts=solver.conflicts,
+        decisions=solver.decisions,
+        ms=(time.perf_counter() - start) * 1000,
+    )
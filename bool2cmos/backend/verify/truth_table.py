@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..api.synthesize import And, Const, Expr, Not, Or, SynthesisError, Var
+
+# Bit-parallel truth tables: a function of n variables is a Python int with
+# 2**n bits, where bit r holds the value for the assignment whose bit i is the
+# value of variables[i].  And/Or/Not become &, |, ^ on whole columns.
+#
+# Columns are evaluated in chunks of 2**CHUNK_VARS rows: the low variables
+# repeat the same pattern in every chunk and the high ones are constant within
+# a chunk, so each operation works on a cache-sized int.
+
+MAX_VARS = 24
+CHUNK_VARS = 16
+
+_VAR, _CONST, _NOT, _AND, _OR = range(5)
+
+
+def var_mask(index: int, num_vars: int) -> int:
+    """Column of variable `index` over all 2**num_vars rows."""
+    rows = 1 << num_vars
+    if rows < 8:
+        return sum(1 << r for r in range(rows) if (r >> index) & 1)
+    if index < 3:
+        byte = sum(1 << r for r in range(8) if (r >> index) & 1)
+        return int.from_bytes(bytes((byte,)) * (rows // 8), "little")
+    run = 1 << (index - 3)
+    return int.from_bytes((b"\x00" * run + b"\xff" * run) * (rows // (16 * run)), "little")
+
+
+def truth_tables(exprs: Sequence[Expr], variables: Sequence[str]) -> List[int]:
+    """
+    Evaluates every expression over all 2**len(variables) assignments at once.
+
+    Shared subterms (across and within `exprs`) are evaluated once per chunk.
+    """
+    n = len(variables)
+    if n > MAX_VARS:
+        raise SynthesisError(f"Truth tables are limited to {MAX_VARS} variables, got {n}.")
+    program, roots = _compile(exprs, {name: i for i, name in enumerate(variables)})
+
+    low = min(n, CHUNK_VARS)
+    chunk_rows = 1 << low
+    full = (1 << chunk_rows) - 1
+    low_masks = [var_mask(i, low) for i in range(low)]
+    columns: List[List[int]] = [[] for _ in roots]
+
+    for chunk in range(1 << (n - low)):
+        masks = low_masks + [full if (chunk >> (i - low)) & 1 else 0 for i in range(low, n)]
+        values: List[int] = []
+        push = values.append
+        for op, arg in program:
+            if op == _VAR:
+                push(masks[arg])
+            elif op == _CONST:
+                push(full if arg else 0)
+            elif op == _NOT:
+                push(values[arg] ^ full)
+            elif op == _AND:
+                out = full
+                for i in arg:
+                    out &= values[i]
+                    if not out:
+                        break
+                push(out)
+            else:
+                out = 0
+                for i in arg:
+                    out |= values[i]
+                    if out == full:
+                        break
+                push(out)
+        for column, root in zip(columns, roots):
+            column.append(values[root])
+
+    if n == low:
+        return [column[0] for column in columns]
+    width = chunk_rows // 8
+    return [
+        int.from_bytes(b"".join(part.to_bytes(width, "little") for part in column), "little")
+        for column in columns
+    ]
+
+
+def _compile(exprs: Sequence[Expr], index: Dict[str, int]) -> Tuple[List[Tuple[int, Any]], List[int]]:
+    # Flattens the DAG into post-order instructions over value slots.
+    slots: Dict[Expr, int] = {}
+    program: List[Tuple[int, Any]] = []
+    stack = [(e, False) for e in reversed(exprs)]
+    while stack:
+        e, expanded = stack.pop()
+        if e in slots:
+            continue
+        if isinstance(e, Var):
+            try:
+                program.append((_VAR, index[e.name]))
+            except KeyError:
+                raise SynthesisError(f"Missing variable assignment: {e.name}")
+        elif isinstance(e, Const):
+            program.append((_CONST, e.value))
+        elif not expanded:
+            stack.append((e, True))
+            stack.extend((c, False) for c in reversed(_children(e)) if c not in slots)
+            continue
+        elif isinstance(e, Not):
+            program.append((_NOT, slots[e.child]))
+        elif isinstance(e, And):
+            program.append((_AND, tuple(slots[c] for c in e.children)))
+        elif isinstance(e, Or):
+            program.append((_OR, tuple(slots[c] for c in e.children)))
+        else:
+            raise AssertionError(f"Unknown Expr: {type(e)}")
+        slots[e] = len(program) - 1
+    return program, [slots[e] for e in exprs]
+
+
+def first_difference(a: int, b: int) -> Optional[int]:
+    """Index of the lowest row where two columns differ, or None."""
+    diff = a ^ b
+    if not diff:
+        return None
+    return (diff & -diff).bit_length() - 1
+
+
+def row_assignment(row: int, variables: Sequence[str]) -> Dict[str, int]:
+    return {name: (row >> i) & 1 for i, name in enumerate(variables)}
+
+
+def _children(e: Expr) -> Sequence[Expr]:
+    if isinstance(e, Not):
+        return (e.child,)
+    if isinstance(e, (And, Or)):
+        return e.children
+    return ()
@@ -1,6 +1,6 @@
-import React, { useMemo, useState } from 'react';
+import React, { useCallback, useEffect, useMemo, useRef, useState } from 'react';
 
-import { synthesize, toCMOSNetwork, SynthesisResponse } from './api/synthesize';
+import { synthesize, toCMOSNetwork, SynthesisMode, SynthesisResponse } from './api/synthesize';
 import { CMOSNetwork } from './types/network';
 import { ExpressionInput } from './components/ExpressionInput';
 import { ErrorPanel } from './components/ErrorPanel';
@@ -9,26 +9,59 @@ import { TransistorCount } from './components/TransistorCount';
 import { PDNView } from './components/PDNView';
 import { PUNView } from './components/PUNView';
 
+// While typing, each revision is previewed in incremental mode; once typing
+// pauses the expression is synthesized again in default mode, whose circuits
+// are the ones to keep.  Errors of half-typed previews are not shown.
+const PREVIEW_DELAY_MS = 150;
+const RENDER_DELAY_MS = 800;
+
 export default function App() {
   const [expr, setExpr] = useState<string>('A & (B | !C)');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [result, setResult] = useState<SynthesisResponse | null>(null);
+  const edited = useRef(false);
+  const latest = useRef(0);
 
   const cmos: CMOSNetwork | null = useMemo(() => {
     if (!result) return null;
     return toCMOSNetwork(result);
   }, [result]);
 
-  async function onSynthesize() {
-    setError(null);
-    setLoading(true);
+  const run = useCallback(async (text: string, mode: SynthesisMode) => {
+    // Only the response to the latest request is shown.
+    const id = ++latest.current;
     try {
-      const resp = await synthesize(expr);
+      const resp = await synthesize(text, mode);
+      if (id !== latest.current) return;
+      setError(null);
       setResult(resp);
     } catch (e) {
+      if (id !== latest.current || mode === 'incremental') return;
       setResult(null);
       setError(e instanceof Error ? e.message : String(e));
+    }
+  }, []);
+
+  useEffect(() => {
+    if (!edited.current) return;
+    const preview = window.setTimeout(() => run(expr, 'incremental'), PREVIEW_DELAY_MS);
+    const render = window.setTimeout(() => run(expr, 'default'), RENDER_DELAY_MS);
+    return () => {
+      window.clearTimeout(preview);
+      window.clearTimeout(render);
+    };
+  }, [expr, run]);
+
+  function onChange(value: string) {
+    edited.current = true;
+    setExpr(value);
+  }
+
+  async function onSynthesize() {
+    setLoading(true);
+    try {
+      await run(expr, 'default');
     } finally {
       setLoading(false);
     }
@@ -43,7 +76,7 @@ export default function App() {
         </p>
       </header>
 
-      <ExpressionInput value={expr} onChange={setExpr} onSubmit={onSynthesize} disabled={loading} />
+      <ExpressionInput value={expr} onChange={onChange} onSubmit={onSynthesize} disabled={loading} />
       <ErrorPanel message={error} />
 
       {result && (
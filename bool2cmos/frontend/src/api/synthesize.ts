@@ -37,6 +37,7 @@ export interface SynthesisResponse {
       invertedInputs: string[];
     };
   };
+  truncated?: boolean;
 }
 
 function mapApiNetwork(node: ApiNetwork, notOp: string): NetworkNode {
@@ -55,11 +56,19 @@ export function toCMOSNetwork(resp: SynthesisResponse): CMOSNetwork {
   };
 }
 
-export async function synthesize(expr: string): Promise<SynthesisResponse> {
+export type SynthesisMode = 'default' | 'exact' | 'incremental';
+
+// One edit session per page load: the backend keeps the work done for earlier
+// revisions.  `incremental` mode reuses most of it, but past 6 inputs its
+// circuits can be about twice the size of `default` ones, so it is only meant
+// for previews while the expression is being typed.
+const SESSION_ID = Math.random().toString(36).slice(2) + Date.now().toString(36);
+
+export async function synthesize(expr: string, mode: SynthesisMode = 'default'): Promise<SynthesisResponse> {
   const res = await fetch('/synthesize', {
     method: 'POST',
     headers: { 'content-type': 'application/json' },
-    body: JSON.stringify({ expr }),
+    body: JSON.stringify({ expr, session: SESSION_ID, mode }),
   });
 
   if (!res.ok) {